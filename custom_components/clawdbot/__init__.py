@@ -20,19 +20,32 @@ Notes:
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import bisect
 import datetime as dt
+import gzip
 import hashlib
 import json
 import logging
 import re
 import time
-from typing import Any
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, NamedTuple
+from urllib.parse import urlparse
 
 import aiohttp
+from aiohttp import web
+from aiohttp.payload import BytesPayload
 
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.core import SupportsResponse
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.json import json_bytes, json_dumps
 from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from homeassistant.util.json import json_loads
 from homeassistant.exceptions import HomeAssistantError
 
 DOMAIN = "clawdbot"
@@ -78,23 +91,55 @@ SERVICE_CREATED_ENTITY_INSTALL = "created_entity_install"
 SERVICE_CREATED_ENTITY_LIST = "created_entity_list"
 SERVICE_CREATED_ENTITY_REMOVE = "created_entity_remove"
 
+# Chat ingest filters (compiled once; used on every append/poll/sanitize).
+_CHAT_ANNOUNCE_RE = re.compile(r"\bANNOUNCE_\w+\b")
+_CHAT_CONTROL_RE = re.compile(r"\b(HEARTBEAT_OK|NO_REPLY)\b")
+_CHAT_PLUMBING_RE = re.compile(r"agent-to-agent announce", re.I)
+_CHAT_CONTROL_ANY_RE = re.compile(r"\b(HEARTBEAT_OK|NO_REPLY)\b|\bANNOUNCE_\w+\b", re.I)
+_CHAT_BAD_RE = re.compile(r"\bANNOUNCE_\w+\b|\bNO_REPLY\b|\bHEARTBEAT_OK\b|agent-to-agent announce", re.I)
+_WS_RE = re.compile(r"\s+")
+_SLUG_INVALID_RE = re.compile(r"[^a-z0-9_]+")
+_SLUG_UNDERSCORES_RE = re.compile(r"_+")
+
+
+# Gateway calls are frequent (chat polling), so keep a pooled keep-alive session
+# per runtime instead of paying TCP/TLS setup on every hop.
+GW_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=5, sock_connect=5, sock_read=25)
+
+
+def _gw_create_session() -> aiohttp.ClientSession:
+    """Create the shared gateway session (owned by the runtime; closed on swap/stop)."""
+    connector = aiohttp.TCPConnector(limit=64, keepalive_timeout=75, ttl_dns_cache=300, enable_cleanup_closed=True)
+    # HA's orjson-backed helpers for request bodies and responses. History/session
+    # payloads are often larger than the 64 KiB default read buffer.
+    return aiohttp.ClientSession(
+        connector=connector,
+        connector_owner=True,
+        json_serialize=json_dumps,
+        read_bufsize=2**18,
+    )
+
+
+def _gw_auth_headers(token: str) -> dict[str, str]:
+    # Content-Type is set by aiohttp from json=.
+    return {"Authorization": f"Bearer {token}"}
 
-async def _gw_post(session: aiohttp.ClientSession, url: str, token: str, payload: dict[str, Any]) -> dict[str, Any]:
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    async with session.post(url, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as r:
-        txt = await r.text()
+
+async def _gw_post(session: aiohttp.ClientSession, url: str, headers: dict[str, str], payload: dict[str, Any]) -> dict[str, Any]:
+    # headers come prebuilt from the runtime (rt["headers"]); rebuilt only when the token changes.
+    async with session.post(url, json=payload, headers=headers, timeout=GW_TIMEOUT) as r:
+        # Decode the body once on the success path; text is only needed for errors/fallback.
         if r.status >= 400:
-            raise RuntimeError(f"Gateway HTTP {r.status}: {txt}")
+            raise RuntimeError(f"Gateway HTTP {r.status}: {await r.text()}")
         try:
-            return await r.json()
+            return await r.json(loads=json_loads)
         except Exception:
-            return {"raw": txt}
+            return {"raw": await r.text()}
 
 
+@lru_cache(maxsize=16)
 def _derive_gateway_origin(panel_url: str) -> str:
     try:
-        from urllib.parse import urlparse
-
         u = urlparse(panel_url)
         if u.scheme and u.netloc:
             return f"{u.scheme}://{u.netloc}"
@@ -103,20 +148,73 @@ def _derive_gateway_origin(panel_url: str) -> str:
     return panel_url
 
 
+_blake2b = hashlib.blake2b
+
+
+def _fp_digest(base: str) -> str:
+    """Compact non-cryptographic dedupe fingerprint (blake2b, 16-byte digest)."""
+    return _blake2b(base.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=4096)
 def _iso_from_ms(ts_ms: int) -> str:
     return dt.datetime.fromtimestamp(ts_ms / 1000, tz=dt.timezone.utc).isoformat().replace("+00:00", "Z")
 
 def _runtime(hass) -> dict[str, Any]:
     """Return the runtime config dict (single source of truth for services)."""
     try:
-        return (hass.data.get(DOMAIN, {}) or {}).get("runtime", {}) or {}
-    except Exception:
+        return hass.data[DOMAIN]["runtime"] or {}
+    except (KeyError, TypeError):
         return {}
 
 
-def _runtime_gateway_parts(hass) -> tuple[aiohttp.ClientSession, str, str, str]:
-    """Return (session, gateway_origin, token, session_key) or raise HomeAssistantError."""
+class _GatewayParts(NamedTuple):
+    session: aiohttp.ClientSession
+    gateway_origin: str
+    headers: dict[str, str]
+    session_key: str
+
+
+class _RuntimeView(NamedTuple):
+    """Token-safe connection fields the panel views read on every request."""
+
+    gateway_url: str | None
+    gateway_origin: str | None
+    has_token: bool
+    session_key: str | None
+
+
+_NO_RUNTIME_VIEW = _RuntimeView(None, None, False, None)
+
+
+def _runtime_view(hass) -> _RuntimeView:
+    """Return the runtime's connection snapshot (bound by _bind_gateway_parts)."""
+    return _runtime(hass).get("view") or _NO_RUNTIME_VIEW
+
+
+def _bind_gateway_parts(rt: dict[str, Any]) -> None:
+    """Snapshot validated gateway settings onto the runtime (call after any change)."""
+    session = rt.get("session")
+    origin = rt.get("gateway_origin")
+    token = rt.get("token")
+    rt["view"] = _RuntimeView(rt.get("gateway_url"), origin, bool(token), rt.get("session_key"))
+    if token and rt.get("headers_token") != token:
+        rt["headers"] = _gw_auth_headers(str(token))
+        rt["headers_token"] = token
+    if session is None or not origin or not token:
+        rt["gateway_parts"] = None
+        return
+    rt["gateway_parts"] = _GatewayParts(
+        session, str(origin), rt["headers"], str(rt.get("session_key") or DEFAULT_SESSION_KEY)
+    )
+
+
+def _runtime_gateway_parts(hass) -> tuple[aiohttp.ClientSession, str, dict[str, str], str]:
+    """Return (session, gateway_origin, headers, session_key) or raise HomeAssistantError."""
     rt = _runtime(hass)
+    parts = rt.get("gateway_parts")
+    if parts is not None:
+        return parts
     session: aiohttp.ClientSession | None = rt.get("session")
     gateway_origin = rt.get("gateway_origin")
     token = rt.get("token")
@@ -128,14 +226,15 @@ def _runtime_gateway_parts(hass) -> tuple[aiohttp.ClientSession, str, str, str]:
         raise HomeAssistantError("token not set (use Setup → Save/Apply)")
     if session is None:
         raise HomeAssistantError("gateway session not initialized")
-    return session, str(gateway_origin), str(token), str(session_key)
+    headers = rt.get("headers") if rt.get("headers_token") == token else None
+    return session, str(gateway_origin), headers or _gw_auth_headers(str(token)), str(session_key)
 
 
-def _runtime_gateway_parts_http(hass) -> tuple[aiohttp.ClientSession | None, str | None, str | None, str | None, str | None]:
-    """HTTP-view helper: returns (session, origin, token, session_key, error)."""
+def _runtime_gateway_parts_http(hass) -> tuple[aiohttp.ClientSession | None, str | None, dict[str, str] | None, str | None, str | None]:
+    """HTTP-view helper: returns (session, origin, headers, session_key, error)."""
     try:
-        session, origin, token, session_key = _runtime_gateway_parts(hass)
-        return session, origin, token, session_key, None
+        session, origin, headers, session_key = _runtime_gateway_parts(hass)
+        return session, origin, headers, session_key, None
     except Exception as e:
         return None, None, None, None, str(e)
 
@@ -185,17 +284,22 @@ CREATED_ENTITIES_STORE_KEY = "clawdbot_created_entities"
 CREATED_ENTITIES_STORE_VERSION = 1
 
 
+# Hot stores (chat history, journal, agent history) coalesce bursts of writes into one
+# flush; Store.async_load returns pending data and HA flushes on final write.
+STORE_SAVE_DELAY_S = 10
+
 PANEL_BUILD_ID = "v0.2.20.179"
 INTEGRATION_BUILD_ID = "v0.2.34"
 
 PANEL_JS = r"""
 // Clawdbot panel JS (served by HA; avoids inline-script CSP issues)
 (function(){
-  try{
-    const el = document.getElementById('clawdbot-config');
-    const txt = el ? (el.textContent || el.innerText || '{}') : '{}';
-    window.__CLAWDBOT_CONFIG__ = JSON.parse(txt || '{}');
-  } catch(e){ window.__CLAWDBOT_CONFIG__ = {}; }
+  // Config is served separately (same as panel.js); boot waits for it below.
+  window.__CLAWDBOT_CONFIG__ = {};
+  window.__clawdbotConfigReady = fetch('/clawdbot-config.json', { credentials: 'same-origin' })
+    .then(r => r.ok ? r.json() : {})
+    .catch(() => ({}))
+    .then((cfg) => { Object.assign(window.__CLAWDBOT_CONFIG__, (cfg && typeof cfg === 'object') ? cfg : {}); });
 
     // Theme binding: copy HA CSS variables from parent document into this iframe.
     // CSS custom properties do not inherit across iframe boundaries.
@@ -246,7 +350,6 @@ PANEL_JS = r"""
   let chatLastPollTs = null;
   let chatLastPollAppended = 0;
   let chatLastPollError = null;
-  const BUILD_ID = ((window.__CLAWDBOT_CONFIG__||{}).build_id || 'unknown');
   const DEBUG_UI = (() => {
     try{
       const qs1 = new URLSearchParams(window.location.search || '');
@@ -270,7 +373,7 @@ PANEL_JS = r"""
       const el = qs('#debugStamp');
       if (!el) return;
       el.style.display = 'block';
-      el.textContent = `build:${BUILD_ID} step:${step}` + (extra ? ` (${extra})` : '');
+      el.textContent = `build:${(window.__CLAWDBOT_CONFIG__||{}).build_id || 'unknown'} step:${step}` + (extra ? ` (${extra})` : '');
     } catch(e){}
   }
   function escapeHtml(txt){
@@ -514,7 +617,17 @@ PANEL_JS = r"""
     return body;
   }
 
+  // Gateway envelopes are unwrapped repeatedly (sessions list, key extraction);
+  // memoize per response object so the embedded JSON text is parsed once.
+  const _unwrapCache = new WeakMap();
+  const _sessionsArrayCache = new WeakMap();
+
   function unwrapGatewayResult(obj){
+    const cacheable = !!(obj && typeof obj === 'object');
+    if (cacheable) {
+      const hit = _unwrapCache.get(obj);
+      if (hit !== undefined) return hit;
+    }
     let raw = obj;
     for (let i = 0; i < 4; i++) {
       if (raw && typeof raw === 'object' && raw.result && (typeof raw.result === 'object' || Array.isArray(raw.result))) {
@@ -527,10 +640,22 @@ PANEL_JS = r"""
         try { raw = JSON.parse(t); } catch(_e) {}
       }
     }
+    if (cacheable) _unwrapCache.set(obj, raw);
     return raw;
   }
 
   function extractSessionsArray(resp){
+    if (resp && typeof resp === 'object') {
+      const hit = _sessionsArrayCache.get(resp);
+      if (hit !== undefined) return hit;
+      const arr = _extractSessionsArray(resp);
+      _sessionsArrayCache.set(resp, arr);
+      return arr;
+    }
+    return _extractSessionsArray(resp);
+  }
+
+  function _extractSessionsArray(resp){
     const raw = unwrapGatewayResult(resp);
     if (Array.isArray(raw)) return raw;
     if (!raw || typeof raw !== 'object') return [];
@@ -1811,26 +1936,20 @@ async function fetchStatesRest(hass){
     }
   }
 
+  const __clawdbotBootWhenReady = () => {
+    Promise.resolve(window.__clawdbotConfigReady).then(__clawdbotBoot, __clawdbotBoot);
+  };
   if (document.readyState === 'loading') {
-    document.addEventListener('DOMContentLoaded', __clawdbotBoot, { once: true });
+    document.addEventListener('DOMContentLoaded', __clawdbotBootWhenReady, { once: true });
   } else {
-    __clawdbotBoot();
+    __clawdbotBootWhenReady();
   }
 })();
 })();
 
 """
 
-PANEL_HTML = """<!doctype html>
-<html>
-<head>
-  <meta charset=\"utf-8\"/>
-  <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\"/>
-  <meta http-equiv=\"Cache-Control\" content=\"no-store\"/>
-  <meta http-equiv=\"Pragma\" content=\"no-cache\"/>
-  <meta http-equiv=\"Expires\" content=\"0\"/>
-  <title>Clawdbot</title>
-  <style>
+PANEL_CSS = """
     html{
       --cb-page-bg:color-mix(in srgb, var(--primary-background-color) 92%, #000 8%);
       --cb-card-bg:color-mix(in srgb, var(--ha-card-background, var(--card-background-color)) 92%, #fff 8%);
@@ -1929,13 +2048,19 @@ PANEL_HTML = """<!doctype html>
       text-shadow:0 1px 0 rgba(0,0,0,.25), 0 0 16px color-mix(in srgb, var(--claw-accent-a) 28%, transparent);
       margin-left:10px;
     }
-    .agent-mood.mood-alert{color:#ff4040; text-shadow:0 1px 0 rgba(0,0,0,.25), 0 0 18px rgba(255,64,64,.35);} 
-    .agent-mood.mood-focused{color:#b57bff; text-shadow:0 1px 0 rgba(0,0,0,.25), 0 0 18px rgba(181,123,255,.35);} 
-    .agent-mood.mood-degraded{color:#ffa600; text-shadow:0 1px 0 rgba(0,0,0,.25), 0 0 18px rgba(255,166,0,.30);} 
-    .agent-mood.mood-calm{color:#00f5ff; text-shadow:0 1px 0 rgba(0,0,0,.25), 0 0 18px rgba(0,245,255,.28);} 
-    .agent-mood.mood-lost{color:#9aa4b2; text-shadow:none;} 
-    .agent-mood.mood-playful{color:#ff3e8e; text-shadow:0 1px 0 rgba(0,0,0,.25), 0 0 18px rgba(255,62,142,.28);} 
-    .agent-mood.mood-tired{color:#c7cbd1; text-shadow:0 1px 0 rgba(0,0,0,.25);} 
+    /* Mood palette: the panel sets one data-mood attribute on #viewAgent and every
+       mood-aware descendant below picks its colors up through these properties. */
+    #viewAgent[data-mood]{--cb-mood-text-glow:.30; --cb-mood-edge:.30; --cb-mood-glow:.14; --cb-mood-fill:.18;}
+    #viewAgent[data-mood=\"calm\"]{--cb-mood-rgb:0,245,255; --cb-mood-rgb-2:123,44,255; --cb-mood-text-glow:.28; --cb-mood-edge:.22; --cb-mood-glow:0; --cb-mood-fill:.20;}
+    #viewAgent[data-mood=\"alert\"]{--cb-mood-rgb:255,64,64; --cb-mood-rgb-2:255,62,142; --cb-mood-text-glow:.35; --cb-mood-edge:.55; --cb-mood-glow:.26; --cb-mood-fill:.22;}
+    #viewAgent[data-mood=\"focused\"]{--cb-mood-rgb:181,123,255; --cb-mood-rgb-2:0,245,255; --cb-mood-text-glow:.35; --cb-mood-edge:.60; --cb-mood-glow:.26; --cb-mood-fill:.26;}
+    #viewAgent[data-mood=\"degraded\"]{--cb-mood-rgb:255,166,0; --cb-mood-rgb-2:255,64,64; --cb-mood-edge:.50; --cb-mood-glow:.20; --cb-mood-fill:.20;}
+    #viewAgent[data-mood=\"playful\"]{--cb-mood-rgb:255,62,142; --cb-mood-rgb-2:123,44,255; --cb-mood-text-glow:.28;}
+    #viewAgent[data-mood=\"tired\"]{--cb-mood-rgb:199,203,209; --cb-mood-rgb-2:140,150,160; --cb-mood-text-glow:0; --cb-mood-glow:0; --cb-mood-fill:.10;}
+    #viewAgent[data-mood=\"lost\"]{--cb-mood-rgb:154,164,178; --cb-mood-rgb-2:0,0,0; --cb-mood-text-glow:0; --cb-mood-edge:.20; --cb-mood-glow:0; --cb-mood-fill:.12;}
+    #viewAgent[data-mood] .agent-mood{color:rgb(var(--cb-mood-rgb));
+      text-shadow:0 1px 0 rgba(0,0,0,.25), 0 0 18px rgba(var(--cb-mood-rgb), var(--cb-mood-text-glow));
+    }
 
     /* Mood / sentiment color accents */
     .agent-hero{
@@ -1948,53 +2073,17 @@ PANEL_HTML = """<!doctype html>
     /* Ensure inner wrappers never paint a background strip */
     .agent-hero *{background-color: transparent !important;}
 
-    /* Mood fill: set background on the outermost rounded container so it fills all the way to the bottom. */
-    .agent-hero.mood-calm{
-      background:
-        radial-gradient(1200px 360px at 18% 0%, rgba(0,245,255,.20), transparent 62%),
-        radial-gradient(1200px 360px at 84% 12%, rgba(123,44,255,.16), transparent 64%),
-        linear-gradient(180deg, color-mix(in srgb, var(--cb-card-bg) 96%, transparent), color-mix(in srgb, var(--cb-card-bg) 92%, rgba(0,245,255,.06)));
-      box-shadow:0 0 0 1px color-mix(in srgb, var(--claw-accent-a) 22%, transparent), var(--cb-shadow-soft);
-    }
-
-    .agent-hero.mood-alert{
-      background:
-        radial-gradient(1200px 360px at 16% 0%, rgba(255,64,64,.22), transparent 62%),
-        radial-gradient(1200px 360px at 82% 12%, rgba(255,62,142,.12), transparent 64%),
-        linear-gradient(180deg, color-mix(in srgb, var(--cb-card-bg) 96%, transparent), color-mix(in srgb, var(--cb-card-bg) 90%, rgba(255,64,64,.08)));
-      border-color: rgba(255,64,64,.55);
-      box-shadow:0 0 0 1px rgba(255,64,64,.55), 0 0 38px rgba(255,64,64,.26), var(--cb-shadow-soft);
-    }
-
-    .agent-hero.mood-focused{
-      background:
-        radial-gradient(1200px 520px at 20% 0%, rgba(181,123,255,.26), transparent 68%),
-        radial-gradient(1200px 520px at 84% 12%, rgba(0,245,255,.12), transparent 70%),
-        linear-gradient(180deg,
-          color-mix(in srgb, var(--cb-card-bg) 94%, rgba(181,123,255,.10)),
-          color-mix(in srgb, var(--cb-card-bg) 88%, rgba(181,123,255,.14)));
-      background-repeat:no-repeat;
-      background-attachment:scroll;
-      border-color: rgba(181,123,255,.60);
-      box-shadow:0 0 0 1px color-mix(in srgb, var(--claw-accent-b) 38%, transparent), 0 0 34px color-mix(in srgb, var(--claw-accent-b) 26%, transparent), var(--cb-shadow-soft);
-    }
-
-    .agent-hero.mood-degraded{
+    /* Mood fill: set background on the outermost rounded container so it fills all the way to the bottom.
+       Playful and tired only tint the mood label; the hero keeps its neutral fill. */
+    #viewAgent:is([data-mood=\"calm\"],[data-mood=\"alert\"],[data-mood=\"focused\"],[data-mood=\"degraded\"],[data-mood=\"lost\"]) .agent-hero{
       background:
-        radial-gradient(1200px 360px at 18% 0%, rgba(255,166,0,.20), transparent 62%),
-        radial-gradient(1200px 360px at 84% 12%, rgba(255,64,64,.08), transparent 64%),
-        linear-gradient(180deg, color-mix(in srgb, var(--cb-card-bg) 96%, transparent), color-mix(in srgb, var(--cb-card-bg) 90%, rgba(255,166,0,.08)));
-      border-color: rgba(255,166,0,.52);
-      box-shadow:0 0 0 1px rgba(255,166,0,.48), 0 0 34px rgba(255,166,0,.20), var(--cb-shadow-soft);
-    }
-
-    .agent-hero.mood-lost{
-      background:
-        radial-gradient(1200px 360px at 18% 0%, rgba(140,150,160,.12), transparent 62%),
-        radial-gradient(1200px 360px at 84% 12%, rgba(0,0,0,.06), transparent 64%),
-        linear-gradient(180deg, color-mix(in srgb, var(--cb-card-bg) 96%, transparent), color-mix(in srgb, var(--cb-card-bg) 92%, rgba(0,0,0,.04)));
-      opacity:0.92; filter:saturate(.92);
+        radial-gradient(1200px 360px at 18% 0%, rgba(var(--cb-mood-rgb), var(--cb-mood-fill)), transparent 62%),
+        radial-gradient(1200px 360px at 84% 12%, rgba(var(--cb-mood-rgb-2), calc(var(--cb-mood-fill) * .6)), transparent 64%),
+        linear-gradient(180deg, color-mix(in srgb, var(--cb-card-bg) 96%, transparent), color-mix(in srgb, var(--cb-card-bg) 90%, rgba(var(--cb-mood-rgb), .08)));
+      border-color: rgba(var(--cb-mood-rgb), var(--cb-mood-edge));
+      box-shadow:0 0 0 1px rgba(var(--cb-mood-rgb), var(--cb-mood-edge)), 0 0 36px rgba(var(--cb-mood-rgb), var(--cb-mood-glow)), var(--cb-shadow-soft);
     }
+    #viewAgent[data-mood=\"lost\"] .agent-hero{opacity:0.92; filter:saturate(.92);}
     .btn{height:44px;padding:0 16px;border:1px solid var(--cb-border);border-radius:12px;
       background:linear-gradient(135deg,
         color-mix(in srgb, var(--secondary-background-color) 88%, var(--cb-card-bg)),
@@ -2011,11 +2100,15 @@ PANEL_HTML = """<!doctype html>
       color:#081019;box-shadow:0 8px 24px color-mix(in srgb, var(--claw-btn-glow) 60%, transparent);
     }
     .btn.primary:hover{filter:brightness(1.02);}
+    /* Tab bar: the accent wash sits on a near-opaque surface layer, which gives the
+       frosted look without a backdrop-filter (no blurred layer re-composited per frame). */
     .tabs{display:inline-flex;align-items:center;gap:0;margin-top:12px;margin-bottom:14px;
       padding:3px;border-radius:14px;
-      background:color-mix(in srgb, var(--secondary-background-color) 92%, var(--cb-card-bg));
-      border:1px solid var(--cb-border);
-      box-shadow:inset 0 0 0 1px color-mix(in srgb, var(--divider-color) 75%, transparent);
+      background:
+        linear-gradient(135deg, color-mix(in srgb, var(--claw-bg-1) 80%, transparent), color-mix(in srgb, var(--claw-bg-2) 75%, transparent)),
+        color-mix(in srgb, var(--cb-surface-bg) 88%, transparent);
+      border:1px solid color-mix(in srgb, var(--cb-border) 60%, var(--claw-accent-a) 12%);
+      box-shadow:0 14px 34px rgba(0,0,0,.10);
     }
     .tab{height:40px;min-width:96px;padding:0 14px;border:none;border-radius:10px;
       background:transparent;
@@ -2044,6 +2137,8 @@ PANEL_HTML = """<!doctype html>
     .pill.bad{border-color:var(--error-color, #b00020);background:color-mix(in srgb, var(--error-color, #b00020) 15%, transparent);color:var(--error-color, #b00020);}
     .entities{max-height:420px;overflow:auto;border:1px solid var(--cb-border-strong);border-radius:10px;padding:10px;box-shadow:inset 0 0 0 1px color-mix(in srgb, var(--divider-color) 70%, transparent);}
     .grid2{display:grid;grid-template-columns:repeat(2,minmax(0,1fr));gap:12px;}
+    .recs-card{border:1px solid #f1f5f9;border-radius:10px;padding:10px 12px;margin:8px 0;}
+    .recs-card .muted{margin-top:4px;}
     .setup-grid{display:grid;grid-template-columns:repeat(2,minmax(0,1fr));gap:12px;align-items:start;}
     @media (max-width: 860px){ .setup-grid{grid-template-columns:1fr;} }
 
@@ -2071,8 +2166,6 @@ PANEL_HTML = """<!doctype html>
       #agentVizWrap{width:72px !important; height:72px !important; position:absolute !important; top:12px !important; right:12px !important; left:auto !important; z-index:6 !important;}
       #agentViz{width:72px !important; height:72px !important;}
 
-      /* STT widget legacy float is hidden */
-      #agentSttFloat{display:none !important;}
       /* Header transcript row becomes stacked on mobile */
       #appSubtitleRow{flex-wrap:wrap !important;}
       #appTagline{flex:1 1 100% !important;}
@@ -2147,7 +2240,16 @@ PANEL_HTML = """<!doctype html>
 
     /* Kill giant default radio circles if any legacy suggestion UI remains */
     .choice input[type=radio]{display:none;}
-  </style>
+"""
+
+PANEL_HTML = """<!doctype html>
+<html>
+<head>
+  <meta charset=\"utf-8\"/>
+  <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\"/>
+  <title>Clawdbot</title>
+  <link rel=\"stylesheet\" href=\"/clawdbot-panel.css?v=__PANEL_ASSET_VERSION__\"/>
+  <link rel=\"modulepreload\" href=\"/clawdbot-panel.js?v=__PANEL_ASSET_VERSION__\" integrity=\"__PANEL_JS_SRI__\" crossorigin/>
 </head>
 <body>
   <div class=\"surface\">
@@ -2155,7 +2257,6 @@ PANEL_HTML = """<!doctype html>
     <h1 id=\"appTitle\" style=\"margin:0;flex:1 1 auto;min-width:0\">Hello, this is Agent 0</h1>
     <div style=\"flex:0 0 auto;display:flex;gap:8px;align-items:center\">
       <button class=\"btn primary\" id=\"btnListen\" style=\"height:34px;border-radius:12px;padding:0 12px\">Listen</button>
-      <button class=\"btn\" id=\"btnStopListen\" disabled style=\"display:none;height:34px;border-radius:12px;padding:0 12px\">Stop</button>
     </div>
   </div>
   <div class=\"muted\" id=\"debugStamp\" style=\"display:none;margin:6px 0 0 0\"></div>
@@ -2165,11 +2266,9 @@ PANEL_HTML = """<!doctype html>
     <div id=\"transcript\" style=\"flex:0 1 46%;min-width:0;text-align:right;max-height:20px;overflow:hidden;padding:0;background:transparent;border:none;white-space:nowrap;text-overflow:ellipsis;font-size:12px;font-weight:800;color:#25d366\"></div>
   </div>
 
-  <script type=\"application/json\" id=\"clawdbot-config\">__CONFIG_JSON__</script>
-  <script src=\"/clawdbot-panel.js?v=__PANEL_BUILD_ID__\"></script>
-  </script>
+  <script type=\"module\" src=\"/clawdbot-panel.js?v=__PANEL_ASSET_VERSION__\" integrity=\"__PANEL_JS_SRI__\" crossorigin></script>
 
-  <div class=\"tabs\" style=\"background:linear-gradient(135deg, color-mix(in srgb, var(--claw-bg-1) 80%, transparent), color-mix(in srgb, var(--claw-bg-2) 75%, transparent));border:1px solid color-mix(in srgb, var(--cb-border) 60%, var(--claw-accent-a) 12%);box-shadow:0 14px 34px rgba(0,0,0,.10);backdrop-filter: blur(10px);" >
+  <div class=\"tabs\">
     <button type=\"button\" class=\"tab active\" id=\"tabAgent\">Agent</button>
     <button type=\"button\" class=\"tab\" id=\"tabCockpit\">Cockpit</button>
     <button type=\"button\" class=\"tab\" id=\"tabChat\">Chat</button>
@@ -2264,7 +2363,7 @@ PANEL_HTML = """<!doctype html>
           <button class=\"btn\" id=\"btnThemeReset\">Reset</button>
           <span class=\"muted\" id=\"themeResult\"></span>
         </div>
-        <div id=\"themePreview\" style=\"margin-top:10px;height:64px;border-radius:16px;border:1px solid var(--divider-color);background:linear-gradient(120deg, rgba(0,245,255,.18), rgba(123,44,255,.18)), color-mix(in srgb, var(--ha-card-background, var(--card-background-color)) 85%, transparent)\"></div>
+        <div id=\"themePreview\" style=\"margin-top:10px;height:64px;border-radius:16px;border:1px solid var(--divider-color);background:linear-gradient(120deg, color-mix(in srgb, var(--claw-accent-a) 22%, transparent), color-mix(in srgb, var(--claw-accent-b) 18%, transparent)), color-mix(in srgb, var(--ha-card-background, var(--card-background-color)) 85%, transparent)\"></div>
       </div>
 
       <div style=\"margin-top:14px\">
@@ -2482,23 +2581,11 @@ PANEL_HTML = """<!doctype html>
   </div>
 
   <div id=\"viewAgent\" class=\"hidden\">
-    <!-- Voice-to-text control (desktop floats top-right; mobile becomes in-flow via CSS) -->
-    <div id=\"agentSttFloat\" style=\"display:none;position:fixed;top:calc(env(safe-area-inset-top, 0px) + 72px);right:14px;z-index:50;max-width:min(420px,calc(100vw - 28px));\">
-      <div style=\"margin:0;padding:0;background:transparent;border:none;\">
-        <div class=\"row\" style=\"justify-content:flex-end;align-items:center;gap:10px;flex-wrap:nowrap\">
-          <button class=\"btn primary\" id=\"btnListenOld\" style=\"height:36px;border-radius:12px;padding:0 12px;flex:0 0 auto\">Listen</button>
-          <button class=\"btn\" id=\"btnStopListenOld\" disabled style=\"display:none;height:36px;border-radius:12px;padding:0 12px\">Stop</button>
-        </div>
-        <div class=\"muted\" id=\"listenStatusOld\" style=\"display:none\"></div>
-        <div id=\"transcriptOld\" style=\"margin-top:6px;max-height:40px;overflow:hidden;padding:0;background:transparent;border:none;white-space:nowrap;text-overflow:ellipsis;font-size:12px;font-weight:800;color:#25d366\"></div>
-      </div>
-    </div>
-
     <div class=\"card agent-hero\" id=\"agentHeroCard\" style=\"position:relative;overflow:hidden\">
       <div style=\"position:absolute;inset:0;background:radial-gradient(circle at 20% 30%, rgba(0,245,255,.22), transparent 60%), radial-gradient(circle at 70% 40%, rgba(123,44,255,.20), transparent 65%);filter:blur(0px);pointer-events:none;z-index:1\"></div>
       <div class=\"row\" style=\"position:relative;z-index:1;align-items:center;justify-content:space-between;gap:14px;flex-wrap:wrap\">
         <div class=\"row\" style=\"gap:14px;align-items:center\">
-          <button type=\"button\" id=\"agentAvatarBtn\" class=\"btn\" style=\"width:128px;height:128px;border-radius:28px;display:flex;align-items:center;justify-content:center;overflow:hidden;background:linear-gradient(135deg, rgba(0,245,255,.25), rgba(123,44,255,.25));border:1px solid color-mix(in srgb, var(--primary-color) 45%, var(--divider-color));font-weight:800;letter-spacing:.5px;font-size:28px;cursor:pointer;position:relative;padding:0\">\n            <img id=\"agentAvatarImg\" alt=\"agent avatar\" style=\"display:none;width:100%;height:100%;object-fit:cover\"/>\n            <div id=\"agentAvatarFallback\" style=\"display:flex;align-items:center;justify-content:center;width:100%;height:100%\">A0</div>\n          </button>\n          <div id=\"avatarGenModal\" class=\"modal hidden\" style=\"position:fixed;inset:0;background:rgba(0,0,0,0.45);display:none;align-items:center;justify-content:center;z-index:10000;\">\n            <div class=\"modal-card\" style=\"max-width:720px;width:min(720px,92vw);max-height:min(78vh,720px);overflow:auto;color:var(--primary-text-color);border-radius:20px;padding:22px;border:1px solid color-mix(in srgb, var(--claw-accent-a) 45%, transparent);box-shadow:0 26px 80px rgba(0,0,0,0.55);background:linear-gradient(135deg, color-mix(in srgb, var(--cb-card-bg) 92%, var(--claw-accent-a) 10%), color-mix(in srgb, var(--cb-card-bg) 92%, var(--claw-accent-b) 10%));\">\n              <div style=\"display:flex;justify-content:space-between;align-items:center;gap:12px\">\n                <div style=\"font-weight:950;letter-spacing:-0.02em;font-size:18px\">Describe your agent</div>\n                <button class=\"btn\" id=\"avatarGenClose\" title=\"Close\" style=\"width:38px;height:38px;border-radius:12px;padding:0;display:flex;align-items:center;justify-content:center;background:rgba(255,255,255,0.06);border:1px solid rgba(255,255,255,0.10);\">✕</button>\n              </div>\n              <div class=\"muted\" style=\"margin-top:8px;line-height:1.35;color:var(--secondary-text-color)\">Describe what your agent looks like. Or hit <b>Surprise me</b> to auto-draft a backstory + appearance.</div>\n              <textarea id=\"avatarGenText\" style=\"margin-top:12px;width:100%;min-height:120px;resize:vertical;border-radius:16px;border:1px solid color-mix(in srgb, var(--claw-accent-a) 25%, var(--cb-border-strong));padding:12px 24px 12px 18px;background:color-mix(in srgb, var(--cb-card-bg) 86%, #000);color:var(--primary-text-color);font-family:inherit;outline:none;box-sizing:border-box\" placeholder=\"e.g., Warm smile, short black hair, futuristic pilot jacket...\"></textarea>\n              <div id=\"avatarGenPreviewWrap\" style=\"margin-top:12px;display:flex;gap:12px;align-items:center;justify-content:space-between\">\n                <div style=\"display:flex;gap:12px;align-items:center\">\n                  <div style=\"position:relative;width:96px;height:96px\">\n                    <img id=\"avatarGenPreviewImg\" alt=\"avatar preview\" style=\"width:96px;height:96px;border-radius:18px;object-fit:cover;border:1px solid color-mix(in srgb, var(--claw-accent-a) 30%, var(--cb-border-strong));background:color-mix(in srgb, var(--cb-card-bg) 86%, #000);display:none\"/>\n                    <div id=\"avatarGenPreviewStatus\" class=\"muted\" style=\"position:absolute;inset:0;display:flex;align-items:center;justify-content:center;text-align:center;padding:10px;border-radius:18px;border:1px dashed color-mix(in srgb, var(--claw-accent-a) 28%, var(--cb-border-strong));background:color-mix(in srgb, var(--cb-card-bg) 75%, transparent);font-size:12px;color:var(--secondary-text-color)\">No preview yet</div>\n                  </div>\n                  <div class=\"muted\" style=\"font-size:12px;color:var(--secondary-text-color)\">Preview for this run. Click <b>Use this</b> to apply as your profile avatar.</div>\n                </div>\n                <button class=\"btn\" id=\"avatarGenUse\" data-testid=\"avatar-use\" style=\"height:34px;border-radius:12px;padding:0 12px;background:color-mix(in srgb, var(--claw-accent-a) 18%, var(--cb-card-bg));border:1px solid color-mix(in srgb, var(--claw-accent-a) 40%, var(--cb-border-strong));color:var(--primary-text-color);font-weight:800\">Use this</button>\n              </div>\n              <div id=\"avatarGenBtnRowWrap\" style=\"position:relative\">\n                <div id=\"avatarGenBtnRowBlocker\" style=\"display:none;position:absolute;inset:-6px -6px -6px -6px;z-index:5;background:transparent\"></div>\n                <div class=\"row\" style=\"justify-content:flex-end;gap:10px;margin-top:12px;flex-wrap:wrap;position:relative;z-index:1\">\n                  <button class=\"btn\" id=\"avatarGenCancel\" data-testid=\"avatar-cancel\" style=\"display:none;height:38px;border-radius:14px;padding:0 14px;background:color-mix(in srgb, var(--cb-card-bg) 80%, transparent);border:1px solid color-mix(in srgb, var(--cb-border-strong) 80%, transparent);color:var(--primary-text-color);\">Cancel</button>\n                  <button class=\"btn\" id=\"avatarGenSurprise\" data-testid=\"avatar-surprise\" style=\"height:38px;border-radius:14px;padding:0 14px;background:color-mix(in srgb, var(--cb-card-bg) 80%, transparent);border:1px solid color-mix(in srgb, var(--claw-accent-a) 35%, var(--cb-border-strong));color:var(--primary-text-color);\">Surprise me</button>\n                  <button class=\"btn primary\" id=\"avatarGenGenerate\" data-testid=\"avatar-generate\" style=\"height:38px;border-radius:14px;padding:0 16px;border:1px solid color-mix(in srgb, var(--claw-accent-a) 55%, transparent);background:linear-gradient(135deg, color-mix(in srgb, var(--claw-accent-a) 85%, #fff 0%), color-mix(in srgb, var(--claw-accent-b) 85%, #fff 0%));color:#061018;font-weight:900;\">Generate</button>\n                </div>\n              </div>\n              <div class=\"muted\" id=\"avatarGenHint\" style=\"margin-top:10px;font-size:12px;color:var(--secondary-text-color);white-space:pre-line\"></div>\n              <div class=\"muted\" id=\"avatarGenStage\" style=\"margin-top:6px;font-size:11px;opacity:.75;color:var(--secondary-text-color)\"></div>\n              <div class=\"muted\" id=\"avatarGenDebug\" style=\"display:none;margin-top:8px;font-size:11px;opacity:.65;color:var(--secondary-text-color)\"></div>\n            </div>\n          </div>
+          <button type=\"button\" id=\"agentAvatarBtn\" class=\"btn\" style=\"width:128px;height:128px;border-radius:28px;display:flex;align-items:center;justify-content:center;overflow:hidden;background:linear-gradient(135deg, rgba(0,245,255,.25), rgba(123,44,255,.25));border:1px solid color-mix(in srgb, var(--primary-color) 45%, var(--divider-color));font-weight:800;letter-spacing:.5px;font-size:28px;cursor:pointer;position:relative;padding:0\">\n            <img id=\"agentAvatarImg\" alt=\"agent avatar\" style=\"display:none;width:100%;height:100%;object-fit:cover\"/>\n            <div id=\"agentAvatarFallback\" style=\"display:flex;align-items:center;justify-content:center;width:100%;height:100%\">A0</div>\n          </button>
           <div style=\"display:flex;flex-direction:column;gap:4px;min-width:260px\">
             <div class=\"agent-title\">Agent 0 <span class=\"agent-mood\" id=\"agentMood\">· mood: calm</span></div>
             <div class=\"agent-desc\" id=\"agentDesc\">Ship ops / energy monitoring assistant</div>
@@ -2561,6 +2648,15 @@ PANEL_HTML = """<!doctype html>
   </div>
   </div>
 
+  <!-- Row skeletons: cloned and filled via textContent by the panel script. -->
+  <template id=\"tplEntityRow\"><div class=\"ent\"><div style=\"min-width:280px\"><div class=\"ent-id\"></div><div class=\"ent-state\"></div></div><div class=\"row\"></div></div></template>
+  <template id=\"tplEntityToggles\"><button class=\"btn\" data-action=\"on\">On</button><button class=\"btn\" data-action=\"off\">Off</button></template>
+  <template id=\"tplEntityNoControls\"><span class=\"muted\">no controls</span></template>
+  <template id=\"tplPickerRow\"><div class=\"pick-item\"><div class=\"pick-main\"><div class=\"pick-name\"></div><div class=\"pick-meta\"></div></div><button class=\"btn primary\">Use</button></div></template>
+  <template id=\"tplAutoEvent\"><div class=\"ent\"><div class=\"ent-id\" style=\"font-size:13px;min-width:0;overflow:hidden;text-overflow:ellipsis\"></div><div class=\"ent-state\" style=\"font-size:11px;white-space:nowrap\"></div></div><pre style=\"margin:6px 0 10px 0;white-space:pre-wrap;font-size:11px;color:var(--secondary-text-color)\"></pre></template>
+  <!-- Avatar generation modal: mounted into <body> on the first avatar click. -->
+  <template id=\"tplAvatarGenModal\"><div id=\"avatarGenModal\" class=\"modal hidden\" style=\"position:fixed;inset:0;background:rgba(0,0,0,0.45);display:none;align-items:center;justify-content:center;z-index:10000;\">\n            <div class=\"modal-card\" style=\"max-width:720px;width:min(720px,92vw);max-height:min(78vh,720px);overflow:auto;color:var(--primary-text-color);border-radius:20px;padding:22px;border:1px solid color-mix(in srgb, var(--claw-accent-a) 45%, transparent);box-shadow:0 26px 80px rgba(0,0,0,0.55);background:linear-gradient(135deg, color-mix(in srgb, var(--cb-card-bg) 92%, var(--claw-accent-a) 10%), color-mix(in srgb, var(--cb-card-bg) 92%, var(--claw-accent-b) 10%));\">\n              <div style=\"display:flex;justify-content:space-between;align-items:center;gap:12px\">\n                <div style=\"font-weight:950;letter-spacing:-0.02em;font-size:18px\">Describe your agent</div>\n                <button class=\"btn\" id=\"avatarGenClose\" title=\"Close\" style=\"width:38px;height:38px;border-radius:12px;padding:0;display:flex;align-items:center;justify-content:center;background:rgba(255,255,255,0.06);border:1px solid rgba(255,255,255,0.10);\">✕</button>\n              </div>\n              <div class=\"muted\" style=\"margin-top:8px;line-height:1.35;color:var(--secondary-text-color)\">Describe what your agent looks like. Or hit <b>Surprise me</b> to auto-draft a backstory + appearance.</div>\n              <textarea id=\"avatarGenText\" style=\"margin-top:12px;width:100%;min-height:120px;resize:vertical;border-radius:16px;border:1px solid color-mix(in srgb, var(--claw-accent-a) 25%, var(--cb-border-strong));padding:12px 24px 12px 18px;background:color-mix(in srgb, var(--cb-card-bg) 86%, #000);color:var(--primary-text-color);font-family:inherit;outline:none;box-sizing:border-box\" placeholder=\"e.g., Warm smile, short black hair, futuristic pilot jacket...\"></textarea>\n              <div id=\"avatarGenPreviewWrap\" style=\"margin-top:12px;display:flex;gap:12px;align-items:center;justify-content:space-between\">\n                <div style=\"display:flex;gap:12px;align-items:center\">\n                  <div style=\"position:relative;width:96px;height:96px\">\n                    <img id=\"avatarGenPreviewImg\" alt=\"avatar preview\" style=\"width:96px;height:96px;border-radius:18px;object-fit:cover;border:1px solid color-mix(in srgb, var(--claw-accent-a) 30%, var(--cb-border-strong));background:color-mix(in srgb, var(--cb-card-bg) 86%, #000);display:none\"/>\n                    <div id=\"avatarGenPreviewStatus\" class=\"muted\" style=\"position:absolute;inset:0;display:flex;align-items:center;justify-content:center;text-align:center;padding:10px;border-radius:18px;border:1px dashed color-mix(in srgb, var(--claw-accent-a) 28%, var(--cb-border-strong));background:color-mix(in srgb, var(--cb-card-bg) 75%, transparent);font-size:12px;color:var(--secondary-text-color)\">No preview yet</div>\n                  </div>\n                  <div class=\"muted\" style=\"font-size:12px;color:var(--secondary-text-color)\">Preview for this run. Click <b>Use this</b> to apply as your profile avatar.</div>\n                </div>\n                <button class=\"btn\" id=\"avatarGenUse\" data-testid=\"avatar-use\" style=\"height:34px;border-radius:12px;padding:0 12px;background:color-mix(in srgb, var(--claw-accent-a) 18%, var(--cb-card-bg));border:1px solid color-mix(in srgb, var(--claw-accent-a) 40%, var(--cb-border-strong));color:var(--primary-text-color);font-weight:800\">Use this</button>\n              </div>\n              <div id=\"avatarGenBtnRowWrap\" style=\"position:relative\">\n                <div id=\"avatarGenBtnRowBlocker\" style=\"display:none;position:absolute;inset:-6px -6px -6px -6px;z-index:5;background:transparent\"></div>\n                <div class=\"row\" style=\"justify-content:flex-end;gap:10px;margin-top:12px;flex-wrap:wrap;position:relative;z-index:1\">\n                  <button class=\"btn\" id=\"avatarGenCancel\" data-testid=\"avatar-cancel\" style=\"display:none;height:38px;border-radius:14px;padding:0 14px;background:color-mix(in srgb, var(--cb-card-bg) 80%, transparent);border:1px solid color-mix(in srgb, var(--cb-border-strong) 80%, transparent);color:var(--primary-text-color);\">Cancel</button>\n                  <button class=\"btn\" id=\"avatarGenSurprise\" data-testid=\"avatar-surprise\" style=\"height:38px;border-radius:14px;padding:0 14px;background:color-mix(in srgb, var(--cb-card-bg) 80%, transparent);border:1px solid color-mix(in srgb, var(--claw-accent-a) 35%, var(--cb-border-strong));color:var(--primary-text-color);\">Surprise me</button>\n                  <button class=\"btn primary\" id=\"avatarGenGenerate\" data-testid=\"avatar-generate\" style=\"height:38px;border-radius:14px;padding:0 16px;border:1px solid color-mix(in srgb, var(--claw-accent-a) 55%, transparent);background:linear-gradient(135deg, color-mix(in srgb, var(--claw-accent-a) 85%, #fff 0%), color-mix(in srgb, var(--claw-accent-b) 85%, #fff 0%));color:#061018;font-weight:900;\">Generate</button>\n                </div>\n              </div>\n              <div class=\"muted\" id=\"avatarGenHint\" style=\"margin-top:10px;font-size:12px;color:var(--secondary-text-color);white-space:pre-line\"></div>\n              <div class=\"muted\" id=\"avatarGenStage\" style=\"margin-top:6px;font-size:11px;opacity:.75;color:var(--secondary-text-color)\"></div>\n              <div class=\"muted\" id=\"avatarGenDebug\" style=\"display:none;margin-top:8px;font-size:11px;opacity:.65;color:var(--secondary-text-color)\"></div>\n            </div>\n          </div></template>
+  <template id=\"tplCreatedEntityRow\"><div class=\"ent\"><div style=\"min-width:0\"><div class=\"ent-id\"></div><div class=\"ent-state\" style=\"font-size:11px;white-space:nowrap;overflow:hidden;text-overflow:ellipsis\"></div></div><div style=\"display:flex;align-items:center;gap:8px\"><div class=\"ent-state\"></div><button class=\"btn\">Remove</button></div></div></template>
 
 </script>
 </body>
@@ -2568,6 +2664,66 @@ PANEL_HTML = """<!doctype html>
 """
 
 
+def _read_panel_script(filename: str, fallback: str = "") -> bytes:
+    """Read a bundled panel script at import (module import runs off the event loop)."""
+    try:
+        return Path(__file__).with_name(filename).read_bytes()
+    except OSError:
+        _LOGGER.warning("Panel script %s missing; serving fallback", filename)
+        return fallback.encode("utf-8")
+
+
+# Panel assets are constant per process: read, encode and fingerprint them once. One
+# content hash versions every asset URL (?v=) and is the shared ETag, so a changed file
+# gets a new URL and an unchanged one revalidates with a bodyless 304 on any endpoint.
+_PANEL_SCRIPTS = {
+    "panel.js": _read_panel_script("panel.js", PANEL_JS),
+    "panel_viz.js": _read_panel_script("panel_viz.js"),
+    "panel_picker.js": _read_panel_script("panel_picker.js"),
+}
+_PANEL_CSS_BYTES = PANEL_CSS.encode("utf-8")
+PANEL_ASSET_VERSION = hashlib.blake2b(
+    b"\0".join((PANEL_HTML.encode("utf-8"), _PANEL_CSS_BYTES, *_PANEL_SCRIPTS.values())),
+    digest_size=8,
+).hexdigest()
+_PANEL_ETAG = f'W/"{PANEL_ASSET_VERSION}"'
+# The panel script loads as a module (deferred, fetched early via modulepreload) pinned
+# to these exact bytes by subresource integrity.
+_PANEL_JS_SRI = "sha384-" + base64.b64encode(hashlib.sha384(_PANEL_SCRIPTS["panel.js"]).digest()).decode("ascii")
+_PANEL_IMMUTABLE = "public, max-age=31536000, immutable"
+
+# The panel document carries no per-request data (config is fetched from
+# /clawdbot-config.json), so it is gzipped once as well.
+_PANEL_HTML_BYTES = (
+    PANEL_HTML.replace("__PANEL_ASSET_VERSION__", PANEL_ASSET_VERSION)
+    .replace("__PANEL_JS_SRI__", _PANEL_JS_SRI)
+    .encode("utf-8")
+)
+_PANEL_HTML_GZIP = gzip.compress(_PANEL_HTML_BYTES, compresslevel=9, mtime=0)
+_PANEL_CSS_URL = f"/clawdbot-panel.css?v={PANEL_ASSET_VERSION}"
+# Scripts and CSS are gzipped once here too instead of per response.
+_PANEL_CSS_GZIP = gzip.compress(_PANEL_CSS_BYTES, compresslevel=9, mtime=0)
+_PANEL_SCRIPTS_GZIP = {name: gzip.compress(data, compresslevel=9, mtime=0) for name, data in _PANEL_SCRIPTS.items()}
+
+
+def _panel_asset_headers(request, versioned: bool) -> dict[str, str]:
+    """Caching headers for a panel asset; ?v= matching the content hash is immutable."""
+    cache = _PANEL_IMMUTABLE if versioned and request.query.get("v") == PANEL_ASSET_VERSION else "no-cache"
+    return {"Cache-Control": cache, "ETag": _PANEL_ETAG, "Vary": "Accept-Encoding"}
+
+
+def _panel_not_modified(request) -> bool:
+    return _PANEL_ETAG in request.headers.get("If-None-Match", "")
+
+
+def _panel_body_response(request, body: bytes, body_gzip: bytes, content_type: str, headers: dict[str, str]):
+    """Send a pre-encoded panel asset, using its pre-gzipped variant when accepted."""
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        body = body_gzip
+        headers["Content-Encoding"] = "gzip"
+    return web.Response(body=body, content_type=content_type, charset="utf-8", headers=headers)
+
+
 class ClawdbotPanelView(HomeAssistantView):
     url = PANEL_PATH
     name = "api:clawdbot:panel"
@@ -2576,54 +2732,169 @@ class ClawdbotPanelView(HomeAssistantView):
     requires_auth = False
 
     async def get(self, request):
-        from aiohttp import web
-        from json import dumps
+        # Same URL across upgrades, so revalidate by ETag instead of caching forever.
+        headers = _panel_asset_headers(request, versioned=False)
+        # Let the browser fetch the stylesheet in parallel with parsing the document.
+        headers["Link"] = f"<{_PANEL_CSS_URL}>; rel=preload; as=style"
+        if _panel_not_modified(request):
+            return web.Response(status=304, headers=headers)
+        return _panel_body_response(request, _PANEL_HTML_BYTES, _PANEL_HTML_GZIP, "text/html", headers)
 
-        hass = request.app["hass"]
-        cfg = hass.data.get(DOMAIN, {})
-        rt = _runtime(hass)
-        chat_history = cfg.get("chat_history", []) or []
-        if not isinstance(chat_history, list):
-            chat_history = []
-        session_key = rt.get("session_key") or DEFAULT_SESSION_KEY
-        session_items = [it for it in chat_history if isinstance(it, dict) and it.get("session_key") == session_key]
-        if not session_items:
-            session_items = [it for it in chat_history if isinstance(it, dict)]
-        chat_history = session_items[-50:]
-        chat_has_older = len(session_items) > len(chat_history)
-        mapping = cfg.get("mapping", {})
-        if not isinstance(mapping, dict):
-            mapping = {}
 
-        # First-run gating flags (panel uses these to decide whether to show wizard)
-        essentials_missing = not bool(rt.get("gateway_url") or rt.get("gateway_origin")) or not bool(rt.get("token"))
-        mapping_missing = any(not mapping.get(k) for k in ("soc", "voltage", "solar", "load"))
+# Chat items embedded in the panel boot config (older ones are paged in by the panel).
+PANEL_CHAT_TAIL = 50
+
+
+def _chat_ts(it: dict[str, Any]) -> str:
+    return str(it.get("ts") or "")
+
+
+class _ChatView(NamedTuple):
+    items: list[dict[str, Any]]  # ts ascending (oldest -> newest)
+    ts: list[str]  # _chat_ts of each item, for bisect paging
+    pos: dict[str, int]  # item id -> index in items (first occurrence)
+    tail: list[dict[str, Any]]  # last PANEL_CHAT_TAIL items
+    has_older: bool  # items exist before tail
+
+
+class _ChatIndex(NamedTuple):
+    source: list[Any]  # the cfg["chat_history"] list this was built from
+    size: int
+    rev: int
+    all: _ChatView
+    sessions: dict[str, _ChatView]
+
+
+def _chat_view_extend(view: _ChatView, new: list[dict[str, Any]]) -> _ChatView:
+    """Append ts-ordered items to a view in place; returns it with tail/has_older refreshed."""
+    items, ts, pos = view.items, view.ts, view.pos
+    for it in new:
+        item_id = it.get("id")
+        if item_id and item_id not in pos:
+            pos[item_id] = len(items)
+        items.append(it)
+        ts.append(_chat_ts(it))
+    return view._replace(tail=items[-PANEL_CHAT_TAIL:], has_older=len(items) > PANEL_CHAT_TAIL)
+
+
+def _chat_view(items: list[dict[str, Any]]) -> _ChatView:
+    return _chat_view_extend(_ChatView([], [], {}, [], False), items)
+
+
+def _chat_index(cfg: dict[str, Any]) -> _ChatIndex:
+    """Per-session, ts-sorted views of cfg["chat_history"], rebuilt only when it changes.
+
+    Writers replace the list (or append in place) and call _panel_config_touch, so the
+    list identity, its length and panel_rev together detect any change. An in-place
+    append that keeps ts order (the panel send path) extends the views instead.
+    """
+    source = cfg.get("chat_history")
+    if not isinstance(source, list):
+        source = []
+    rev = cfg.get("panel_rev", 0)
+    idx = cfg.get("chat_index")
+    if idx is not None and idx.source is source:
+        if idx.size == len(source) and idx.rev == rev:
+            return idx
+        new = [it for it in source[idx.size:] if isinstance(it, dict)]
+        new_ts = [_chat_ts(it) for it in new]
+        last_ts = idx.all.ts[-1] if idx.all.ts else ""
+        if idx.size < len(source) and new_ts == sorted(new_ts) and (not new_ts or last_ts <= new_ts[0]):
+            sessions = dict(idx.sessions)
+            for key in {it.get("session_key") for it in new}:
+                group = [it for it in new if it.get("session_key") == key]
+                view = sessions.get(key)
+                sessions[key] = _chat_view_extend(view, group) if view is not None else _chat_view(group)
+            idx = _ChatIndex(source, len(source), rev, _chat_view_extend(idx.all, new), sessions)
+            cfg["chat_index"] = idx
+            return idx
+    # History is appended in ts order, so this sort is a linear run check in practice.
+    items = sorted((it for it in source if isinstance(it, dict)), key=_chat_ts)
+    grouped: dict[str, list[dict[str, Any]]] = {}
+    for it in items:
+        grouped.setdefault(it.get("session_key"), []).append(it)
+    idx = _ChatIndex(
+        source,
+        len(source),
+        rev,
+        _chat_view(items),
+        {key: _chat_view(group) for key, group in grouped.items()},
+    )
+    cfg["chat_index"] = idx
+    return idx
+
+
+def _panel_config_touch(cfg: dict[str, Any]) -> None:
+    """Mark the cached panel config stale; call after replacing a key it embeds."""
+    cfg["panel_rev"] = cfg.get("panel_rev", 0) + 1
+
+
+def _panel_config(hass) -> dict[str, Any]:
+    """Build the config the panel boots from (no secrets: token presence only)."""
+    cfg = hass.data.get(DOMAIN, {})
+    v = _runtime_view(hass)
+    chat = _chat_index(cfg)
+    session_key = v.session_key or DEFAULT_SESSION_KEY
+    # Tail and has_older are maintained by the chat index as history changes.
+    view = chat.sessions.get(session_key) or chat.all
+    mapping = cfg.get("mapping", {})
+    if not isinstance(mapping, dict):
+        mapping = {}
+
+    # First-run gating flags (panel uses these to decide whether to show wizard)
+    essentials_missing = not (v.gateway_url or v.gateway_origin) or not v.has_token
+    mapping_missing = any(not mapping.get(k) for k in ("soc", "voltage", "solar", "load"))
+
+    return {
+        "build_id": PANEL_BUILD_ID,
+        "asset_version": PANEL_ASSET_VERSION,
+        "gateway_url": v.gateway_url or v.gateway_origin,
+        "has_token": v.has_token,
+        "session_key": session_key,
+        "mapping": mapping,
+        "essentials_missing": essentials_missing,
+        "mapping_missing": mapping_missing,
+        "house_memory": cfg.get("house_memory", {}),
+        "chat_history": view.tail,
+        "chat_history_has_older": view.has_older,
+        "theme": cfg.get("theme", {}),
+        "journal": (cfg.get("journal", []) or [])[-20:],
+        "agent_profile": cfg.get("agent_profile", {}),
+    }
+
+
+def _panel_config_body(hass) -> tuple[bytes, str]:
+    """Serialized panel config and its ETag, reused until panel_rev or the runtime connection changes."""
+    cfg = hass.data.get(DOMAIN, {})
+    # The runtime view is replaced whenever a connection field changes.
+    key = (cfg.get("panel_rev", 0), _runtime_view(hass))
+    cached = cfg.get("panel_config_cache")
+    if cached is not None and cached[0] == key:
+        return cached[1], cached[2]
+    body = json_bytes(_panel_config(hass))
+    etag = f'W/"{PANEL_ASSET_VERSION}-{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    cfg["panel_config_cache"] = (key, body, etag)
+    return body, etag
+
+
+class ClawdbotPanelConfigView(HomeAssistantView):
+    """Serves the panel boot config (what the document used to embed inline)."""
+
+    url = "/clawdbot-config.json"
+    name = "api:clawdbot:panel_config"
+    # Fetched by the iframe document before it has a hass connection, like the panel itself.
+    requires_auth = False
+
+    async def get(self, request):
+        body, etag = _panel_config_body(request.app["hass"])
+        # Always revalidated: an unchanged config (the usual panel reload) costs a 304.
+        headers = {"Cache-Control": "private, no-cache", "ETag": etag}
+        if etag in request.headers.get("If-None-Match", ""):
+            return web.Response(status=304, headers=headers)
+        resp = web.Response(body=body, content_type="application/json", headers=headers)
+        resp.enable_compression()
+        return resp
 
-        safe_cfg = {
-            "build_id": PANEL_BUILD_ID,
-            "gateway_url": rt.get("gateway_url") or rt.get("gateway_origin"),
-            "has_token": bool(rt.get("token")),
-            "session_key": rt.get("session_key") or DEFAULT_SESSION_KEY,
-            "mapping": mapping,
-            "essentials_missing": essentials_missing,
-            "mapping_missing": mapping_missing,
-            "house_memory": cfg.get("house_memory", {}),
-            "chat_history": chat_history,
-            "chat_history_has_older": chat_has_older,
-            "theme": cfg.get("theme", {}),
-            "journal": (cfg.get("journal", []) or [])[-20:],
-            "agent_profile": cfg.get("agent_profile", {}),
-        }
-        html = PANEL_HTML.replace("__CONFIG_JSON__", dumps(safe_cfg)).replace("__PANEL_BUILD_ID__", PANEL_BUILD_ID)
-        return web.Response(
-            text=html,
-            content_type="text/html",
-            headers={
-                "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
-                "Pragma": "no-cache",
-                "Expires": "0",
-            },
-        )
 
 class ClawdbotPanelJsView(HomeAssistantView):
     """Serves the panel JS as an external script (CSP-safe)."""
@@ -2633,26 +2904,53 @@ class ClawdbotPanelJsView(HomeAssistantView):
     requires_auth = False
 
     async def get(self, request):
-        from aiohttp import web
-        from pathlib import Path
+        return _panel_script_response(request, "panel.js")
 
-        text = PANEL_JS
-        try:
-            panel_path = Path(__file__).with_name("panel.js")
-            if panel_path.exists():
-                text = panel_path.read_text(encoding="utf-8")
-        except Exception:
-            _LOGGER.exception("Failed loading external panel.js; falling back to embedded PANEL_JS")
 
-        return web.Response(
-            text=text,
-            content_type="application/javascript",
-            headers={
-                "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
-                "Pragma": "no-cache",
-                "Expires": "0",
-            },
-        )
+class ClawdbotPanelCssView(HomeAssistantView):
+    """Serves the panel stylesheet (immutable under its content-hash URL)."""
+
+    url = "/clawdbot-panel.css"
+    name = "api:clawdbot:panel_css"
+    requires_auth = False
+
+    async def get(self, request):
+        headers = _panel_asset_headers(request, versioned=True)
+        if _panel_not_modified(request):
+            return web.Response(status=304, headers=headers)
+        return _panel_body_response(request, _PANEL_CSS_BYTES, _PANEL_CSS_GZIP, "text/css", headers)
+
+
+def _panel_script_response(request, filename: str):
+    """Serve a bundled panel script from the bytes read (and hashed) at import."""
+    headers = _panel_asset_headers(request, versioned=True)
+    if _panel_not_modified(request):
+        return web.Response(status=304, headers=headers)
+    return _panel_body_response(
+        request, _PANEL_SCRIPTS[filename], _PANEL_SCRIPTS_GZIP[filename], "application/javascript", headers
+    )
+
+
+class ClawdbotPanelVizWorkerView(HomeAssistantView):
+    """Serves the agent visualizer painter (dedicated worker + main-thread fallback)."""
+
+    url = "/clawdbot-panel-viz.js"
+    name = "api:clawdbot:panel_viz_js"
+    requires_auth = False
+
+    async def get(self, request):
+        return _panel_script_response(request, "panel_viz.js")
+
+
+class ClawdbotPickerWorkerView(HomeAssistantView):
+    """Serves the entity picker search worker (trigram index over entity ids)."""
+
+    url = "/clawdbot-picker-worker.js"
+    name = "api:clawdbot:picker_worker_js"
+    requires_auth = False
+
+    async def get(self, request):
+        return _panel_script_response(request, "panel_picker.js")
 
 
 class _PanelInternalCall:
@@ -2677,11 +2975,9 @@ class ClawdbotPanelServiceApiView(HomeAssistantView):
     requires_auth = True
 
     async def post(self, request):
-        from aiohttp import web
-
         hass = request.app["hass"]
         try:
-            data = await request.json()
+            data = await request.json(loads=json_loads)
         except Exception:
             data = {}
         if not isinstance(data, dict):
@@ -2704,7 +3000,7 @@ class ClawdbotPanelServiceApiView(HomeAssistantView):
         call = _PanelInternalCall(hass, payload)
         try:
             result = await fn(call)
-            return web.json_response({"ok": True, "result": result})
+            return web.json_response({"ok": True, "result": result}, dumps=json_dumps)
         except HomeAssistantError as e:
             return web.json_response({"ok": False, "error": str(e)}, status=400)
         except Exception as e:
@@ -2723,21 +3019,17 @@ class ClawdbotMappingApiView(HomeAssistantView):
     requires_auth = True
 
     async def get(self, request):
-        from aiohttp import web
-
         cfg = request.app["hass"].data.get(DOMAIN, {})
-        return web.json_response({"ok": True, "mapping": cfg.get("mapping", {})})
+        return web.json_response({"ok": True, "mapping": cfg.get("mapping", {})}, dumps=json_dumps)
 
     async def post(self, request):
-        from aiohttp import web
-
         hass = request.app["hass"]
         cfg = hass.data.get(DOMAIN, {})
         store: Store = cfg.get("store")
         if store is None:
             return web.json_response({"ok": False, "error": "store not initialized"}, status=500)
 
-        body = await request.json()
+        body = await request.json(loads=json_loads)
         mapping = body.get("mapping")
         if not isinstance(mapping, dict):
             return web.json_response({"ok": False, "error": "mapping must be an object"}, status=400)
@@ -2756,11 +3048,25 @@ class ClawdbotMappingApiView(HomeAssistantView):
 
         await store.async_save(cleaned)
         cfg["mapping"] = cleaned
+        _panel_config_touch(cfg)
         return web.json_response({"ok": True, "mapping": cleaned})
 
 
 
 
+# Mirror the JS heuristic keyword rules. Each rule also gets one alternation over all of
+# its keywords, run once over every entity haystack at a time.
+_SELF_TEST_RULES = {
+    "soc": {"keywords": ("soc", "state_of_charge", "battery_soc"), "units": frozenset({"%"}), "weak": ("battery",)},
+    "voltage": {"keywords": ("voltage", "battery_voltage", "batt_v"), "units": frozenset({"v"}), "weak": ("battery",)},
+    "solar": {"keywords": ("solar", "pv", "photovoltaic", "panel"), "units": frozenset({"w"}), "weak": ("input", "power")},
+    "load": {"keywords": ("load", "consumption", "house_power", "ac_load", "power"), "units": frozenset({"w"}), "weak": ("total", "sum")},
+}
+_SELF_TEST_RULES_RE = {
+    k: re.compile("|".join(map(re.escape, rule["keywords"] + rule["weak"]))) for k, rule in _SELF_TEST_RULES.items()
+}
+
+
 class ClawdbotPanelSelfTestApiView(HomeAssistantView):
     """Authenticated API that returns computed panel runtime-like diagnostics.
 
@@ -2774,55 +3080,47 @@ class ClawdbotPanelSelfTestApiView(HomeAssistantView):
     requires_auth = True
 
     async def get(self, request):
-        from aiohttp import web
-
         hass = request.app["hass"]
         cfg = hass.data.get(DOMAIN, {})
         mapping = cfg.get("mapping", {}) or {}
 
-        # Build a cheap states dict
-        states = {s.entity_id: s for s in hass.states.async_all()}
-
-        # Mirror the JS heuristic keyword rules
-        rules = {
-            "soc": {"keywords": ["soc", "state_of_charge", "battery_soc"], "units": ["%"], "weak": ["battery"]},
-            "voltage": {"keywords": ["voltage", "battery_voltage", "batt_v"], "units": ["v"], "weak": ["battery"]},
-            "solar": {"keywords": ["solar", "pv", "photovoltaic", "panel"], "units": ["w"], "weak": ["input", "power"]},
-            "load": {"keywords": ["load", "consumption", "house_power", "ac_load", "power"], "units": ["w"], "weak": ["total", "sum"]},
-        }
-
-        def score(ent_id: str, st, rule) -> int:
-            name = ""
-            unit = ""
-            try:
-                name = str(st.attributes.get("friendly_name") or st.attributes.get("device_class") or "")
-                unit = str(st.attributes.get("unit_of_measurement") or "")
-            except Exception:
-                pass
-            hay = (ent_id + " " + name).lower()
-            u = unit.lower()
-            s = 0
-            for kw in rule.get("keywords", []):
-                if kw in hay:
-                    s += 3
-            for kw in rule.get("weak", []):
-                if kw in hay:
-                    s += 1
-            if rule.get("units") and u in rule["units"]:
-                s += 2
-            if ent_id.startswith(("automation.", "update.")):
-                s -= 2
-            return s
-
+        # One pass over states into parallel arrays (haystack, unit, penalty, line offset).
+        hays: list[str] = []
+        units: list[str] = []
+        penalties: list[int] = []
+        starts: list[int] = []
+        offset = 0
+        for st in hass.states.async_all():
+            ent_id = st.entity_id
+            attrs = st.attributes
+            hay = (ent_id + " " + str(attrs.get("friendly_name") or attrs.get("device_class") or "")).lower()
+            hays.append(hay)
+            units.append(str(attrs.get("unit_of_measurement") or "").lower())
+            penalties.append(2 if ent_id.startswith(("automation.", "update.")) else 0)
+            starts.append(offset)
+            offset += len(hay) + 1
+        # Keywords never contain a newline, so one regex scan over the joined haystacks
+        # finds every entity with a keyword hit for a rule.
+        text = "\n".join(hays)
+
+        # Only the number of positive scores matters (top 3 shown), so no ranking is kept.
         suggestion_counts = {}
-        for k, rule in rules.items():
-            scored = []
-            for ent_id, st in states.items():
-                s = score(ent_id, st, rule)
-                if s > 0:
-                    scored.append((s, ent_id))
-            scored.sort(reverse=True)
-            suggestion_counts[k] = len(scored[:3])
+        for k, rule in _SELF_TEST_RULES.items():
+            candidates = {bisect.bisect_right(starts, m.start()) - 1 for m in _SELF_TEST_RULES_RE[k].finditer(text)}
+            candidates.update(i for i, u in enumerate(units) if u in rule["units"])
+            positive = 0
+            for i in candidates:
+                hay = hays[i]
+                s = 2 if units[i] in rule["units"] else 0
+                for kw in rule["keywords"]:
+                    if kw in hay:
+                        s += 3
+                for kw in rule["weak"]:
+                    if kw in hay:
+                        s += 1
+                if s - penalties[i] > 0:
+                    positive += 1
+            suggestion_counts[k] = min(positive, 3)
 
         # Recommendations v0 visible if soc+load mapped and both numeric
         def to_float(val):
@@ -2834,8 +3132,8 @@ class ClawdbotPanelSelfTestApiView(HomeAssistantView):
         rec_visible = False
         rec_reason = ""
         if mapping.get("soc") and mapping.get("load"):
-            soc_st = states.get(mapping.get("soc"))
-            load_st = states.get(mapping.get("load"))
+            soc_st = hass.states.get(mapping.get("soc"))
+            load_st = hass.states.get(mapping.get("load"))
             soc = to_float(soc_st.state) if soc_st else None
             load = to_float(load_st.state) if load_st else None
             if soc is not None and load is not None:
@@ -2857,7 +3155,7 @@ class ClawdbotPanelSelfTestApiView(HomeAssistantView):
                 "recommendations_v0_reason": rec_reason,
             },
         }
-        return web.json_response(out)
+        return web.json_response(out, dumps=json_dumps)
 
 
 
@@ -2874,21 +3172,19 @@ class ClawdbotHealthApiView(HomeAssistantView):
     requires_auth = True
 
     async def get(self, request):
-        from aiohttp import web
-        hass = request.app["hass"]
-        rt = _runtime(hass)
+        v = _runtime_view(request.app["hass"])
         # minimal, token-safe state for UI gating
         errors = []
-        if not rt.get("gateway_origin"):
+        if not v.gateway_origin:
             errors.append("gateway_url_missing")
-        if not rt.get("token"):
+        if not v.has_token:
             errors.append("token_missing")
         return web.json_response({
             "ok": True,
-            "configured": bool(rt.get("gateway_origin") and rt.get("token")),
-            "gateway_origin": rt.get("gateway_origin"),
-            "session_key": rt.get("session_key"),
-            "has_token": bool(rt.get("token")),
+            "configured": bool(v.gateway_origin and v.has_token),
+            "gateway_origin": v.gateway_origin,
+            "session_key": v.session_key,
+            "has_token": v.has_token,
             "errors": errors,
             "panel_build_id": PANEL_BUILD_ID,
             "integration_build_id": INTEGRATION_BUILD_ID,
@@ -2906,20 +3202,19 @@ class ClawdbotPanelStateApiView(HomeAssistantView):
     requires_auth = True
 
     async def get(self, request):
-        from aiohttp import web
         hass = request.app["hass"]
         cfg = hass.data.get(DOMAIN, {})
-        rt = _runtime(hass)
+        v = _runtime_view(hass)
         # Never include token; expose only has_token
         return web.json_response({
             "ok": True,
-            "has_token": bool(rt.get("token")),
-            "gateway_origin": rt.get("gateway_origin"),
-            "session_key": rt.get("session_key"),
+            "has_token": v.has_token,
+            "gateway_origin": v.gateway_origin,
+            "session_key": v.session_key,
             "mapping": cfg.get("mapping", {}) or {},
             "house_memory": cfg.get("house_memory", {}) or {},
             "build": {"panel": PANEL_BUILD_ID, "integration": INTEGRATION_BUILD_ID},
-        })
+        }, dumps=json_dumps)
 
 
 class ClawdbotBuildInfoApiView(HomeAssistantView):
@@ -2930,16 +3225,15 @@ class ClawdbotBuildInfoApiView(HomeAssistantView):
     requires_auth = True
 
     async def get(self, request):
-        from aiohttp import web
         hass = request.app["hass"]
         services = hass.services.async_services().get(DOMAIN, {})
-        rt = _runtime(hass)
+        v = _runtime_view(hass)
         return web.json_response({
             "ok": True,
             "panel_build_id": PANEL_BUILD_ID,
             "integration_build_id": INTEGRATION_BUILD_ID,
-            "gateway_origin": rt.get("gateway_origin"),
-            "session_key": rt.get("session_key"),
+            "gateway_origin": v.gateway_origin,
+            "session_key": v.session_key,
             "services": sorted(list(services.keys())),
         })
 class ClawdbotTtsVibevoiceApiView(HomeAssistantView):
@@ -2950,8 +3244,6 @@ class ClawdbotTtsVibevoiceApiView(HomeAssistantView):
     requires_auth = True
 
     async def get(self, request):
-        from aiohttp import web
-
         hass = request.app["hass"]
         rt = _runtime(hass)
         cache = rt.get("tts_vibevoice_cache")
@@ -2975,25 +3267,10 @@ class ClawdbotSttWhisperApiView(HomeAssistantView):
 
     url = "/api/clawdbot/stt_whisper"
     name = "api:clawdbot:stt_whisper"
+    # HA rejects unauthenticated requests with 401 before post() runs.
     requires_auth = True
 
-    async def _unauthorized(self):
-        from aiohttp import web
-
-        return web.json_response({"ok": False, "error": "unauthorized"}, status=401)
-
     async def post(self, request):
-        from aiohttp import web
-        from aiohttp import FormData
-        import time
-
-        # Auth guard: return JSON on 401 so panel can display a friendly error
-        try:
-            if not getattr(request, "user", None) or not request.user.is_authenticated:
-                return await self._unauthorized()
-        except Exception:
-            return await self._unauthorized()
-
         hass = request.app["hass"]
         cfg = hass.data.get(DOMAIN, {})
 
@@ -3031,21 +3308,22 @@ class ClawdbotSttWhisperApiView(HomeAssistantView):
         ct = request.content_type or "application/octet-stream"
         filename = "audio.webm" if "webm" in ct else "audio.wav"
 
-        form = FormData()
-        form.add_field("file", raw, filename=filename, content_type=ct)
-        form.add_field("model", "whisper-1")
+        # Frame the multipart body directly around the request buffer: BytesPayload over a
+        # memoryview is written as is, where FormData would copy the audio into its own part.
+        form = aiohttp.MultipartWriter("form-data")
+        audio = form.append_payload(BytesPayload(memoryview(raw), content_type=ct))
+        audio.set_content_disposition("form-data", name="file", filename=filename)
+        form.append("whisper-1").set_content_disposition("form-data", name="model")
 
         # Optional language hint
         try:
             q = request.query
             lang = q.get("language") if q else None
             if isinstance(lang, str) and lang.strip():
-                form.add_field("language", lang.strip()[:16])
+                form.append(lang.strip()[:16]).set_content_disposition("form-data", name="language")
         except Exception:
             pass
 
-        from homeassistant.helpers.aiohttp_client import async_get_clientsession
-
         session = async_get_clientsession(hass)
         try:
             resp = await session.post(
@@ -3075,6 +3353,36 @@ class ClawdbotSttWhisperApiView(HomeAssistantView):
         return web.json_response({"ok": True, "text": text.strip()})
 
 
+def _avatar_png_response(request, cfg: dict[str, Any], key: str, png_b64: str):
+    """Serve a stored base64 PNG, decoding it once per stored string.
+
+    Avatar writers always store a new string, so string identity is the change marker;
+    the content-derived ETag lets the browser revalidate with a bodyless 304.
+    """
+    cache = cfg.setdefault("avatar_png_cache", {})
+    hit = cache.get(key)
+    if hit is None or hit[0] is not png_b64:
+        b64 = png_b64
+        if b64.startswith("data:"):
+            try:
+                b64 = b64.split(",", 1)[1]
+            except Exception:
+                raise web.HTTPNotFound()
+        try:
+            raw = base64.b64decode(b64)
+        except Exception:
+            raise web.HTTPNotFound()
+        # Previews are keyed by request_id; keep the cache from growing with them.
+        if len(cache) >= 16:
+            cache.clear()
+        hit = cache[key] = (png_b64, raw, f'"{hashlib.blake2b(raw, digest_size=8).hexdigest()}"')
+
+    headers = {"Cache-Control": "no-cache", "ETag": hit[2]}
+    if hit[2] in request.headers.get("If-None-Match", ""):
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=hit[1], content_type="image/png", headers=headers)
+
+
 class ClawdbotAvatarPngView(HomeAssistantView):
     """Serve the active avatar PNG."""
 
@@ -3083,9 +3391,6 @@ class ClawdbotAvatarPngView(HomeAssistantView):
     requires_auth = False
 
     async def get(self, request):
-        from aiohttp import web
-        import base64
-
         cfg = request.app["hass"].data.get(DOMAIN, {})
         avatar = cfg.get("avatar")
         if not isinstance(avatar, dict):
@@ -3096,27 +3401,7 @@ class ClawdbotAvatarPngView(HomeAssistantView):
         if not isinstance(png_b64, str) or not png_b64:
             raise web.HTTPNotFound()
 
-        b64 = png_b64
-        if b64.startswith("data:"):
-            try:
-                b64 = b64.split(",", 1)[1]
-            except Exception:
-                raise web.HTTPNotFound()
-
-        try:
-            raw = base64.b64decode(b64)
-        except Exception:
-            raise web.HTTPNotFound()
-
-        return web.Response(
-            body=raw,
-            content_type="image/png",
-            headers={
-                "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
-                "Pragma": "no-cache",
-                "Expires": "0",
-            },
-        )
+        return _avatar_png_response(request, cfg, "active", png_b64)
 
 
 class ClawdbotAvatarPreviewPngView(HomeAssistantView):
@@ -3127,9 +3412,6 @@ class ClawdbotAvatarPreviewPngView(HomeAssistantView):
     requires_auth = False
 
     async def get(self, request):
-        from aiohttp import web
-        import base64
-
         hass = request.app["hass"]
         cfg = hass.data.get(DOMAIN, {})
         avatar = cfg.get("avatar")
@@ -3152,27 +3434,7 @@ class ClawdbotAvatarPreviewPngView(HomeAssistantView):
         if not isinstance(png_b64, str) or not png_b64:
             raise web.HTTPNotFound()
 
-        b64 = png_b64
-        if b64.startswith("data:"):
-            try:
-                b64 = b64.split(",", 1)[1]
-            except Exception:
-                raise web.HTTPNotFound()
-
-        try:
-            raw = base64.b64decode(b64)
-        except Exception:
-            raise web.HTTPNotFound()
-
-        return web.Response(
-            body=raw,
-            content_type="image/png",
-            headers={
-                "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
-                "Pragma": "no-cache",
-                "Expires": "0",
-            },
-        )
+        return _avatar_png_response(request, cfg, "preview:" + request_id, png_b64)
 
 
 class ClawdbotHouseMemoryApiView(HomeAssistantView):
@@ -3183,10 +3445,35 @@ class ClawdbotHouseMemoryApiView(HomeAssistantView):
     requires_auth = True
 
     async def get(self, request):
-        from aiohttp import web
-
         cfg = request.app["hass"].data.get(DOMAIN, {})
-        return web.json_response({"ok": True, "house_memory": cfg.get("house_memory", {})})
+        return web.json_response({"ok": True, "house_memory": cfg.get("house_memory", {})}, dumps=json_dumps)
+
+
+# Item lists at least this long are streamed instead of serialized into one buffer.
+JSON_STREAM_MIN_ITEMS = 200
+JSON_STREAM_BATCH = 64
+
+
+async def _json_items_response(request, items: list[Any], **fields: Any):
+    """Respond with {"ok": true, **fields, "items": [...]}, streaming long item lists.
+
+    Long lists go out in batches of JSON_STREAM_BATCH items, so peak memory is one batch
+    rather than the whole body and the client starts parsing before the last item is encoded.
+    """
+    if len(items) < JSON_STREAM_MIN_ITEMS:
+        return web.json_response({"ok": True, **fields, "items": items}, dumps=json_dumps)
+
+    resp = web.StreamResponse(headers={"Content-Type": "application/json; charset=utf-8"})
+    resp.enable_compression()
+    await resp.prepare(request)
+    # The serialized envelope ends with "}"; reopen it to append the items array.
+    await resp.write(json_bytes({"ok": True, **fields})[:-1] + b',"items":[')
+    for start in range(0, len(items), JSON_STREAM_BATCH):
+        chunk = b",".join(json_bytes(it) for it in items[start:start + JSON_STREAM_BATCH])
+        await resp.write(chunk if start == 0 else b"," + chunk)
+    await resp.write(b"]}")
+    await resp.write_eof()
+    return resp
 
 
 class ClawdbotChatHistoryApiView(HomeAssistantView):
@@ -3197,18 +3484,10 @@ class ClawdbotChatHistoryApiView(HomeAssistantView):
     requires_auth = True
 
     async def get(self, request):
-        from aiohttp import web
-
         hass = request.app["hass"]
         cfg = hass.data.get(DOMAIN, {})
-        store: Store = cfg.get("chat_store")
-        if store is not None:
-            items = await store.async_load() or []
-        else:
-            items = cfg.get("chat_history", []) or []
-        if not isinstance(items, list):
-            items = []
-        items = [it for it in items if isinstance(it, dict)]
+        # cfg["chat_history"] mirrors the chat store (every save updates both).
+        chat = _chat_index(cfg)
 
         limit = 50
         try:
@@ -3222,36 +3501,24 @@ class ClawdbotChatHistoryApiView(HomeAssistantView):
 
         session_key = request.query.get("session_key")
         if session_key:
-            filtered = [it for it in items if it.get("session_key") == session_key]
+            view = chat.sessions.get(session_key) or _chat_view([])
         else:
-            filtered = items
+            view = chat.all
+        # Index views are sorted by timestamp ascending (oldest->newest) for deterministic paging.
+        filtered = view.items
         # Optional incremental paging
         after_ts = request.query.get("after_ts") or request.query.get("since_ts")
         before_id = request.query.get("before_id")
 
-        # Always sort by timestamp ascending (oldest->newest) for deterministic paging.
-        def _ts(it: dict) -> str:
-            try:
-                return str(it.get("ts") or "")
-            except Exception:
-                return ""
-
-        filtered.sort(key=_ts)
-
         if after_ts:
-            # Return items strictly newer than after_ts
-            candidates = [it for it in filtered if str(it.get("ts") or "") > str(after_ts)]
-            # Cap to limit (newest-last)
-            page = candidates[:limit]
+            # Return items strictly newer than after_ts, capped to limit (newest-last)
+            start = bisect.bisect_right(view.ts, str(after_ts))
+            page = filtered[start:start + limit]
             has_older = False
-            return web.json_response({"ok": True, "items": page, "has_older": has_older})
+            return await _json_items_response(request, page, has_older=has_older)
 
         if before_id:
-            idx = None
-            for i, it in enumerate(filtered):
-                if it.get("id") == before_id:
-                    idx = i
-                    break
+            idx = view.pos.get(before_id)
             if idx is None:
                 candidates = filtered
             else:
@@ -3271,7 +3538,136 @@ class ClawdbotChatHistoryApiView(HomeAssistantView):
         else:
             has_older = len(filtered) > len(page)
 
-        return web.json_response({"ok": True, "items": page, "has_older": has_older})
+        return await _json_items_response(request, page, has_older=has_older)
+
+
+CHAT_STREAM_POLL_S = 5.0
+CHAT_STREAM_POLL_FAST_S = 2.0
+CHAT_STREAM_BOOST_S = 30.0
+CHAT_STREAM_HEARTBEAT_S = 15.0
+
+
+def _chat_stream_state(hass, session_key: str) -> dict[str, Any] | None:
+    streams = _runtime(hass).get("chat_streams")
+    return streams.get(session_key) if isinstance(streams, dict) else None
+
+
+def _chat_stream_kick(hass, session_key: str | None) -> None:
+    """Wake the stream poller for a session (e.g. right after a user send) and boost it."""
+    st = _chat_stream_state(hass, session_key or DEFAULT_SESSION_KEY)
+    if not st:
+        return
+    st["boost_until"] = time.monotonic() + CHAT_STREAM_BOOST_S
+    st["wake"].set()
+
+
+async def _chat_stream_poller(hass, session_key: str) -> None:
+    """Single gateway poller per session; fans history deltas out to every SSE client."""
+    rt = _runtime(hass)
+    st = rt["chat_streams"][session_key]
+    try:
+        while st["queues"]:
+            handlers = rt.get("panel_service_handlers") or {}
+            tick = handlers.get("chat_tick")
+            items: list[dict[str, Any]] = []
+            if callable(tick):
+                try:
+                    res = await tick(
+                        _PanelInternalCall(
+                            hass,
+                            {"session_key": session_key, "after_ts": st.get("after_ts"), "include_usage": False},
+                        )
+                    )
+                    delta = (res or {}).get("history_delta") or {}
+                    items = delta.get("items") or []
+                except Exception:
+                    _LOGGER.debug("chat_stream: tick failed (session=%s)", session_key, exc_info=True)
+            if items:
+                st["after_ts"] = str(items[-1].get("ts") or "") or st.get("after_ts")
+                st["boost_until"] = time.monotonic() + CHAT_STREAM_BOOST_S
+                for q in list(st["queues"]):
+                    try:
+                        q.put_nowait({"items": items})
+                    except asyncio.QueueFull:
+                        pass
+
+            delay = CHAT_STREAM_POLL_FAST_S if time.monotonic() < st.get("boost_until", 0) else CHAT_STREAM_POLL_S
+            st["wake"].clear()
+            try:
+                await asyncio.wait_for(st["wake"].wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        if rt.get("chat_streams", {}).get(session_key) is st:
+            rt["chat_streams"].pop(session_key, None)
+
+
+class ClawdbotChatStreamApiView(HomeAssistantView):
+    """Server-sent events stream of chat history deltas for the panel.
+
+    The gateway has no push channel, so HA keeps one poller per session_key and
+    fans new items out to all connected panels; idle browsers send no requests.
+    EventSource cannot set headers, so the panel opens a signed path (authSig).
+    """
+
+    url = "/api/clawdbot/chat_stream"
+    name = "api:clawdbot:chat_stream"
+    requires_auth = True
+
+    async def get(self, request):
+        hass = request.app["hass"]
+        rt = _runtime(hass)
+        if not rt:
+            return web.json_response({"ok": False, "error": "runtime not initialized"}, status=503)
+        session_key = request.query.get("session_key") or rt.get("session_key") or DEFAULT_SESSION_KEY
+        after_ts = request.query.get("after_ts") or None
+
+        streams = rt.setdefault("chat_streams", {})
+        st = streams.get(session_key)
+        if st is None:
+            if not after_ts:
+                # Client has no items yet: start from the newest stored one so the first
+                # tick pushes only what arrives after the stream opened.
+                view = _chat_index(hass.data.get(DOMAIN, {})).sessions.get(session_key)
+                after_ts = view.ts[-1] if view and view.ts else None
+            st = {"queues": set(), "after_ts": after_ts, "boost_until": 0.0, "wake": asyncio.Event()}
+            streams[session_key] = st
+        elif after_ts and (not st.get("after_ts") or str(after_ts) < str(st.get("after_ts"))):
+            # Late joiner is behind: rewind (other clients dedupe by key).
+            st["after_ts"] = after_ts
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        st["queues"].add(queue)
+        if st.get("task") is None or st["task"].done():
+            st["task"] = hass.async_create_background_task(
+                _chat_stream_poller(hass, session_key), f"{DOMAIN}_chat_stream_{session_key}"
+            )
+
+        resp = web.StreamResponse(
+            headers={
+                "Content-Type": "text/event-stream",
+                "Cache-Control": "no-store",
+                "X-Accel-Buffering": "no",
+            }
+        )
+        try:
+            await resp.prepare(request)
+            await resp.write(b"retry: 5000\n\n")
+            while True:
+                try:
+                    evt = await asyncio.wait_for(queue.get(), timeout=CHAT_STREAM_HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    await resp.write(b": ping\n\n")
+                    continue
+                await resp.write(b"data: " + json_bytes(evt) + b"\n\n")
+        except (ConnectionResetError, RuntimeError):
+            # Client went away.
+            pass
+        finally:
+            st["queues"].discard(queue)
+            if not st["queues"]:
+                st["wake"].set()
+        return resp
 
 
 class ClawdbotSessionsApiView(HomeAssistantView):
@@ -3282,10 +3678,8 @@ class ClawdbotSessionsApiView(HomeAssistantView):
     requires_auth = True
 
     async def get(self, request):
-        from aiohttp import web
-
         hass = request.app["hass"]
-        session, gateway_origin, token, session_key, err = _runtime_gateway_parts_http(hass)
+        session, gateway_origin, headers, session_key, err = _runtime_gateway_parts_http(hass)
         if err:
             return web.json_response({"ok": False, "error": err}, status=400)
 
@@ -3300,8 +3694,8 @@ class ClawdbotSessionsApiView(HomeAssistantView):
             limit = 200
 
         payload = {"tool": "sessions_list", "args": {"limit": limit, "messageLimit": 1}}
-        res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
-        return web.json_response({"ok": True, "result": res})
+        res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
+        return web.json_response({"ok": True, "result": res}, dumps=json_dumps)
 
 
 class ClawdbotSessionsHistoryApiView(HomeAssistantView):
@@ -3312,10 +3706,8 @@ class ClawdbotSessionsHistoryApiView(HomeAssistantView):
     requires_auth = True
 
     async def get(self, request):
-        from aiohttp import web
-
         hass = request.app["hass"]
-        session, gateway_origin, token, session_key, err = _runtime_gateway_parts_http(hass)
+        session, gateway_origin, headers, session_key, err = _runtime_gateway_parts_http(hass)
         if err:
             return web.json_response({"ok": False, "error": err}, status=400)
 
@@ -3334,7 +3726,7 @@ class ClawdbotSessionsHistoryApiView(HomeAssistantView):
             limit = 100
 
         payload = {"tool": "sessions_history", "args": {"sessionKey": session_key, "limit": limit}}
-        res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
+        res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
 
         raw = res
         # Some gateway responses double-wrap result/result.
@@ -3458,7 +3850,7 @@ class ClawdbotSessionsHistoryApiView(HomeAssistantView):
                 }
             )
 
-        return web.json_response({"ok": True, "items": items})
+        return await _json_items_response(request, items)
 
 
 class ClawdbotSessionStatusApiView(HomeAssistantView):
@@ -3469,10 +3861,8 @@ class ClawdbotSessionStatusApiView(HomeAssistantView):
     requires_auth = True
 
     async def get(self, request):
-        from aiohttp import web
-
         hass = request.app["hass"]
-        session, gateway_origin, token, session_key, err = _runtime_gateway_parts_http(hass)
+        session, gateway_origin, headers, session_key, err = _runtime_gateway_parts_http(hass)
         if err:
             return web.json_response({"ok": False, "error": err}, status=400)
 
@@ -3481,7 +3871,7 @@ class ClawdbotSessionStatusApiView(HomeAssistantView):
             return web.json_response({"ok": False, "error": "session_key required"}, status=400)
 
         payload = {"tool": "session_status", "args": {"sessionKey": session_key}}
-        res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
+        res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
 
         # Sanitize heavily: never return raw status cards (may include auth snippets).
         raw = res
@@ -3521,7 +3911,7 @@ class ClawdbotSessionStatusApiView(HomeAssistantView):
                 return "[REDACTED]"
             return obj
 
-        return web.json_response(_scrub(out))
+        return web.json_response(_scrub(out), dumps=json_dumps)
 
 
 class ClawdbotSessionsSendApiView(HomeAssistantView):
@@ -3532,15 +3922,13 @@ class ClawdbotSessionsSendApiView(HomeAssistantView):
     requires_auth = True
 
     async def post(self, request):
-        from aiohttp import web
-
         hass = request.app["hass"]
-        session, gateway_origin, token, session_key, err = _runtime_gateway_parts_http(hass)
+        session, gateway_origin, headers, session_key, err = _runtime_gateway_parts_http(hass)
         if err:
             return web.json_response({"ok": False, "error": err}, status=400)
 
         try:
-            data = await request.json()
+            data = await request.json(loads=json_loads)
         except Exception:
             data = {}
         if not isinstance(data, dict):
@@ -3553,8 +3941,8 @@ class ClawdbotSessionsSendApiView(HomeAssistantView):
             return web.json_response({"ok": False, "error": "message is required"}, status=400)
 
         payload = {"tool": "sessions_send", "args": {"sessionKey": str(session_key), "message": message}}
-        res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
-        return web.json_response({"ok": True, "result": res})
+        res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
+        return web.json_response({"ok": True, "result": res}, dumps=json_dumps)
 
 
 class ClawdbotSessionsSpawnApiView(HomeAssistantView):
@@ -3565,15 +3953,13 @@ class ClawdbotSessionsSpawnApiView(HomeAssistantView):
     requires_auth = True
 
     async def post(self, request):
-        from aiohttp import web
-
         hass = request.app["hass"]
-        session, gateway_origin, token, session_key, err = _runtime_gateway_parts_http(hass)
+        session, gateway_origin, headers, session_key, err = _runtime_gateway_parts_http(hass)
         if err:
             return web.json_response({"ok": False, "error": err}, status=400)
 
         try:
-            data = await request.json()
+            data = await request.json(loads=json_loads)
         except Exception:
             data = {}
         if not isinstance(data, dict):
@@ -3581,8 +3967,8 @@ class ClawdbotSessionsSpawnApiView(HomeAssistantView):
         label = data.get("label")
 
         payload = {"tool": "sessions_spawn", "args": {"task": "(new chat session)", "label": label or None, "cleanup": "keep"}}
-        res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
-        return web.json_response({"ok": True, "result": res})
+        res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
+        return web.json_response({"ok": True, "result": res}, dumps=json_dumps)
 
 
 def _compute_house_memory_from_states(states: dict, mapping: dict | None = None) -> dict:
@@ -3703,10 +4089,8 @@ async def async_setup(hass, config):
     if isinstance(gateway_url, str) and gateway_url.strip():
         gateway_origin = _derive_gateway_origin(gateway_url).rstrip("/")
 
-    # Use Home Assistant's configured aiohttp session factory.
-    from homeassistant.helpers.aiohttp_client import async_create_clientsession
-
-    session = async_create_clientsession(hass)
+    # Dedicated keep-alive session for gateway traffic (see _gw_create_session).
+    session = _gw_create_session()
 
     runtime = {
         "gateway_url": gateway_url,
@@ -3721,7 +4105,24 @@ async def async_setup(hass, config):
         "chat_dedupe": {},  # {fingerprint: ts_epoch}
         "chat_last_agent_text": {},  # {session_key: {"text": str, "ts": epoch}}
     }
+    _bind_gateway_parts(runtime)
     hass.data[DOMAIN]["runtime"] = runtime
+
+    async def _close_gw_session(_event=None) -> None:
+        sess = runtime.get("session")
+        if sess is not None:
+            try:
+                await sess.close()
+            except Exception:
+                _LOGGER.debug("Failed to close gateway session", exc_info=True)
+
+    try:
+        from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _close_gw_session)
+    except Exception:
+        _LOGGER.debug("Failed to register gateway session close hook", exc_info=True)
+
     # VibeVoice TTS cache (in-memory)
     runtime["tts_vibevoice_cache"] = {}  # request_id -> {ts, format, bytes}
     runtime["tts_vibevoice_health_cache"] = {"ts": 0, "result": None}
@@ -4024,6 +4425,10 @@ async def async_setup(hass, config):
     try:
         hass.http.register_view(ClawdbotPanelView)
         hass.http.register_view(ClawdbotPanelJsView)
+        hass.http.register_view(ClawdbotPanelCssView)
+        hass.http.register_view(ClawdbotPanelConfigView)
+        hass.http.register_view(ClawdbotPanelVizWorkerView)
+        hass.http.register_view(ClawdbotPickerWorkerView)
         hass.http.register_view(ClawdbotPanelServiceApiView)
         hass.http.register_view(ClawdbotMappingApiView)
         hass.http.register_view(ClawdbotPanelSelfTestApiView)
@@ -4036,6 +4441,7 @@ async def async_setup(hass, config):
         hass.http.register_view(ClawdbotAvatarPreviewPngView)
         hass.http.register_view(ClawdbotHouseMemoryApiView)
         hass.http.register_view(ClawdbotChatHistoryApiView)
+        hass.http.register_view(ClawdbotChatStreamApiView)
         hass.http.register_view(ClawdbotSessionsApiView)
         hass.http.register_view(ClawdbotSessionsHistoryApiView)
         hass.http.register_view(ClawdbotSessionStatusApiView)
@@ -4094,7 +4500,7 @@ async def async_setup(hass, config):
                     raw_body = ""
 
                 try:
-                    payload = json.loads(raw_body or "{}")
+                    payload = json_loads(raw_body or "{}")
                 except Exception as e:
                     marker = _extract_marker(None, raw_body)
                     _LOGGER.warning(
@@ -4205,10 +4611,8 @@ async def async_setup(hass, config):
 
                 Always returns 200 so callers don't retry indefinitely, but includes JSON ok/error for debugging.
                 """
-                from aiohttp import web
-
                 try:
-                    payload = await request.json()
+                    payload = await request.json(loads=json_loads)
                 except Exception:
                     return web.json_response({"ok": False, "error": "invalid_json"}, status=200)
                 if not isinstance(payload, dict):
@@ -4350,8 +4754,7 @@ async def async_setup(hass, config):
             except Exception:
                 _LOGGER.warning("Failed to close old aiohttp session", exc_info=True)
 
-        from homeassistant.helpers.aiohttp_client import async_create_clientsession
-        rt["session"] = async_create_clientsession(hass)
+        rt["session"] = _gw_create_session()
 
         rt.update(
             {
@@ -4363,6 +4766,7 @@ async def async_setup(hass, config):
                 "overrides": overrides,
             }
         )
+        _bind_gateway_parts(rt)
         return {
             "ok": True,
             "gateway_url": gateway_url,
@@ -4428,7 +4832,7 @@ async def async_setup(hass, config):
 
     async def handle_send_chat(call):
         hass = call.hass
-        session, gateway_origin, token, session_key = _runtime_gateway_parts(hass)
+        session, gateway_origin, headers, session_key = _runtime_gateway_parts(hass)
 
         message = call.data.get("message")
         if not message:
@@ -4448,7 +4852,7 @@ async def async_setup(hass, config):
                 "message": f"[Home Assistant] {message}",
             },
         }
-        res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
+        res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
         await _notify("Clawdbot: send_chat", str(res))
 
     async def handle_set_mapping(call):
@@ -4475,6 +4879,7 @@ async def async_setup(hass, config):
 
         await store.async_save(cleaned)
         cfg["mapping"] = cleaned
+        _panel_config_touch(cfg)
         await _notify("Clawdbot: set_mapping", __import__("json").dumps(cleaned, indent=2)[:4000])
 
     async def handle_refresh_house_memory(call):
@@ -4486,6 +4891,7 @@ async def async_setup(hass, config):
         states = {s.entity_id: s for s in hass.states.async_all()}
         computed = _compute_house_memory_from_states(states, mapping=cfg.get('mapping') or {})
         cfg['house_memory'] = computed
+        _panel_config_touch(cfg)
         await house_store.async_save(computed)
         await _notify('Clawdbot: house_memory', __import__('json').dumps(computed, indent=2)[:4000])
     async def handle_notify_event(call):
@@ -4499,7 +4905,7 @@ async def async_setup(hass, config):
           attributes: optional dict
         """
         hass = call.hass
-        session, gateway_origin, token, _default_session_key = _runtime_gateway_parts(hass)
+        session, gateway_origin, headers, _default_session_key = _runtime_gateway_parts(hass)
 
         event_type = call.data.get("event_type")
         severity = (call.data.get("severity") or "info").lower()
@@ -4554,7 +4960,7 @@ async def async_setup(hass, config):
                 "message": "[Home Assistant event] " + __import__("json").dumps(payload_obj, sort_keys=True),
             },
         }
-        res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
+        res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
         await _notify("Clawdbot: notify_event", str(res))
 
     async def handle_chat_append(call):
@@ -4588,15 +4994,14 @@ async def async_setup(hass, config):
             "Agent-to-agent announce step.",
             "agent-to-agent announce step.",
         )
-        import re as _re
         # Drop internal plumbing/control lines from user-visible history.
         if any(m in text for m in plumbing_markers):
             return
-        if _re.search(r"\bANNOUNCE_\w+\b", text):
+        if _CHAT_ANNOUNCE_RE.search(text):
             return
-        if _re.search(r"\b(HEARTBEAT_OK|NO_REPLY)\b", text):
+        if _CHAT_CONTROL_RE.search(text):
             return
-        if _re.search(r"agent-to-agent announce", text, flags=_re.I):
+        if _CHAT_PLUMBING_RE.search(text):
             return
 
         try:
@@ -4618,11 +5023,8 @@ async def async_setup(hass, config):
 
         # Fingerprint-based dedupe (cross-source) at store-write time
         try:
-            import hashlib as _hashlib
-            import re as _re
-
             # Normalize whitespace to make dedupe resilient.
-            norm = _re.sub(r"\s+", " ", text).strip()
+            norm = _WS_RE.sub(" ", text).strip()
 
             # Bucket based on item_ts (not wall clock) to avoid collapsing many distinct messages.
             # item_ts is ISO; we fall back to wall clock if parsing fails.
@@ -4638,7 +5040,7 @@ async def async_setup(hass, config):
             if fp_bucket is None:
                 fp_bucket = int(__import__("time").time() // 2)
 
-            fp = _hashlib.sha256(f"{session}|{role}|{norm}|{fp_bucket}".encode("utf-8")).hexdigest()
+            fp = _fp_digest(f"{session}|{role}|{norm}|{fp_bucket}")
         except Exception:
             fp = None
 
@@ -4668,8 +5070,9 @@ async def async_setup(hass, config):
         if len(items) > 500:
             items = items[-500:]
 
-        await store.async_save(items)
+        store.async_delay_save(lambda items=items: items, STORE_SAVE_DELAY_S)
         cfg["chat_history"] = items
+        _panel_config_touch(cfg)
 
         # Track last agent text to detect role-flip echoes.
         try:
@@ -4683,6 +5086,9 @@ async def async_setup(hass, config):
         except Exception:
             pass
 
+        # Push the new item to open chat streams right away.
+        _chat_stream_kick(hass, session)
+
     async def handle_chat_send(call):
         """Send a user message into an OpenClaw session (server-side).
 
@@ -4690,7 +5096,7 @@ async def async_setup(hass, config):
         calls `chat_append` before `chat_send`, and double-writing was causing duplicates.
         """
         hass = call.hass
-        session, gateway_origin, token, default_session_key = _runtime_gateway_parts(hass)
+        session, gateway_origin, headers, default_session_key = _runtime_gateway_parts(hass)
 
         message = call.data.get("message")
         if not isinstance(message, str) or not message.strip():
@@ -4706,12 +5112,14 @@ async def async_setup(hass, config):
             len(message),
         )
         payload = {"tool": "sessions_send", "args": {"sessionKey": session_key_local, "message": message}}
-        res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
+        res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
         _LOGGER.debug("chat_send gateway response: %s", str(res)[:500])
+        # Reply is likely soon: poll faster on any open chat stream.
+        _chat_stream_kick(hass, session_key_local)
 
     async def handle_sessions_list(call):
         hass = call.hass
-        session, gateway_origin, token, _default_session_key = _runtime_gateway_parts(hass)
+        session, gateway_origin, headers, _default_session_key = _runtime_gateway_parts(hass)
         limit = 50
         try:
             limit = int(call.data.get("limit", 50))
@@ -4722,15 +5130,15 @@ async def async_setup(hass, config):
         if limit > 200:
             limit = 200
         payload = {"tool": "sessions_list", "args": {"limit": limit, "messageLimit": 1}}
-        res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
+        res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
         return {"result": res}
 
     async def handle_sessions_spawn(call):
         hass = call.hass
-        session, gateway_origin, token, _default_session_key = _runtime_gateway_parts(hass)
+        session, gateway_origin, headers, _default_session_key = _runtime_gateway_parts(hass)
         label = call.data.get("label")
         payload = {"tool": "sessions_spawn", "args": {"task": "(new chat session)", "label": label or None, "cleanup": "keep"}}
-        res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
+        res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
         return {"result": res}
 
     def _extract_session_key(obj):
@@ -4771,9 +5179,9 @@ async def async_setup(hass, config):
         label = call.data.get("label")
 
         # Spawn on gateway
-        session, gateway_origin, token, _default_session_key = _runtime_gateway_parts(hass)
+        session, gateway_origin, headers, _default_session_key = _runtime_gateway_parts(hass)
         payload = {"tool": "sessions_spawn", "args": {"task": "(new chat session)", "label": label or None, "cleanup": "keep"}}
-        res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
+        res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
         key = _extract_session_key(res)
         if not key:
             # Build a sanitized debug summary (never include token) and return it in supports_response.
@@ -4857,7 +5265,7 @@ async def async_setup(hass, config):
 
         # 1) Gateway list (preferred)
         try:
-            session, gateway_origin, token, _default_session = _runtime_gateway_parts(hass)
+            session, gateway_origin, headers, _default_session = _runtime_gateway_parts(hass)
             limit = 50
             try:
                 limit = int(call.data.get("limit", 50))
@@ -4866,7 +5274,7 @@ async def async_setup(hass, config):
             limit = max(1, min(limit, 200))
 
             payload = {"tool": "sessions_list", "args": {"limit": limit, "messageLimit": 1}}
-            res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
+            res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
 
             raw = res
             for _ in range(4):
@@ -4927,10 +5335,10 @@ async def async_setup(hass, config):
 
     async def handle_session_status_get(call):
         hass = call.hass
-        session, gateway_origin, token, default_session_key = _runtime_gateway_parts(hass)
+        session, gateway_origin, headers, default_session_key = _runtime_gateway_parts(hass)
         session_key = call.data.get("session_key") or default_session_key
         payload = {"tool": "session_status", "args": {"sessionKey": session_key}}
-        res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
+        res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
         return {"result": res}
 
     async def handle_chat_poll(call):
@@ -4939,7 +5347,7 @@ async def async_setup(hass, config):
         Guardrails: dedupe, ignore role-flip echoes, and filter internal plumbing text.
         """
         hass = call.hass
-        session, gateway_origin, token, default_session_key = _runtime_gateway_parts(hass)
+        session, gateway_origin, headers, default_session_key = _runtime_gateway_parts(hass)
 
         cfg = hass.data.get(DOMAIN, {})
         store: Store = cfg.get("chat_store")
@@ -4963,7 +5371,7 @@ async def async_setup(hass, config):
             limit = 100
 
         payload = {"tool": "sessions_history", "args": {"sessionKey": session_key_local, "limit": limit}}
-        res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
+        res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
         _LOGGER.debug("chat_poll gateway raw response: %s", str(res)[:800])
 
         # Reuse the same parsing logic as the sessions_history API view (tail+diff).
@@ -5057,12 +5465,11 @@ async def async_setup(hass, config):
 
             # Filter internal control/meta lines that should never surface in HA chat UI.
             txt_norm = text.strip()
-            import re as _re
-            if _re.search(r"\bANNOUNCE_\w+\b", txt_norm):
+            if _CHAT_ANNOUNCE_RE.search(txt_norm):
                 continue
-            if _re.search(r"\b(HEARTBEAT_OK|NO_REPLY)\b", txt_norm):
+            if _CHAT_CONTROL_RE.search(txt_norm):
                 continue
-            if _re.search(r"agent-to-agent announce", txt_norm, flags=_re.I):
+            if _CHAT_PLUMBING_RE.search(txt_norm):
                 continue
             # Filter internal Pulse reflection outputs from appearing in the chat tab.
             if "PULSE_INTERNAL" in txt_norm or "BEGIN_JSON" in txt_norm:
@@ -5086,9 +5493,8 @@ async def async_setup(hass, config):
 
             # Compute fingerprint for cross-source dedupe
             try:
-                import hashlib as _hashlib
                 fp_bucket = int((ts_ms / 1000) // 2)
-                fp = _hashlib.sha256(f"{session_key_local}|agent|{text}|{fp_bucket}".encode("utf-8")).hexdigest()
+                fp = _fp_digest(f"{session_key_local}|agent|{text}|{fp_bucket}")
             except Exception:
                 fp = None
 
@@ -5105,15 +5511,15 @@ async def async_setup(hass, config):
                 }
             )
 
-        # Always load from Store to avoid stale cfg cache / cross-task drift.
-        current = await store.async_load() or []
+        # cfg["chat_history"] mirrors the chat store (every save updates both) and is read and
+        # written back below without an await in between, so no other task can interleave.
+        current = cfg.get("chat_history") or []
         if not isinstance(current, list):
             current = []
         current = [it for it in current if isinstance(it, dict)]
         seen_ids = {it.get("id") for it in current if it.get("id")}
 
         # Dedupe guardrails (fingerprint TTL + track last agent text per session)
-        import re as _re
         dedupe = rt.get("chat_dedupe")
         if not isinstance(dedupe, dict):
             dedupe = {}
@@ -5124,7 +5530,6 @@ async def async_setup(hass, config):
             rt["chat_last_agent_text"] = last_agent_map
 
         def _fingerprint(item: dict, bucket_s: int = 5) -> str:
-            import hashlib as _hashlib
             import time as _time
             t = item.get("ts") or ""
             # bucket by now if parse fails
@@ -5134,7 +5539,7 @@ async def async_setup(hass, config):
             except Exception:
                 b = 0
             base = f"{item.get('session_key')}|{item.get('role')}|{item.get('text')}|{b}"
-            return _hashlib.sha256(base.encode("utf-8")).hexdigest()
+            return _fp_digest(base)
 
         def _dedupe_ok(fp: str, ttl_s: int = 60) -> bool:
             import time as _time
@@ -5151,8 +5556,8 @@ async def async_setup(hass, config):
             dedupe[fp] = now
             return True
 
-        plumbing_re = _re.compile(r"agent-to-agent announce", _re.I)
-        control_re = _re.compile(r"\b(HEARTBEAT_OK|NO_REPLY)\b|\bANNOUNCE_\w+\b", _re.I)
+        plumbing_re = _CHAT_PLUMBING_RE
+        control_re = _CHAT_CONTROL_ANY_RE
 
         store_len_before = len(current)
         appended = 0
@@ -5192,11 +5597,11 @@ async def async_setup(hass, config):
             current.sort(key=_ts)
             if len(current) > 500:
                 current = current[-500:]
-            await store.async_save(current)
+            store.async_delay_save(lambda current=current: current, STORE_SAVE_DELAY_S)
             cfg["chat_history"] = current
-        else:
-            # Keep cfg mirror warm even when no append occurs.
-            cfg["chat_history"] = current[-500:]
+            _panel_config_touch(cfg)
+        # Nothing appended: cfg["chat_history"] is already the source of truth; replacing it
+        # with this filtered copy would only invalidate the chat index on every tick.
 
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug(
@@ -5242,26 +5647,18 @@ async def async_setup(hass, config):
         after_ts = call.data.get("after_ts") or call.data.get("since_ts")
         before_id = call.data.get("before_id")
 
-        items = await store.async_load() or []
-        if not isinstance(items, list):
-            items = []
-        items = [it for it in items if isinstance(it, dict)]
-        if session_key:
-            items = [it for it in items if it.get("session_key") == session_key]
-
-        items.sort(key=lambda it: str(it.get("ts") or ""))
+        # Served from the in-memory chat index (cfg mirror of the store): no disk read, filter
+        # or sort on the per-tick path.
+        view = _chat_index(cfg).sessions.get(session_key) or _chat_view([])
+        items = view.items
 
         if after_ts:
-            newer = [it for it in items if str(it.get("ts") or "") > str(after_ts)]
-            page = newer[:limit]
+            start = bisect.bisect_right(view.ts, str(after_ts))
+            page = items[start:start + limit]
             return {"items": page, "has_older": False}
 
         if before_id:
-            idx = None
-            for i, it in enumerate(items):
-                if it.get("id") == before_id:
-                    idx = i
-                    break
+            idx = view.pos.get(before_id)
             older = items[:idx] if idx is not None else items
             page = older[-limit:] if len(older) > limit else older
             has_older = len(older) > len(page)
@@ -5272,6 +5669,59 @@ async def async_setup(hass, config):
         has_older = len(items) > len(page)
         return {"items": page, "has_older": has_older}
 
+    async def handle_chat_tick(call):
+        """One panel poll tick: gateway poll + history delta (+ usage / sessions).
+
+        Collapses chat_poll, chat_history_delta, session_status_get and
+        chat_list_sessions into a single round trip for the iframe panel.
+        """
+        hass = call.hass
+        rt = _runtime(hass)
+        session_key = call.data.get("session_key") or rt.get("session_key") or DEFAULT_SESSION_KEY
+        limit = call.data.get("limit", 200)
+        include_usage = bool(call.data.get("include_usage", True))
+        include_sessions = bool(call.data.get("include_sessions", False))
+
+        # Without after_ts the delta read returns the last-N page (same as chat_history_delta).
+        after_ts = call.data.get("after_ts") or call.data.get("since_ts")
+
+        async def _none():
+            return None
+
+        # Independent gateway hops fan out; the delta read waits for the poll append.
+        poll_res, status_res, sessions_res = await asyncio.gather(
+            handle_chat_poll(_PanelInternalCall(hass, {"session_key": session_key, "limit": call.data.get("poll_limit", 50)})),
+            handle_session_status_get(_PanelInternalCall(hass, {"session_key": session_key})) if include_usage else _none(),
+            handle_chat_list_sessions(_PanelInternalCall(hass, {})) if include_sessions else _none(),
+            return_exceptions=True,
+        )
+        errors: dict[str, str] = {}
+        if isinstance(poll_res, Exception):
+            errors["poll"] = str(poll_res)
+
+        delta = await handle_chat_history_delta(
+            _PanelInternalCall(hass, {"session_key": session_key, "after_ts": after_ts, "limit": limit})
+        )
+
+        usage = None
+        if isinstance(status_res, Exception):
+            errors["usage"] = str(status_res)
+        elif isinstance(status_res, dict):
+            usage = status_res.get("result")
+
+        sessions = None
+        if isinstance(sessions_res, Exception):
+            errors["sessions"] = str(sessions_res)
+        elif isinstance(sessions_res, dict):
+            sessions = sessions_res.get("items")
+
+        return {
+            "history_delta": delta,
+            "usage": usage,
+            "sessions": sessions,
+            "errors": errors or None,
+        }
+
     async def handle_chat_fetch(call):
         hass = call.hass
         cfg = hass.data.get(DOMAIN, {})
@@ -5339,23 +5789,23 @@ async def async_setup(hass, config):
         if len(deduped) > 500:
             deduped = deduped[-500:]
 
-        await store.async_save(deduped)
+        store.async_delay_save(lambda deduped=deduped: deduped, STORE_SAVE_DELAY_S)
         cfg["chat_history"] = deduped
+        _panel_config_touch(cfg)
 
     async def handle_gateway_test(call):
         hass = call.hass
-        session, gateway_origin, token, session_key = _runtime_gateway_parts(hass)
+        session, gateway_origin, headers, session_key = _runtime_gateway_parts(hass)
 
         # Lightweight ping via listing sessions (no side effects)
         payload = {"tool": "sessions_list", "args": {"limit": 1}}
-        import time
 
         t0 = time.monotonic()
         t_post_ms = None
         t_dl_ms = None
 
         try:
-            await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
+            await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
         except Exception as e:
             # NOTE: Keep logs token-safe (never log/echo token).
             await _notify("Clawdbot: gateway_test", f"ERROR: {e}")
@@ -5379,7 +5829,7 @@ async def async_setup(hass, config):
 
     async def handle_tools_invoke(call):
         hass = call.hass
-        session, gateway_origin, token, _default_session_key = _runtime_gateway_parts(hass)
+        session, gateway_origin, headers, _default_session_key = _runtime_gateway_parts(hass)
         tool = call.data.get("tool")
         args = call.data.get("args", {})
         if not tool:
@@ -5388,7 +5838,7 @@ async def async_setup(hass, config):
             raise RuntimeError("args must be an object")
 
         payload = {"tool": str(tool), "args": args}
-        res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
+        res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
         await _notify(f"Clawdbot: {tool}", str(res))
 
     async def handle_ha_get_states(call):
@@ -5591,7 +6041,6 @@ async def async_setup(hass, config):
         st["avg_solar_15m"] = _ema(st.get("avg_solar_15m"), solar, alpha=0.02)
 
         # Trend (W per minute) using last sample.
-        import time
         now = time.time()
         prev_t = st.get("last_t")
         prev_load = st.get("last_load")
@@ -5679,7 +6128,6 @@ async def async_setup(hass, config):
         rt["derived_last_update"] = now
 
     async def _derived_loop():
-        import asyncio
         rt = _runtime(hass)
         while rt.get("derived_enabled"):
             try:
@@ -5821,11 +6269,9 @@ async def async_setup(hass, config):
 
             return _slugify(text)
         except Exception:
-            import re as _re
-
             t = str(text or "").strip().lower()
-            t = _re.sub(r"[^a-z0-9_]+", "_", t)
-            t = _re.sub(r"_+", "_", t).strip("_")
+            t = _SLUG_INVALID_RE.sub("_", t)
+            t = _SLUG_UNDERSCORES_RE.sub("_", t).strip("_")
             return t or "item"
 
     def _created_entities_to_float(val):
@@ -5982,7 +6428,6 @@ async def async_setup(hass, config):
     async def _created_entities_compute_pv_next_day(spec: dict[str, Any]) -> tuple[float | None, dict[str, Any]]:
         """Return (prediction, meta)."""
         from datetime import timedelta
-        from homeassistant.util import dt as dt_util
         import math
 
         inputs = spec.get("inputs") if isinstance(spec.get("inputs"), dict) else {}
@@ -6100,8 +6545,6 @@ async def async_setup(hass, config):
         return pred, meta
 
     async def _created_entities_update_one(spec: dict[str, Any], force: bool = False):
-        from homeassistant.util import dt as dt_util
-
         entity_id = spec.get("entity_id") if isinstance(spec.get("entity_id"), str) else None
         kind = spec.get("kind") if isinstance(spec.get("kind"), str) else None
         title = spec.get("title") if isinstance(spec.get("title"), str) else "Created Entity"
@@ -6172,8 +6615,6 @@ async def async_setup(hass, config):
             await _created_entities_update_one(spec, force=force)
 
     async def _created_entities_loop():
-        import asyncio
-
         rt = _runtime(hass)
         while True:
             items = _created_entities_get_items()
@@ -6301,7 +6742,7 @@ async def async_setup(hass, config):
             raise HomeAssistantError("messages is required")
 
         # Prepare gateway request
-        session, gateway_origin, token, _default_session_key = _runtime_gateway_parts(hass)
+        session, gateway_origin, headers, _default_session_key = _runtime_gateway_parts(hass)
 
         tool_name = "compose_created_entity"
         system_msg = (
@@ -6739,7 +7180,7 @@ async def async_setup(hass, config):
         json_fallback_preview: str | None = None
 
         try:
-            res = await _gw_post(session, gateway_origin + "/v1/responses", token, payload)
+            res = await _gw_post(session, gateway_origin + "/v1/responses", headers, payload)
             assistant_text_candidates.extend(
                 _extract_assistant_text_from_responses_output(res.get("output") if isinstance(res, dict) else None)
             )
@@ -6754,7 +7195,7 @@ async def async_setup(hass, config):
                     cc_res = await _gw_post(
                         session,
                         gateway_origin + "/v1/chat/completions",
-                        token,
+                        headers,
                         _build_chat_payload(strict_no_tool_call_retry=False),
                     )
                     assistant_text_candidates.extend(_extract_assistant_text_from_chat_completion(cc_res))
@@ -6785,7 +7226,7 @@ async def async_setup(hass, config):
                 cc_res = await _gw_post(
                     session,
                     gateway_origin + "/v1/chat/completions",
-                    token,
+                    headers,
                     _build_chat_payload(strict_no_tool_call_retry=True),
                 )
                 assistant_text_candidates.extend(_extract_assistant_text_from_chat_completion(cc_res))
@@ -7037,9 +7478,6 @@ async def async_setup(hass, config):
             buckets = AGENT0_MAX_BUCKETS
             period_hours = (buckets * bucket_minutes) / 60.0
 
-        import time
-        from homeassistant.util import dt as dt_util
-
         now = time.time()
         start_ts = now - (period_hours * 3600.0)
         bucket_s = bucket_minutes * 60
@@ -7140,12 +7578,11 @@ async def async_setup(hass, config):
         hist = rt.get("agent0_hist")
         if store is None or not isinstance(hist, dict):
             return
-        await store.async_save({"series": hist})
+        store.async_delay_save(lambda hist=hist: {"series": hist}, STORE_SAVE_DELAY_S)
         rt["agent0_hist_last_persist"] = __import__("time").time()
 
     async def _agent0_hist_sampler_loop():
         import asyncio, time
-        from homeassistant.util import dt as dt_util
 
         rt = _runtime(hass)
         # 30s sampling; 24h retention
@@ -7257,9 +7694,8 @@ async def async_setup(hass, config):
             items = []
         items = [it for it in items if isinstance(it, dict) and it.get("session_key") == session_key]
 
-        import re as _re
         # Only flag hard internal control/plumbing tokens (avoid false positives on normal text).
-        bad_re = _re.compile(r"\bANNOUNCE_\w+\b|\bANNOUNCE_SKIP\b|\bNO_REPLY\b|\bHEARTBEAT_OK\b|agent-to-agent announce", _re.I)
+        bad_re = _CHAT_BAD_RE
 
         role_counts = {}
         fp = set()
@@ -7322,6 +7758,7 @@ async def async_setup(hass, config):
         # Persist full cfg so custom themes remain
         await store.async_save({"preset": out["preset"], "auto": out["auto"], "themes": out["themes"]})
         cfg["theme"] = out
+        _panel_config_touch(cfg)
         return {"ok": True, "theme": out}
 
     async def handle_theme_reset(call):
@@ -7332,6 +7769,7 @@ async def async_setup(hass, config):
         out = {"preset": "nebula", "auto": False, "themes": {}}
         await store.async_save({"preset": out["preset"], "auto": out["auto"], "themes": out["themes"]})
         cfg["theme"] = out
+        _panel_config_touch(cfg)
         return {"ok": True, "theme": out}
 
     async def handle_theme_upsert(call):
@@ -7354,6 +7792,7 @@ async def async_setup(hass, config):
         themes[key.strip()] = theme_obj
         current["themes"] = themes
         cfg["theme"] = current
+        _panel_config_touch(cfg)
 
         await store.async_save({"preset": current.get("preset"), "auto": bool(current.get("auto")), "themes": themes})
         return {"ok": True, "themes": themes}
@@ -7373,6 +7812,7 @@ async def async_setup(hass, config):
         themes.pop(key.strip(), None)
         current["themes"] = themes
         cfg["theme"] = current
+        _panel_config_touch(cfg)
         await store.async_save({"preset": current.get("preset"), "auto": bool(current.get("auto")), "themes": themes})
         return {"ok": True, "themes": themes}
 
@@ -7752,7 +8192,6 @@ async def async_setup(hass, config):
                 return out
 
         # Best-effort reachability check: perform a HEAD/GET to base endpoint expecting non-network failure.
-        import time
         t0 = time.monotonic()
         try:
             session = _runtime(hass).get('session')
@@ -7857,7 +8296,6 @@ async def async_setup(hass, config):
                 script = str(text_in).strip()
 
                 import time, uuid
-                import asyncio
                 rid = str(uuid.uuid4())
 
                 # simple rate limit: one request per 2s per user
@@ -7939,7 +8377,6 @@ async def async_setup(hass, config):
                                 break
 
                             try:
-                                import json
                                 j = json.loads(raw.decode('utf-8', errors='ignore'))
                             except Exception:
                                 # Some providers return raw bytes without proper content-type.
@@ -7966,7 +8403,6 @@ async def async_setup(hass, config):
                             if audio.startswith('http'):
                                 audio_src = audio
                             elif audio.startswith('data:audio'):
-                                import base64
                                 comma = audio.find(',')
                                 if comma > 0:
                                     data = base64.b64decode(audio[comma + 1:])
@@ -8107,8 +8543,9 @@ async def async_setup(hass, config):
         items.append(item)
         if len(items) > 200:
             items = items[-200:]
-        await store.async_save(items)
+        store.async_delay_save(lambda items=items: items, STORE_SAVE_DELAY_S)
         cfg["journal"] = items
+        _panel_config_touch(cfg)
         try:
             _oc_update_journal_trigger(cfg, item, source=str(item.get("source") or "service"))
         except Exception:
@@ -8327,7 +8764,7 @@ async def async_setup(hass, config):
 
         ts = _dt.datetime.now(tz=_dt.timezone.utc).isoformat().replace("+00:00", "Z")
 
-        session, gateway_origin, token, _default_session_key = _runtime_gateway_parts(hass)
+        session, gateway_origin, headers, _default_session_key = _runtime_gateway_parts(hass)
 
         tool_name = "compose_conversation_process"
 
@@ -8379,7 +8816,7 @@ async def async_setup(hass, config):
         res = None
         call_error = None
         try:
-            res = await _gw_post(session, gateway_origin + "/v1/responses", token, payload)
+            res = await _gw_post(session, gateway_origin + "/v1/responses", headers, payload)
         except Exception as e:
             call_error = str(e)
             _LOGGER.exception("agent_compose_prompt /v1/responses failed")
@@ -8496,6 +8933,7 @@ async def async_setup(hass, config):
         prof["updated_ts"] = _dt.datetime.now(tz=_dt.timezone.utc).isoformat().replace("+00:00", "Z")
         await store.async_save(prof)
         cfg["agent_profile"] = prof
+        _panel_config_touch(cfg)
         return {"ok": True, "profile": prof}
 
     async def handle_agent_state_get(call):
@@ -8722,6 +9160,7 @@ async def async_setup(hass, config):
 
         await prof_store.async_save(prof)
         cfg["agent_profile"] = prof
+        _panel_config_touch(cfg)
         try:
             _oc_update_agent_mood_status(cfg, source=str(prof.get("source") or "agent_state"))
         except Exception:
@@ -8760,8 +9199,9 @@ async def async_setup(hass, config):
                 )
                 if len(items) > 200:
                     items = items[-200:]
-                await journal_store.async_save(items)
+                journal_store.async_delay_save(lambda items=items: items, STORE_SAVE_DELAY_S)
                 cfg["journal"] = items
+                _panel_config_touch(cfg)
                 appended = True
                 try:
                     _oc_update_journal_trigger(cfg, items[-1], source=str(items[-1].get("source") or "webhook"))
@@ -8786,11 +9226,13 @@ async def async_setup(hass, config):
         prof = {}
         await prof_store.async_save(prof)
         cfg["agent_profile"] = prof
+        _panel_config_touch(cfg)
 
         cleared = {"profile": True, "journal": False}
         if clear_journal:
             await journal_store.async_save([])
             cfg["journal"] = []
+            _panel_config_touch(cfg)
             cleared["journal"] = True
 
         return {"ok": True, "cleared": cleared}
@@ -8955,7 +9397,7 @@ async def async_setup(hass, config):
         except Exception:
             pass
 
-        return {"ok": True, "request_id": request_id}
+        return {"ok": True, "request_id": request_id, "active_updated_ts": avatar.get("active_updated_ts")}
 
     async def handle_avatar_generate_dispatch(call):
         """Dispatch avatar generation to Agent0 via Gateway sessions_spawn.
@@ -9004,7 +9446,7 @@ async def async_setup(hass, config):
             webhook_url = None
 
         # Spawn Agent0 run on gateway
-        session, gateway_origin, token, _default_session_key = _runtime_gateway_parts(hass)
+        session, gateway_origin, headers, _default_session_key = _runtime_gateway_parts(hass)
 
         task = "\n".join(
             [
@@ -9041,7 +9483,7 @@ async def async_setup(hass, config):
                 "tool": "sessions_send",
                 "args": {"sessionKey": dispatch_session_key, "message": task},
             }
-            res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
+            res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
             dispatched_via = "sessions_send"
             try:
                 if isinstance(res, dict):
@@ -9058,7 +9500,7 @@ async def async_setup(hass, config):
                     "cleanup": "keep",
                 },
             }
-            res = await _gw_post(session, gateway_origin + "/tools/invoke", token, payload)
+            res = await _gw_post(session, gateway_origin + "/tools/invoke", headers, payload)
             dispatched_via = "sessions_spawn"
             try:
                 if isinstance(res, dict):
@@ -9101,7 +9543,6 @@ async def async_setup(hass, config):
         if store is None:
             raise HomeAssistantError("avatar store not initialized")
 
-        import base64
         import datetime as _dt
 
         agent_id = call.data.get("agent_id") or "agent0"
@@ -9245,15 +9686,13 @@ async def async_setup(hass, config):
             items = []
         items = [it for it in items if isinstance(it, dict)]
 
-        import re as _re
-        bad_re = _re.compile(r"\bANNOUNCE_\w+\b|\bNO_REPLY\b|\bHEARTBEAT_OK\b|agent-to-agent announce", _re.I)
-        ws_re = _re.compile(r"\s+")
+        bad_re = _CHAT_BAD_RE
+        ws_re = _WS_RE
 
         def _norm(t: str) -> str:
             return ws_re.sub(" ", (t or "")).strip()
 
         def _fp(session: str, role: str, text: str, ts: str) -> str:
-            import hashlib
             bucket = 0
             try:
                 from homeassistant.util import dt as dt_util
@@ -9264,7 +9703,7 @@ async def async_setup(hass, config):
             except Exception:
                 pass
             base = f"{session}|{role}|{_norm(text)}|{bucket}"
-            return hashlib.sha256(base.encode("utf-8")).hexdigest()
+            return _fp_digest(base)
 
         # Keep items from other sessions untouched; sanitize only selected session.
         kept_other = [it for it in items if it.get("session_key") != session_key]
@@ -9298,6 +9737,7 @@ async def async_setup(hass, config):
         merged = merged[-500:]
         await store.async_save(merged)
         cfg["chat_history"] = merged
+        _panel_config_touch(cfg)
 
         return {
             "ok": True,
@@ -9341,6 +9781,7 @@ async def async_setup(hass, config):
         "chat_send": handle_chat_send,
         "chat_poll": handle_chat_poll,
         "chat_history_delta": handle_chat_history_delta,
+        "chat_tick": handle_chat_tick,
         "chat_new_session": handle_chat_new_session,
         "chat_list_sessions": handle_chat_list_sessions,
         "session_status_get": handle_session_status_get,
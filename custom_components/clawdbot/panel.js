@@ -29,11 +29,19 @@ window.__clawdbotPanelInitError = null;
     }
   } catch(e) {}
 
+  // Config is served separately so the panel document stays static and cacheable.
+  // Seed the asset version (content hash) from this script's ?v= so worker URLs can be
+  // built before the fetch lands; init awaits it. Module scripts have no currentScript.
   try{
-    const el = document.getElementById('clawdbot-config');
-    const txt = el ? (el.textContent || el.innerText || '{}') : '{}';
-    window.__CLAWDBOT_CONFIG__ = JSON.parse(txt || '{}');
+    const el = document.currentScript || document.querySelector('script[src*="/clawdbot-panel.js"]');
+    const src = (el && el.src) || '';
+    const v = new URL(src, window.location.href).searchParams.get('v');
+    window.__CLAWDBOT_CONFIG__ = v ? { asset_version: v } : {};
   } catch(e){ window.__CLAWDBOT_CONFIG__ = {}; }
+  window.__clawdbotConfigReady = fetch('/clawdbot-config.json', { credentials: 'same-origin' })
+    .then(r => r.ok ? r.json() : {})
+    .catch(() => ({}))
+    .then((cfg) => { Object.assign(window.__CLAWDBOT_CONFIG__, (cfg && typeof cfg === 'object') ? cfg : {}); });
 
     // Theme binding: copy HA CSS variables from parent document into this iframe.
     // CSS custom properties do not inherit across iframe boundaries.
@@ -57,6 +65,14 @@ window.__clawdbotPanelInitError = null;
 
 (function(){
   function qs(sel){ return document.querySelector(sel); }
+
+  // Cached getElementById for fixed nodes read on every render; detached nodes are re-resolved.
+  const _byIdCache = Object.create(null);
+  function byId(id){
+    const el = _byIdCache[id];
+    if (el && el.isConnected) return el;
+    return (_byIdCache[id] = document.getElementById(id));
+  }
   function setHidden(el, hidden){
     if (!el) return;
     // Use explicit display toggling to avoid any class/CSS interference.
@@ -69,11 +85,17 @@ window.__clawdbotPanelInitError = null;
   const CHAT_POLL_FAST_MS = 2000;
   const CHAT_POLL_INITIAL_MS = 1000;
   const CHAT_POLL_BOOST_WINDOW_MS = 30000;
+  // While the SSE chat stream is open, the tick loop only runs as a slow fallback
+  // (usage refresh + dead-connection detection).
+  const CHAT_POLL_STREAM_MS = 30000;
+  const CHAT_STREAM_RETRY_MAX_MS = 60000;
   const CHAT_DELTA_LIMIT = 200;
   const CHAT_HISTORY_PAGE_LIMIT = 50;
   const CHAT_UI_MAX_ITEMS = 200;
 
   let chatItems = [];
+  let chatMaxTs = '';  // high-water mark of chatItems[].ts (ISO strings compare lexically)
+  const _existingKeys = new Set();  // stamped keys of chatItems (kept in sync on replace/append/trim)
   let chatHasOlder = false;
   let chatLoadingOlder = false;
   let chatSessionKey = null;
@@ -84,6 +106,11 @@ window.__clawdbotPanelInitError = null;
   let chatLastPollTs = null;
   let chatLastPollAppended = 0;
   let chatLastPollError = null;
+  let chatTickSessionsDue = false;
+  let chatStream = null;
+  let chatStreamSession = null;
+  let chatStreamRetryMs = 0;
+  let chatStreamRetryAt = 0;
 
   // Chat voice mode (MVP)
   let _chatMode = 'text';
@@ -260,7 +287,6 @@ window.__clawdbotPanelInitError = null;
     if (!_chatVoiceRaf) draw();
   }
 
-  const BUILD_ID = ((window.__CLAWDBOT_CONFIG__||{}).build_id || 'unknown');
   const DEBUG_UI = (() => {
     try{
       const qs1 = new URLSearchParams(window.location.search || '');
@@ -275,18 +301,17 @@ window.__clawdbotPanelInitError = null;
   })();
 
 
-  let __dbgStep = 'boot';
-  function dbgStep(step, extra){
-    __dbgStep = step;
-    if (!DEBUG_UI) return;
+  // Resolved once at load: a no-op unless ?debug=1.
+  const dbgStep = DEBUG_UI ? (step, extra) => {
     try{ console.debug('[clawdbot] step', step, extra||''); }catch(e){}
     try{
       const el = qs('#debugStamp');
       if (!el) return;
       el.style.display = 'block';
-      el.textContent = `build:${BUILD_ID} step:${step}` + (extra ? ` (${extra})` : '');
+      el.textContent = `build:${(window.__CLAWDBOT_CONFIG__||{}).build_id || 'unknown'} step:${step}` + (extra ? ` (${extra})` : '');
     } catch(e){}
-  }
+  } : () => {};
+
   function escapeHtml(txt){
     return String(txt)
       .replaceAll('&','&amp;')
@@ -294,6 +319,78 @@ window.__clawdbotPanelInitError = null;
       .replaceAll('>','&gt;');
   }
 
+  // Trailing-edge debounce: only the last call in a burst runs, ms after it.
+  function debounce(fn, ms){
+    let t = null;
+    return function(...args){
+      if (t) clearTimeout(t);
+      t = setTimeout(() => { t = null; fn.apply(this, args); }, ms);
+    };
+  }
+
+  // Throttle: runs at most once per ms; calls inside the window collapse into one
+  // trailing run with the latest call's this/args, so the last update is never lost.
+  function throttle(fn, ms){
+    let last = 0;
+    let t = null;
+    let lastThis = null;
+    let lastArgs = null;
+    return function(...args){
+      const wait = ms - (Date.now() - last);
+      if (wait <= 0 && !t) {
+        last = Date.now();
+        fn.apply(this, args);
+        return;
+      }
+      lastThis = this;
+      lastArgs = args;
+      if (t) return;
+      t = setTimeout(() => {
+        t = null;
+        last = Date.now();
+        const self = lastThis, a = lastArgs;
+        lastThis = lastArgs = null;
+        fn.apply(self, a);
+      }, Math.max(0, wait));
+    };
+  }
+
+  // Epoch ms -> "HH:MM:SS" (UTC, as toISOString().slice(11,19)). Timestamps are kept
+  // numeric and formatted only when drawn; one-entry cache per second.
+  let _clockCache = { sec: NaN, txt: '' };
+  function clockTime(ms){
+    const sec = Math.floor(ms / 1000);
+    if (sec !== _clockCache.sec) _clockCache = { sec, txt: new Date(sec * 1000).toISOString().slice(11,19) };
+    return _clockCache.txt;
+  }
+
+  // Scratch <template> for parsing one keyed row from its HTML string.
+  const _rowTpl = document.createElement('template');
+
+  // Fresh copy of a row skeleton declared as <template id=…> in the panel document.
+  function cloneTpl(id){
+    return byId(id).content.cloneNode(true);
+  }
+
+  function escapeAttr(txt){
+    return escapeHtml(txt).replaceAll('"','&quot;');
+  }
+
+  // Chat bubble formatting in one pass: ``` fences (an unclosed fence runs to the end),
+  // HTML escaping, and literal "\\n" sequences outside code -> <br/>.
+  const CHAT_TEXT_RE = /```([\s\S]*?)(?:```|$)|[&<>]|\\n/g;
+  const HTML_ESC_RE = /[&<>]/g;
+  const HTML_ESC = { '&': '&amp;', '<': '&lt;', '>': '&gt;' };
+  const _escChar = (c) => HTML_ESC[c];
+  const _chatTextReplacer = (m, code) => {
+    if (code !== undefined) return '<pre><code>' + code.replace(HTML_ESC_RE, _escChar) + '</code></pre>';
+    return HTML_ESC[m] || '<br/>';
+  };
+
+  function formatChatText(text){
+    return String(text || '').replace(CHAT_TEXT_RE, _chatTextReplacer);
+  }
+
   function isAtBottom(list){
     if (!list) return true;
     const gap = list.scrollHeight - list.scrollTop - list.clientHeight;
@@ -310,21 +407,113 @@ window.__clawdbotPanelInitError = null;
     btn.disabled = !!chatLoadingOlder;
   }
 
+  // Rendered chat DOM mirrors chatItems; poll ticks only append the delta.
+  let _chatStackEl = null;
+  let _chatRenderedKeys = [];
+
+  function buildChatRow(msg){
+    const row = document.createElement('div');
+    row.className = `chat-row ${msg.role === 'user' ? 'user' : 'agent'}`;
+    const bubble = document.createElement('div');
+    bubble.className = 'chat-bubble';
+    bubble.innerHTML = formatChatText(msg.text);
+    const meta = document.createElement('div');
+    meta.className = 'chat-meta';
+    meta.innerHTML = `<span>${msg.role === 'user' ? 'You' : 'Clawdbot'}</span><span>${msg.ts || ''}</span>`;
+    bubble.appendChild(meta);
+    row.appendChild(bubble);
+    return row;
+  }
+
+  // Optimistic bubble for a just-sent message: one row appended to the stack without
+  // touching chatItems. The next render that runs drops it before reconciling, by which
+  // point the server copy is in chatItems (or the send failed).
+  let _chatPendingRow = null;
+  function appendChatBubble(item){
+    const list = qs('#chatList');
+    dropPendingChatBubble();
+    if (!list || !_chatStackEl || _chatStackEl.parentNode !== list) return;
+    if (!_chatRenderedKeys.length) _chatStackEl.textContent = '';  // "No messages yet" placeholder
+    _chatPendingRow = buildChatRow(item);
+    _chatStackEl.appendChild(_chatPendingRow);
+    list.scrollTop = list.scrollHeight;
+  }
+  function dropPendingChatBubble(){
+    if (!_chatPendingRow) return false;
+    _chatPendingRow.remove();
+    _chatPendingRow = null;
+    return true;
+  }
+
+  // Returns the number of rendered rows to drop from the front when the current DOM
+  // is a prefix-compatible view of chatItems (append/trim only), else -1.
+  function chatRenderedOffset(keys){
+    const prev = _chatRenderedKeys;
+    if (!prev.length || !keys.length) return -1;
+    const start = prev.indexOf(keys[0]);
+    if (start < 0) return -1;
+    const overlap = prev.length - start;
+    if (overlap > keys.length) return -1;
+    for (let i = 0; i < overlap; i++){
+      if (prev[start + i] !== keys[i]) return -1;
+    }
+    return start;
+  }
+
+  // Last rendered (session, length, head, tail, autoScroll) tuple; see renderChat.
+  let _lastRenderKey = '';
+
   function renderChat(opts){
     const list = qs('#chatList');
     if (!list) return;
+    // Poll ticks that brought nothing new leave the rendered list as-is.
+    const src = chatItems || [];
+    const renderKey = (chatSessionKey||'') + '|' + src.length + '|' + stampKey(src[0]) + '|' + stampKey(src[src.length-1]) + '|' + ((opts && opts.autoScroll) ? '1' : '0');
+    // The optimistic bubble never outlives a render, even one that changes nothing else;
+    // if it had replaced the "No messages yet" placeholder, rebuild to restore that.
+    const placeholderGone = dropPendingChatBubble() && !_chatRenderedKeys.length;
+    if (renderKey === _lastRenderKey && !placeholderGone && !(opts && (opts.force || opts.full)) && _chatStackEl && _chatStackEl.parentNode === list) {
+      // Items unchanged, but loadOlderChat may have flipped chatHasOlder/chatLoadingOlder.
+      updateLoadOlderTop();
+      return;
+    }
+    _lastRenderKey = renderKey;
     const preserveScroll = !!(opts && opts.preserveScroll);
     const shouldAutoScroll = !!(opts && opts.autoScroll);
     const wasAtBottom = isAtBottom(list);
     const prevScrollHeight = list.scrollHeight;
     const prevScrollTop = list.scrollTop;
+    const items = chatItems || [];
+    const keys = items.map(stampKey);
+
+    // Incremental path: same session, only new rows at the tail (and/or trimmed head).
+    const attached = !!(_chatStackEl && _chatStackEl.parentNode === list);
+    const start = (attached && !(opts && opts.full)) ? chatRenderedOffset(keys) : -1;
+    if (start >= 0) {
+      for (let i = 0; i < start; i++) _chatStackEl.removeChild(_chatStackEl.firstChild);
+      const removedHeight = start ? (prevScrollHeight - list.scrollHeight) : 0;
+      const frag = document.createDocumentFragment();
+      for (let i = _chatRenderedKeys.length - start; i < items.length; i++) frag.appendChild(buildChatRow(items[i]));
+      if (frag.childNodes.length) _chatStackEl.appendChild(frag);
+      _chatRenderedKeys = keys;
+      updateLoadOlderTop();
+      if (shouldAutoScroll || wasAtBottom) {
+        list.scrollTop = list.scrollHeight;
+      } else if (removedHeight) {
+        list.scrollTop = Math.max(0, prevScrollTop - removedHeight);
+      }
+      return;
+    }
+
     list.innerHTML = '';
 
     const stack = document.createElement('div');
     stack.className = 'chat-stack';
     list.appendChild(stack);
+    _chatStackEl = stack;
+    _chatRenderedKeys = [];
 
-    if (!chatItems || !chatItems.length) {
+    if (!items.length) {
       const empty = document.createElement('div');
       empty.className = 'muted';
       empty.style.textAlign = 'center';
@@ -334,29 +523,12 @@ window.__clawdbotPanelInitError = null;
       return;
     }
 
-    for (const msg of chatItems){
-      const row = document.createElement('div');
-      row.className = `chat-row ${msg.role === 'user' ? 'user' : 'agent'}`;
-      const bubble = document.createElement('div');
-      bubble.className = 'chat-bubble';
-      const parts = String(msg.text || '').split('```');
-      let html = '';
-      for (let i = 0; i < parts.length; i++){
-        const seg = escapeHtml(parts[i]);
-        if (i % 2 === 0){
-          html += seg.replaceAll('\\n', '<br/>');
-        } else {
-          html += `<pre><code>${seg}</code></pre>`;
-        }
-      }
-      bubble.innerHTML = html;
-      const meta = document.createElement('div');
-      meta.className = 'chat-meta';
-      meta.innerHTML = `<span>${msg.role === 'user' ? 'You' : 'Clawdbot'}</span><span>${msg.ts || ''}</span>`;
-      bubble.appendChild(meta);
-      row.appendChild(bubble);
-      stack.appendChild(row);
+    const frag = document.createDocumentFragment();
+    for (const msg of items){
+      frag.appendChild(buildChatRow(msg));
     }
+    stack.appendChild(frag);
+    _chatRenderedKeys = keys;
     updateLoadOlderTop();
 
     if (preserveScroll) {
@@ -367,6 +539,27 @@ window.__clawdbotPanelInitError = null;
     }
   }
 
+  // Coalesce chat renders into one per animation frame. Options merge across callers;
+  // autoScroll from any caller wins over preserveScroll.
+  let _chatRenderOpts = null;
+  let _chatRenderRaf = 0;
+  function scheduleRenderChat(opts){
+    const o = _chatRenderOpts || {};
+    if (opts && opts.autoScroll) o.autoScroll = true;
+    if (opts && opts.preserveScroll) o.preserveScroll = true;
+    if (opts && opts.full) o.full = true;
+    if (opts && opts.force) o.force = true;
+    if (o.autoScroll) o.preserveScroll = false;
+    _chatRenderOpts = o;
+    if (_chatRenderRaf) return;
+    _chatRenderRaf = requestAnimationFrame(() => {
+      _chatRenderRaf = 0;
+      const next = _chatRenderOpts;
+      _chatRenderOpts = null;
+      renderChat(next);
+    });
+  }
+
   async function refreshBuildInfo(){
     const el = qs('#buildInfo');
     if (!el) return;
@@ -391,12 +584,7 @@ window.__clawdbotPanelInitError = null;
       ['token', cfg.has_token ? 'present' : 'missing'],
       ['session_key', cfg.session_key || '(missing)'],
     ];
-    root.innerHTML = '';
-    for (const [k,v] of items){
-      const d = document.createElement('div');
-      d.innerHTML = `<div class="muted">${k}</div><div><b>${String(v)}</b></div>`;
-      root.appendChild(d);
-    }
+    root.innerHTML = items.map(([k,v]) => `<div><div class="muted">${k}</div><div><b>${String(v)}</b></div></div>`).join('');
     try{ refreshBuildInfo(); } catch(e){}
   }
   const THEMES = {
@@ -407,22 +595,24 @@ window.__clawdbotPanelInitError = null;
     crimson_night: { name:'Crimson Night', a:'#ff2b2b', b:'#5b2bff', c:'#ff2da1', bg1:'rgba(255,43,43,.18)', bg2:'rgba(91,43,255,.24)', bg3:'rgba(255,45,161,.16)', glow:'rgba(255,43,43,.32)' },
   };
 
+  // Everything themed (preview swatch included) reads the --claw-* properties, so a
+  // preset is a handful of writes on :root, skipped when it is already applied.
+  let _themeApplied = null;
   function applyThemePreset(key, {silent=false, mood=null}={}){
     const t = THEMES[key] || THEMES.nebula;
-    const root = document.documentElement;
-    root.style.setProperty('--claw-accent-a', t.a);
-    root.style.setProperty('--claw-accent-b', t.b);
-    root.style.setProperty('--claw-accent-c', t.c);
-    root.style.setProperty('--claw-bg-1', t.bg1);
-    root.style.setProperty('--claw-bg-2', t.bg2);
-    root.style.setProperty('--claw-bg-3', t.bg3);
-    root.style.setProperty('--claw-btn-glow', t.glow);
-    // Surface tint deliberately uses accent-c for contrast vs page bg
-    root.style.setProperty('--claw-surface-tint', `color-mix(in srgb, ${t.c} 22%, transparent)`);
-    try{
-      const prev = document.getElementById('themePreview');
-      if (prev) prev.style.background = `linear-gradient(120deg, color-mix(in srgb, ${t.a} 22%, transparent), color-mix(in srgb, ${t.b} 18%, transparent)), color-mix(in srgb, var(--ha-card-background, var(--card-background-color)) 85%, transparent)`;
-    } catch(e){}
+    if (_themeApplied !== t) {
+      _themeApplied = t;
+      const root = document.documentElement;
+      root.style.setProperty('--claw-accent-a', t.a);
+      root.style.setProperty('--claw-accent-b', t.b);
+      root.style.setProperty('--claw-accent-c', t.c);
+      root.style.setProperty('--claw-bg-1', t.bg1);
+      root.style.setProperty('--claw-bg-2', t.bg2);
+      root.style.setProperty('--claw-bg-3', t.bg3);
+      root.style.setProperty('--claw-btn-glow', t.glow);
+      // Surface tint deliberately uses accent-c for contrast vs page bg
+      root.style.setProperty('--claw-surface-tint', `color-mix(in srgb, ${t.c} 22%, transparent)`);
+    }
     if (!silent) toast(`Theme: ${t.name}${mood ? ` (mood: ${mood})` : ''}`);
   }
 
@@ -540,6 +730,8 @@ window.__clawdbotPanelInitError = null;
       session_key: it.session_key,
       text: it.text,
     }));
+    resetExistingKeys();
+    bumpChatMaxTs(chatItems, true);
     chatHasOlder = !!cfg.chat_history_has_older;
     chatSessionKey = cfg.session_key || null;
 
@@ -559,6 +751,7 @@ window.__clawdbotPanelInitError = null;
 
   function chatItemKey(it){
     if (!it) return '';
+    if (it._k) return it._k;
     const id = it.id || it.message_id || it.messageId;
     if (id) return String(id);
     // Fallback: stable-ish key when backend doesn't provide ids
@@ -568,28 +761,119 @@ window.__clawdbotPanelInitError = null;
     return 'h_' + simpleHash(`${role}|${ts}|${text}`);
   }
 
+  // Stamp the dedupe key onto the message once at ingest so render/poll paths
+  // read a property instead of re-hashing role|ts|text on every tick.
+  function stampKey(it){
+    if (it && !it._k) it._k = chatItemKey(it);
+    return it ? it._k : '';
+  }
+
   function syncChatSeenIds(){
     // Important: poll loop is the sole owner of advancing seen-set (for stable +N).
     // Only initialize once (first load).
     if (chatLastSeenIds && chatLastSeenIds.size > 0) return;
-    const ids = (chatItems || []).map((it)=>chatItemKey(it)).filter(Boolean);
+    const ids = (chatItems || []).map(stampKey).filter(Boolean);
     chatLastSeenIds = new Set(ids);
   }
 
-  async function callInternalApi(path, method='GET', data=null){
+  const GET_INIT = Object.freeze({ method: 'GET' });
+  const JSON_HEADERS = Object.freeze({ 'Content-Type': 'application/json' });
+
+  // Identical concurrent reads share one in-flight promise (fast clicks, tab switches).
+  // Only GETs and side-effect-free panel services are coalesced.
+  const COALESCE_SERVICES = new Set(['gateway_test', 'session_status_get', 'chat_list_sessions', 'sessions_list', 'build_info']);
+  const _inflight = new Map();
+
+  function coalesce(key, fn){
+    const hit = _inflight.get(key);
+    if (hit) return hit;
+    const p = fn().finally(() => { _inflight.delete(key); });
+    _inflight.set(key, p);
+    return p;
+  }
+
+  // Stale-while-revalidate for the coalesced reads: within ttl a repeat call resolves
+  // from cache; up to ttl+stale it still does, while one background refresh replaces
+  // the entry. gateway_test is fresh-only so the test button never reports an old run.
+  const SWR_SERVICES = {
+    gateway_test: { ttl: 500, stale: 0 },
+    session_status_get: { ttl: 1000, stale: 5000 },
+    chat_list_sessions: { ttl: 2000, stale: 10000 },
+    sessions_list: { ttl: 2000, stale: 10000 },
+    build_info: { ttl: 60000, stale: 0 },
+  };
+  // Writes that make cached session/usage/gateway reads wrong.
+  const SWR_INVALIDATE = new Set(['chat_send', 'chat_append', 'chat_new_session', 'set_connection_overrides', 'reset_connection_overrides']);
+  const _swr = new Map();
+  // Bumped when an invalidating write starts and again when it settles. A read only
+  // seeds the cache if no write began or finished while it was in flight, and reads
+  // from different generations never share an in-flight promise.
+  let _swrGen = 0;
+
+  function swrInvalidate(){
+    _swrGen++;
+    _swr.clear();
+  }
+
+  function swrGet(key, policy, fn){
+    const gen = _swrGen;
+    const load = () => coalesce(gen + ' ' + key, fn).then((v) => {
+      if (gen === _swrGen) _swr.set(key, { t: Date.now(), v });
+      return v;
+    });
+    const e = _swr.get(key);
+    const age = e ? Date.now() - e.t : Infinity;
+    if (age < policy.ttl) return Promise.resolve(e.v);
+    if (age < policy.ttl + policy.stale) { load().catch(() => {}); return Promise.resolve(e.v); }
+    return load();
+  }
+
+  // An abortable call never joins or seeds a shared in-flight promise.
+  function callInternalApi(path, method='GET', data=null, signal=null){
     const cleanPath = String(path || '').replace(/^\/+/, '');
+    if (method === 'POST' && data && SWR_INVALIDATE.has(data.service)) {
+      swrInvalidate();
+      const p = callInternalApiOnce(cleanPath, method, data, signal);
+      p.then(swrInvalidate, swrInvalidate);
+      return p;
+    }
+    if (signal) return callInternalApiOnce(cleanPath, method, data, signal);
+    if (method === 'GET') return coalesce('GET ' + cleanPath, () => callInternalApiOnce(cleanPath, method, data));
+    if (method === 'POST' && data && COALESCE_SERVICES.has(data.service)) {
+      const key = 'POST ' + cleanPath + ' ' + JSON.stringify(data);
+      const policy = SWR_SERVICES[data.service];
+      const fn = () => callInternalApiOnce(cleanPath, method, data);
+      return policy ? swrGet(key, policy, fn) : coalesce(key, fn);
+    }
+    return callInternalApiOnce(cleanPath, method, data);
+  }
+
+  function abortError(){
+    return new DOMException('The operation was aborted.', 'AbortError');
+  }
+
+  async function callInternalApiOnce(cleanPath, method, data, signal=null){
     const { hass } = await getHass();
+    if (signal && signal.aborted) throw abortError();
 
     if (hass && typeof hass.callApi === 'function') {
-      if (method === 'GET') return hass.callApi('get', cleanPath);
-      if (method === 'POST') return hass.callApi('post', cleanPath, data || {});
-      if (method === 'DELETE') return hass.callApi('delete', cleanPath, data || {});
-      return hass.callApi(String(method || 'get').toLowerCase(), cleanPath, data || {});
+      // hass.callApi takes no signal: the request still completes, but a superseded
+      // caller gets an AbortError instead of a stale result.
+      let out;
+      if (method === 'GET') out = await hass.callApi('get', cleanPath);
+      else if (method === 'POST') out = await hass.callApi('post', cleanPath, data || {});
+      else if (method === 'DELETE') out = await hass.callApi('delete', cleanPath, data || {});
+      else out = await hass.callApi(String(method || 'get').toLowerCase(), cleanPath, data || {});
+      if (signal && signal.aborted) throw abortError();
+      return out;
     }
 
     const url = '/api/' + cleanPath;
-    const init = { method, headers: { 'Content-Type': 'application/json' } };
-    if (method !== 'GET' && data != null) init.body = JSON.stringify(data);
+    // GETs reuse one frozen init (no headers/body); only writes carry a JSON body.
+    let init = (method === 'GET')
+      ? GET_INIT
+      : (data != null ? { method, headers: JSON_HEADERS, body: JSON.stringify(data) } : { method });
+    if (signal) init = { ...init, signal };
     const res = await fetch(url, init);
     let body = null;
     try { body = await res.json(); } catch(_e) {}
@@ -602,12 +886,13 @@ window.__clawdbotPanelInitError = null;
     return body;
   }
 
-  async function callServiceResponse(domain, service, data){
+  async function callServiceResponse(domain, service, data, opts){
     const payload = data || {};
 
     // Internal runtime-only call path (keeps HA action surface minimal)
     if (domain === 'clawdbot') {
-      const out = await callInternalApi('clawdbot/panel_service', 'POST', { service, data: payload, return_response: true });
+      const signal = (opts && opts.signal) || null;
+      const out = await callInternalApi('clawdbot/panel_service', 'POST', { service, data: payload, return_response: true }, signal);
       return { response: { result: (out && out.result !== undefined) ? out.result : out } };
     }
 
@@ -644,21 +929,30 @@ window.__clawdbotPanelInitError = null;
     if (el) el.textContent = (text == null ? '—' : String(text));
   }
 
-  async function refreshTokenUsage(){
+  function applyTokenUsage(r){
+    const usage = (r && (r.usage || r.Usage || r.data && r.data.usage)) || null;
+    const total = usage && (usage.totalTokens || usage.total_tokens || usage.tokens || usage.total) ;
+    if (total != null) setTokenUsage(total);
+    else setTokenUsage('—');
+  }
+
+  async function refreshTokenUsage(opts){
+    const signal = (opts && opts.signal) || null;
     try{
       if (!chatSessionKey) { setTokenUsage('—'); return; }
-      const resp = await callServiceResponse('clawdbot','session_status_get', { session_key: chatSessionKey });
+      const resp = await callServiceResponse('clawdbot','session_status_get', { session_key: chatSessionKey }, { signal });
       const data = (resp && resp.response) ? resp.response : resp;
       const r = data && data.result ? data.result : data;
-      const usage = (r && (r.usage || r.Usage || r.data && r.data.usage)) || null;
-      const total = usage && (usage.totalTokens || usage.total_tokens || usage.tokens || usage.total) ;
-      if (total != null) setTokenUsage(total);
-      else setTokenUsage('—');
+      applyTokenUsage(r);
     } catch(e){
+      if (e && e.name === 'AbortError') return;
       setTokenUsage('—');
     }
   }
 
+  // Send, session switch and stream deltas can fire in bursts; cap usage reads at 4/s.
+  const refreshTokenUsageThrottled = throttle(refreshTokenUsage, 250);
+
   function ensureSessionSelectValue(){
     const sel = qs('#chatSessionSelect');
     if (!sel) return;
@@ -683,44 +977,64 @@ window.__clawdbotPanelInitError = null;
       const data = (resp && resp.response) ? resp.response : resp;
 
       const r = data && data.result ? data.result : data;
-      const arr = (r && Array.isArray(r.items)) ? r.items : [];
-      // Preserve existing selection
-      const current = chatSessionKey || sel.value || '';
-      sel.innerHTML = '';
-      const mkOpt = (value, label) => {
-        const o = document.createElement('option');
-        o.value = value;
-        o.textContent = label;
-        return o;
-      };
-      const seen = new Set();
-      // Ensure there's always a visible value even if the list call fails.
-      const fallback = current || (window.__CLAWDBOT_CONFIG__ && (window.__CLAWDBOT_CONFIG__.session_key)) || 'main';
-      if (fallback) { sel.appendChild(mkOpt(fallback, fallback)); seen.add(fallback); }
-      for (const s of arr){
-        const key = s && (s.session_key || s.sessionKey || s.key || s.id);
-        if (!key || seen.has(key)) continue;
-        const label = s.label || s.name || '';
-        sel.appendChild(mkOpt(key, label ? (label + ' — ' + key) : key));
-        seen.add(key);
-      }
-      sel.value = current || fallback;
+      applySessionsList((r && Array.isArray(r.items)) ? r.items : []);
     } catch(e){
       // best-effort only
       if (DEBUG_UI) console.debug('[clawdbot chat] refreshSessions failed', e);
     }
   }
 
+  function applySessionsList(arr){
+    const sel = qs('#chatSessionSelect');
+    if (!sel) return;
+    // Preserve existing selection
+    const current = chatSessionKey || sel.value || '';
+    sel.innerHTML = '';
+    const mkOpt = (value, label) => {
+      const o = document.createElement('option');
+      o.value = value;
+      o.textContent = label;
+      return o;
+    };
+    const seen = new Set();
+    // Ensure there's always a visible value even if the list call fails.
+    const fallback = current || (window.__CLAWDBOT_CONFIG__ && (window.__CLAWDBOT_CONFIG__.session_key)) || 'main';
+    if (fallback) { sel.appendChild(mkOpt(fallback, fallback)); seen.add(fallback); }
+    for (const s of arr){
+      const key = s && (s.session_key || s.sessionKey || s.key || s.id);
+      if (!key || seen.has(key)) continue;
+      const label = s.label || s.name || '';
+      sel.appendChild(mkOpt(key, label ? (label + ' — ' + key) : key));
+      seen.add(key);
+    }
+    sel.value = current || fallback;
+  }
+
   function maxChatTs(){
-    let max = '';
+    return chatMaxTs;
+  }
+
+  function resetExistingKeys(){
+    _existingKeys.clear();
     for (const it of (chatItems || [])){
+      const k = (it && it._k) || stampKey(it);
+      if (k) _existingKeys.add(k);
+    }
+  }
+
+  function bumpChatMaxTs(items, reset){
+    if (reset) chatMaxTs = '';
+    for (const it of (items || [])){
       const ts = it && it.ts ? String(it.ts) : '';
-      if (ts && ts > max) max = ts;
+      if (ts && ts > chatMaxTs) chatMaxTs = ts;
     }
-    return max;
   }
 
-  async function loadChatLatest(){
+  // Session switches abort the previous switch's history/usage reads.
+  let _sessionAbort = null;
+
+  async function loadChatLatest(opts){
+    const signal = (opts && opts.signal) || null;
     try{
       const params = new URLSearchParams();
       params.set('limit', '50');
@@ -728,9 +1042,11 @@ window.__clawdbotPanelInitError = null;
       const apiPath = 'clawdbot/chat_history?' + params.toString();
 
       // Use service response to avoid iframe auth/context issues.
-      const resp = await callServiceResponse('clawdbot','chat_history_delta', { session_key: chatSessionKey, limit: CHAT_HISTORY_PAGE_LIMIT });
+      const resp = await callServiceResponse('clawdbot','chat_history_delta', { session_key: chatSessionKey, limit: CHAT_HISTORY_PAGE_LIMIT }, { signal });
       const data = (resp && resp.response) ? resp.response : resp;
       chatItems = (data && Array.isArray(data.items)) ? data.items : [];
+      resetExistingKeys();
+      bumpChatMaxTs(chatItems, true);
       chatHasOlder = !!(data && data.has_older);
       syncChatSeenIds();
     } catch(e){
@@ -748,11 +1064,11 @@ window.__clawdbotPanelInitError = null;
     })();
     if (!beforeId) {
       chatHasOlder = false;
-      renderChat({ preserveScroll: true });
+      scheduleRenderChat({ preserveScroll: true });
       return;
     }
     chatLoadingOlder = true;
-    renderChat({ preserveScroll: true });
+    scheduleRenderChat({ preserveScroll: true });
     try{
       const params = new URLSearchParams();
       params.set('limit', '50');
@@ -766,10 +1082,13 @@ window.__clawdbotPanelInitError = null;
       const prepend = [];
       for (const it of items){
         if (!it || !it.id || existing.has(it.id)) continue;
+        stampKey(it);
         prepend.push(it);
       }
       if (prepend.length) {
         chatItems = prepend.concat(chatItems || []);
+        for (const it of prepend) _existingKeys.add(it._k);
+        bumpChatMaxTs(prepend);
       }
       chatHasOlder = !!(data && data.has_older);
       syncChatSeenIds();
@@ -777,7 +1096,7 @@ window.__clawdbotPanelInitError = null;
       console.warn('chat_history fetch failed', e);
     } finally {
       chatLoadingOlder = false;
-      renderChat({ preserveScroll: true });
+      scheduleRenderChat({ preserveScroll: true });
     }
   }
 
@@ -787,6 +1106,7 @@ window.__clawdbotPanelInitError = null;
       clearTimeout(chatPollTimer);
       chatPollTimer = null;
     }
+    closeChatStream();
     if (DEBUG_UI) {
       chatLastPollDebugDetail = 'stopped';
     }
@@ -797,9 +1117,10 @@ window.__clawdbotPanelInitError = null;
   let chatLastPollDebugDetail = '';
 
   function updateChatPollDebug(){
+    // #chatPollDebug is hidden in markup; skip DOM + Date/string work unless debugging.
+    if (!DEBUG_UI) return;
     const el = qs('#chatPollDebug');
     if (!el) return;
-    if (!DEBUG_UI) { el.style.display = 'none'; return; }
     const last = chatLastPollTs ? new Date(chatLastPollTs).toLocaleTimeString() : '—';
     const err = chatLastPollError ? (' err:' + chatLastPollError) : '';
     const detail = chatLastPollDebugDetail ? (' · ' + chatLastPollDebugDetail) : '';
@@ -810,6 +1131,7 @@ window.__clawdbotPanelInitError = null;
   function startChatPolling(){
     if (chatPollingActive) return;
     chatPollingActive = true;
+    chatTickSessionsDue = true;
     updateChatPollDebug();
     scheduleChatPoll(CHAT_POLL_INITIAL_MS);
   }
@@ -818,6 +1140,107 @@ window.__clawdbotPanelInitError = null;
     chatPollBoostUntil = Date.now() + CHAT_POLL_BOOST_WINDOW_MS;
   }
 
+  function closeChatStream(){
+    if (chatStream) {
+      try{ chatStream.close(); }catch(e){}
+    }
+    chatStream = null;
+    chatStreamSession = null;
+  }
+
+  // Push path: /api/clawdbot/chat_stream (SSE). EventSource cannot send the bearer
+  // token, so the URL is signed through the HA websocket (auth/sign_path).
+  async function openChatStream(){
+    closeChatStream();
+    if (!chatSessionKey || typeof EventSource !== 'function') return;
+    if (Date.now() < chatStreamRetryAt) return;
+    const session = chatSessionKey;
+    try{
+      const { conn } = await getHass();
+      if (!conn || typeof conn.sendMessagePromise !== 'function') return;
+      const params = new URLSearchParams();
+      params.set('session_key', session);
+      const afterTs = maxChatTs();
+      if (afterTs) params.set('after_ts', afterTs);
+      const signed = await conn.sendMessagePromise({ type: 'auth/sign_path', path: '/api/clawdbot/chat_stream?' + params.toString(), expires: 3600 });
+      if (!chatPollingActive || session !== chatSessionKey || !signed || !signed.path) return;
+      const es = new EventSource(signed.path);
+      es.onopen = () => { chatStreamRetryMs = 0; };
+      es.onmessage = (ev) => {
+        if (es !== chatStream || session !== chatSessionKey) return;
+        let msg = null;
+        try{ msg = JSON.parse(ev.data); }catch(e){ return; }
+        const items = (msg && Array.isArray(msg.items)) ? msg.items : [];
+        if (!items.length) return;
+        const appended = mergeChatDelta(items);
+        chatLastPollTs = Date.now();
+        chatLastPollAppended = appended;
+        scheduleRenderChat({ preserveScroll: true });
+        if (appended) refreshTokenUsageThrottled();
+        updateChatPollDebug();
+      };
+      es.onerror = () => {
+        if (es !== chatStream) return;
+        // Back off before re-signing; the tick loop polls normally in the meantime.
+        closeChatStream();
+        chatStreamRetryMs = Math.min(CHAT_STREAM_RETRY_MAX_MS, chatStreamRetryMs ? chatStreamRetryMs * 2 : 2000);
+        chatStreamRetryAt = Date.now() + chatStreamRetryMs;
+        boostChatPolling();
+        scheduleChatPoll(CHAT_POLL_FAST_MS);
+      };
+      chatStream = es;
+      chatStreamSession = session;
+    } catch(e){
+      if (DEBUG_UI) console.debug('[clawdbot chat] stream unavailable', e);
+    }
+  }
+
+  // Merge fetched items onto chatItems; returns the number of newly-seen agent items.
+  function mergeChatDelta(newer){
+    if (!chatLastSeenIds) chatLastSeenIds = new Set();
+    // Only debug output needs the pre-merge snapshot; otherwise mutate in place.
+    const seenBeforeSize = chatLastSeenIds.size;
+    if (newer.length) {
+      const existing = _existingKeys;
+      for (const it of newer){
+        const k = stampKey(it);
+        if (!k || existing.has(k)) continue;
+        chatItems.push(it);
+        existing.add(k);
+        if (it.ts && String(it.ts) > chatMaxTs) chatMaxTs = String(it.ts);
+      }
+      // keep last CHAT_UI_MAX_ITEMS for UI responsiveness: drop the head in place
+      // and forget only the dropped keys (no copy of the kept tail, no Set rebuild).
+      if (chatItems.length > CHAT_UI_MAX_ITEMS) {
+        const dropped = chatItems.splice(0, chatItems.length - CHAT_UI_MAX_ITEMS);
+        for (const it of dropped) if (it && it._k) existing.delete(it._k);
+      }
+    }
+
+    // +N: count newly-seen agent keys among returned items
+    let appendedCount = 0;
+    const nextSeen = chatLastSeenIds;
+    for (const it of newer){
+      const key = stampKey(it);
+      if (!key) continue;
+      if (nextSeen.has(key)) continue;
+      nextSeen.add(key);
+      if (it && it.role === 'agent') appendedCount += 1;
+    }
+
+    if (DEBUG_UI) {
+      const tail = (chatItems || []).slice(-3).map((it)=>({
+        id: (it && (it.id || it.message_id || it.messageId)) || null,
+        key: chatItemKey(it),
+        role: it && it.role,
+        ts: it && it.ts,
+      }));
+      chatLastPollDebugDetail = `${chatStream ? 'sse ' : ''}seen:${seenBeforeSize} items:${(chatItems||[]).length} new:${newer.length} tailTs:${(tail[tail.length-1]&&tail[tail.length-1].ts)||'—'}`;
+      console.debug('[clawdbot chat] delta merged', {session: chatSessionKey, appended: appendedCount, newerCount: newer.length, tail});
+    }
+    return appendedCount;
+  }
+
   function scheduleChatPoll(delayMs){
     if (!chatPollingActive) return;
     if (chatPollTimer) clearTimeout(chatPollTimer);
@@ -826,6 +1249,8 @@ window.__clawdbotPanelInitError = null;
 
   async function pollSessionsHistory(){
     if (!chatPollingActive) return;
+    // Background tab: park the loop; visibilitychange re-arms it on return.
+    if (document.visibilityState === 'hidden') { chatPollTimer = null; return; }
     if (!chatSessionKey) {
       chatLastPollTs = Date.now();
       chatLastPollAppended = 0;
@@ -836,56 +1261,35 @@ window.__clawdbotPanelInitError = null;
     }
 
     const currentSession = chatSessionKey;
+    if (chatStreamSession !== currentSession) openChatStream();
     try{
-      const seenBefore = chatLastSeenIds ? new Set(Array.from(chatLastSeenIds)) : new Set();
-      await callService('clawdbot','chat_poll',{ session_key: currentSession, limit: CHAT_HISTORY_PAGE_LIMIT });
-      chatLastPollTs = Date.now();
-      chatLastPollError = null;
-
-      // Incremental refresh: fetch only items newer than current max ts (avoids capped moving-window)
+      // One round trip per tick: gateway poll + incremental history (items newer than
+      // current max ts, avoids capped moving-window) + token usage (+ sessions when due).
       const afterTs = maxChatTs();
-      const resp = await callServiceResponse('clawdbot','chat_history_delta', { session_key: currentSession, after_ts: afterTs || null, limit: CHAT_DELTA_LIMIT });
-      const data = (resp && resp.response) ? resp.response : resp;
+      const includeSessions = chatTickSessionsDue;
+      const resp = await callServiceResponse('clawdbot','chat_tick', {
+        session_key: currentSession,
+        after_ts: afterTs || null,
+        limit: CHAT_DELTA_LIMIT,
+        poll_limit: CHAT_HISTORY_PAGE_LIMIT,
+        include_usage: true,
+        include_sessions: includeSessions,
+      });
+      const tick = (resp && resp.response) ? resp.response : resp;
+      const r = tick && tick.result ? tick.result : tick;
+      const errors = (r && r.errors) || {};
+      chatLastPollTs = Date.now();
+      chatLastPollError = errors.poll ? String(errors.poll).slice(0, 120) : null;
+      if (currentSession === chatSessionKey) {
+        if (r && r.usage) applyTokenUsage(r.usage);
+        if (includeSessions && r && Array.isArray(r.sessions)) { applySessionsList(r.sessions); chatTickSessionsDue = false; }
+      }
+      const data = (r && r.history_delta) || {};
       const newer = (data && Array.isArray(data.items)) ? data.items : [];
 
-      // Merge new items onto existing list
-      if (newer.length) {
-        const existing = new Set((chatItems || []).map(chatItemKey));
-        for (const it of newer){
-          const k = chatItemKey(it);
-          if (!k || existing.has(k)) continue;
-          chatItems.push(it);
-          existing.add(k);
-        }
-        // keep last 200 for UI responsiveness
-        if (chatItems.length > 200) chatItems = chatItems.slice(-200);
-      }
+      chatLastPollAppended = mergeChatDelta(newer);
 
-      // +N: count newly-seen agent keys among returned items
-      let appendedCount = 0;
-      const nextSeen = new Set(Array.from(seenBefore));
-      for (const it of newer){
-        const key = chatItemKey(it);
-        if (!key) continue;
-        if (nextSeen.has(key)) continue;
-        nextSeen.add(key);
-        if (it && it.role === 'agent') appendedCount += 1;
-      }
-      chatLastSeenIds = nextSeen;
-      chatLastPollAppended = appendedCount;
-
-      renderChat({ preserveScroll: true });
-
-      if (DEBUG_UI) {
-        const tail = (chatItems || []).slice(-3).map((it)=>({
-          id: (it && (it.id || it.message_id || it.messageId)) || null,
-          key: chatItemKey(it),
-          role: it && it.role,
-          ts: it && it.ts,
-        }));
-        chatLastPollDebugDetail = `seen:${seenBefore.size} items:${(chatItems||[]).length} new:${newer.length} tailTs:${(tail[tail.length-1]&&tail[tail.length-1].ts)||'—'}`;
-        console.debug('[clawdbot chat] poll ok', {session: currentSession, appended: chatLastPollAppended, afterTs, newerCount: newer.length, tail});
-      }
+      scheduleRenderChat({ preserveScroll: true });
     } catch(e){
       chatLastPollTs = Date.now();
       chatLastPollAppended = 0;
@@ -896,7 +1300,8 @@ window.__clawdbotPanelInitError = null;
     updateChatPollDebug();
 
     if (chatLastPollAppended) boostChatPolling();
-    const delay = (Date.now() < chatPollBoostUntil) ? CHAT_POLL_FAST_MS : CHAT_POLL_INTERVAL_MS;
+    let delay = (Date.now() < chatPollBoostUntil) ? CHAT_POLL_FAST_MS : CHAT_POLL_INTERVAL_MS;
+    if (chatStream && chatStreamSession === currentSession) delay = CHAT_POLL_STREAM_MS;
     scheduleChatPoll(delay);
   }
 
@@ -1234,9 +1639,31 @@ window.__clawdbotPanelInitError = null;
   let _vizPeakRate = 0; // peaks/sec-ish
   let _vizLastPeakTs = 0;
 
+  // Painting lives in /clawdbot-panel-viz.js: a worker owning the transferred canvas when
+  // OffscreenCanvas is available, else the same script's painter on the main thread.
+  let _vizWorker = null;
+  let _vizPaint = null;
+  let _vizPaintLoading = false;
+
+  function vizScriptUrl(){
+    const cfg = (window.__CLAWDBOT_CONFIG__ || {});
+    return '/clawdbot-panel-viz.js?v=' + encodeURIComponent(cfg.asset_version || '');
+  }
+
+  function vizLoadPainter(){
+    if (_vizPaint || _vizPaintLoading) return;
+    _vizPaintLoading = true;
+    const sc = document.createElement('script');
+    sc.src = vizScriptUrl();
+    sc.onload = () => { _vizPaint = window.clawdbotVizPaint || null; _vizPaintLoading = false; };
+    sc.onerror = () => { _vizPaintLoading = false; };
+    document.head.appendChild(sc);
+  }
+
   function vizStop(){
     try{ if (_vizRaf) cancelAnimationFrame(_vizRaf); }catch(e){}
     _vizRaf = null;
+    try{ if (_vizWorker) _vizWorker.postMessage({ type: 'run', on: false }); }catch(e){}
   }
 
   function vizReleaseMic(){
@@ -1294,17 +1721,38 @@ window.__clawdbotPanelInitError = null;
 
   function vizInit(){
     try{ _vizOn = (localStorage.getItem('clawdbot_viz_on') !== '0'); }catch(e){}
-    _vizCanvas = document.getElementById('agentViz');
-    if (!_vizCanvas) return;
-    _vizCtx = _vizCanvas.getContext('2d');
+    const canvas = byId('agentViz');
+    // A canvas can be transferred only once; re-entering the Agent tab reuses the setup.
+    if (!canvas || canvas === _vizCanvas) return;
+    _vizCanvas = canvas;
+    _vizCtx = null;
+    if (_vizWorker) { try{ _vizWorker.terminate(); }catch(e){} _vizWorker = null; }
+    if (typeof canvas.transferControlToOffscreen === 'function' && typeof Worker === 'function') {
+      let worker = null;
+      try{
+        worker = new Worker(vizScriptUrl());
+        const off = canvas.transferControlToOffscreen();
+        worker.postMessage({ type: 'init', canvas: off }, [off]);
+        _vizWorker = worker;
+        return;
+      } catch(e){
+        if (worker) { try{ worker.terminate(); }catch(_e){} }
+      }
+    }
+    _vizCtx = canvas.getContext('2d');
+    vizLoadPainter();
   }
 
   function vizDraw(){
-    if (!_vizOn || !_vizCanvas || !_vizCtx) return;
+    if (!_vizOn || !_vizCanvas || _activeTab !== 'agent') return;
 
-    const ctx = _vizCtx;
-    const w = _vizCanvas.width, h = _vizCanvas.height;
-    const t = Date.now()/1000;
+    const mood = (window.__CLAWDBOT_CONFIG__ && window.__CLAWDBOT_CONFIG__.agent_profile && window.__CLAWDBOT_CONFIG__.agent_profile.mood) ? String(window.__CLAWDBOT_CONFIG__.agent_profile.mood) : 'calm';
+    if (_vizWorker && !_vizAnalyser) {
+      // Idle: the worker animates on its own; no main-thread frame loop needed.
+      _vizWorker.postMessage({ type: 'state', live: false, amp: 0, centroid: 0.25, flatness: 0.15, peakRate: 0, mood, on: true });
+      _vizRaf = null;
+      return;
+    }
 
     // --- Audio features (cheap proxies) ---
     let amp = 0.0;        // RMS proxy 0..1
@@ -1367,86 +1815,17 @@ window.__clawdbotPanelInitError = null;
       _vizPeakRate *= 0.96; // decay
     } catch(e){}
 
-    const speaking = amp > 0.02;
-    if (!speaking && !_vizAnalyser) {
-      // idle breathing when mic unavailable
-      amp = 0.04 + 0.01*Math.sin(t*0.6);
+    const s = { type: 'state', live: !!_vizAnalyser, amp, centroid, flatness, peakRate: _vizPeakRate, mood, on: true };
+    if (_vizWorker) _vizWorker.postMessage(s);
+    else if (_vizPaint && _vizCtx) {
+      try{ _vizPaint(_vizCtx, _vizCanvas.width, _vizCanvas.height, Date.now()/1000, s); } catch(e){}
     }
 
-    // clear
-    ctx.clearRect(0,0,w,h);
-
-    // ring params
-    const cx=w/2, cy=h/2;
-    const baseR = Math.min(w,h)*0.24;
-
-    // Timbre/texture proxy -> jitter/noise granularity
-    const idleJitter = 0.35;
-    const jitter = (speaking ? (0.9 + amp*7.5 + flatness*3.0) : idleJitter);
-
-    // Mood base hue + pitch proxy (centroid) -> hue shift + rotation speed
-    const mood = (window.__CLAWDBOT_CONFIG__ && window.__CLAWDBOT_CONFIG__.agent_profile && window.__CLAWDBOT_CONFIG__.agent_profile.mood) ? String(window.__CLAWDBOT_CONFIG__.agent_profile.mood) : 'calm';
-    const baseHue = (mood==='alert') ? 6 : (mood==='focused') ? 272 : (mood==='degraded') ? 38 : 186;
-    const hue = baseHue + (centroid-0.35)*70;
-    const sat = 92;
-    const light = 56;
-
-    const colA = (a) => `hsla(${hue.toFixed(1)}, ${sat}%, ${light}%, ${a})`;
-
-    // sketch ring
-    ctx.lineWidth = 2;
-    ctx.strokeStyle = colA(0.52 + amp*0.28);
-    // Volume → glow intensity
-    ctx.shadowBlur = 8 + amp*34;
-    ctx.shadowColor = colA(0.28 + amp*0.18);
-
-    // Pitch proxy → rotation speed
-    const rot = (0.9 + centroid*2.4);
-
-    ctx.beginPath();
-    for (let a=0;a<=Math.PI*2+0.001;a+=Math.PI/64){
-      const rr = baseR + (Math.sin(a*6 + t*3*rot)*0.8 + Math.sin(a*13 - t*2.1*rot)*0.5)*jitter;
-      const x = cx + Math.cos(a)*rr;
-      const y = cy + Math.sin(a)*rr;
-      if (a===0) ctx.moveTo(x,y); else ctx.lineTo(x,y);
-    }
-    ctx.closePath();
-    ctx.stroke();
-
-    // Duration (speech vs silence) → ripple cadence + tail fade
-    // Rhythm (peak rate) → pulse accent
-    ctx.shadowBlur = 0;
-    const rippleSpeed = speaking ? (0.85 + Math.min(1.2, _vizPeakRate*0.12)) : 0.18;
-    const rippleCount = speaking ? 4 : 2;
-    for (let i=0;i<rippleCount;i++){
-      const phase = (t*rippleSpeed + i*0.22) % 1;
-      const rr = baseR + 10 + phase*(18 + amp*42);
-      const alpha = (1-phase) * (speaking ? (0.12 + amp*0.18) : 0.06);
-      ctx.strokeStyle = colA(alpha);
-      ctx.lineWidth = (i===0 && _vizPeakRate>1.2) ? 1.6 : 1;
-      ctx.beginPath();
-      ctx.arc(cx,cy,rr,0,Math.PI*2);
-      ctx.stroke();
-    }
-
-    // Texture → subtle grain dots
-    try{
-      const dots = speaking ? Math.floor(6 + flatness*18) : 2;
-      ctx.fillStyle = colA(0.12 + amp*0.10);
-      for (let i=0;i<dots;i++){
-        const a = (i/dots)*Math.PI*2 + t*0.4*rot;
-        const rr = baseR + 6 + (i%3)*4 + amp*16;
-        const x = cx + Math.cos(a)*rr;
-        const y = cy + Math.sin(a*1.1)*rr;
-        ctx.fillRect(x, y, 1, 1);
-      }
-    } catch(e){}
-
     _vizRaf = requestAnimationFrame(vizDraw);
   }
 
   async function refreshAgentJournal(){
-    const el = document.getElementById('agentJournal');
+    const el = byId('agentJournal');
     if (!el) return;
     try{
       const resp = await callServiceResponse('clawdbot','journal_list', { limit: 50 });
@@ -1546,14 +1925,10 @@ window.__clawdbotPanelInitError = null;
         return `<div class="muted" style="white-space:pre-wrap">${renderInline(s)}</div>`;
       };
 
+      const frag = document.createDocumentFragment();
       for (const it of pageItems){
 
         const row = document.createElement('div');
-        row.style.border = '1px solid var(--divider-color)';
-        row.style.borderRadius = '14px';
-        row.style.padding = '10px 12px';
-        row.style.margin = '10px 0';
-        row.style.background = 'linear-gradient(120deg, color-mix(in srgb, var(--ha-card-background, var(--card-background-color)) 92%, transparent), color-mix(in srgb, var(--claw-bg-2) 12%, transparent))';
         const ts = it.ts ? String(it.ts) : '';
         const mood = it.mood ? String(it.mood) : '';
         const title = it.title ? String(it.title) : 'Journal';
@@ -1571,39 +1946,37 @@ window.__clawdbotPanelInitError = null;
           if (mm === 'lost') return 18;
           return 186; // calm/default
         };
+        // One cssText write per row (base box, plus the mood tint when known).
         const h = moodHue(mood);
-        if (h !== null) {
-          row.style.borderColor = `hsla(${h}, 92%, 56%, 0.55)`;
-          row.style.boxShadow = `0 0 0 1px hsla(${h}, 92%, 56%, 0.18) inset`;
-          row.style.background = `linear-gradient(120deg, color-mix(in srgb, var(--ha-card-background, var(--card-background-color)) 92%, transparent), hsla(${h}, 92%, 56%, 0.12))`;
-        }
+        row.style.cssText = (h === null)
+          ? 'border:1px solid var(--divider-color);border-radius:14px;padding:10px 12px;margin:10px 0;background:linear-gradient(120deg, color-mix(in srgb, var(--ha-card-background, var(--card-background-color)) 92%, transparent), color-mix(in srgb, var(--claw-bg-2) 12%, transparent))'
+          : `border:1px solid hsla(${h}, 92%, 56%, 0.55);border-radius:14px;padding:10px 12px;margin:10px 0;box-shadow:0 0 0 1px hsla(${h}, 92%, 56%, 0.18) inset;background:linear-gradient(120deg, color-mix(in srgb, var(--ha-card-background, var(--card-background-color)) 92%, transparent), hsla(${h}, 92%, 56%, 0.12))`;
 
         row.innerHTML = `<div style="display:flex;justify-content:space-between;gap:10px"><div style="font-weight:800">${escapeHtml(title)}${mood ? ` <span class=\"muted\">(${escapeHtml(mood)})</span>` : ''}</div><div class="muted" style="font-size:11px;white-space:nowrap">${escapeHtml(ts.slice(0,19).replace('T',' '))}</div></div><div style="margin-top:6px">${renderBody(body)}</div>`;
-        el.appendChild(row);
+        frag.appendChild(row);
       }
+      el.appendChild(frag);
     } catch(e){
       el.textContent = 'Failed to load journal.';
     }
   }
 
+  const AGENT_ACTIVITY_ROW_CSS = 'border:1px solid var(--divider-color);border-radius:14px;padding:10px 12px;margin:10px 0;background:linear-gradient(120deg, color-mix(in srgb, var(--ha-card-background, var(--card-background-color)) 92%, transparent), color-mix(in srgb, #00f5ff 6%, transparent))';
+
   function agentAddActivity(kind, text){
-    const now = new Date();
-    _agentActivity.unshift({ ts: now.toISOString(), kind, text: String(text||'') });
+    _agentActivity.unshift({ ts: Date.now(), kind, text: String(text||'') });
     _agentActivity = _agentActivity.slice(0,5);
-    const el = document.getElementById('agentActivity');
+    const el = byId('agentActivity');
     if (!el) return;
     if (!_agentActivity.length) { el.textContent = 'No activity yet.'; return; }
-    el.innerHTML = '';
+    const frag = document.createDocumentFragment();
     for (const it of _agentActivity){
       const row = document.createElement('div');
-      row.style.border = '1px solid var(--divider-color)';
-      row.style.borderRadius = '14px';
-      row.style.padding = '10px 12px';
-      row.style.margin = '10px 0';
-      row.style.background = 'linear-gradient(120deg, color-mix(in srgb, var(--ha-card-background, var(--card-background-color)) 92%, transparent), color-mix(in srgb, #00f5ff 6%, transparent))';
-      row.innerHTML = `<div style="display:flex;justify-content:space-between;gap:10px"><div style="font-weight:700;min-width:0;overflow:hidden;text-overflow:ellipsis;white-space:nowrap">${escapeHtml(it.kind)}</div><div class="muted" style="font-size:11px;white-space:nowrap">${escapeHtml(it.ts.slice(11,19))}</div></div><div class="muted" style="margin-top:4px;white-space:pre-wrap">${escapeHtml(it.text)}</div>`;
-      el.appendChild(row);
+      row.style.cssText = AGENT_ACTIVITY_ROW_CSS;
+      row.innerHTML = `<div style="display:flex;justify-content:space-between;gap:10px"><div style="font-weight:700;min-width:0;overflow:hidden;text-overflow:ellipsis;white-space:nowrap">${escapeHtml(it.kind)}</div><div class="muted" style="font-size:11px;white-space:nowrap">${clockTime(it.ts)}</div></div><div class="muted" style="margin-top:4px;white-space:pre-wrap">${escapeHtml(it.text)}</div>`;
+      frag.appendChild(row);
     }
+    el.replaceChildren(frag);
   }
 
   let _agentAutoRefreshTimer = null;
@@ -1613,11 +1986,24 @@ window.__clawdbotPanelInitError = null;
   let _agentLastEventMs = 0;
   let _agentEventCount = 0;
 
+  // Mood colors live in CSS custom properties keyed on #viewAgent[data-mood]; one
+  // attribute write restyles the mood label and hero card together.
+  function setAgentMood(mood){
+    const view = byId('viewAgent');
+    if (view && view.dataset.mood !== mood) view.dataset.mood = mood;
+  }
+
+  function renderAgentLiveMeta(el){
+    const lr = _agentLastRefreshMs ? clockTime(_agentLastRefreshMs) : '—';
+    const le = _agentLastEventMs ? clockTime(_agentLastEventMs) : '—';
+    setText(el, `live: event=${_agentEventCount} (last ${le}) · refresh ${lr} · poll 15s`);
+  }
+
   async function refreshAgentState(){
-    const moodEl = document.getElementById('agentMood');
-    const descEl = document.getElementById('agentDesc');
-    const metaEl = document.getElementById('agentMeta');
-    const liveEl = document.getElementById('agentLiveMeta');
+    const moodEl = byId('agentMood');
+    const descEl = byId('agentDesc');
+    const metaEl = byId('agentMeta');
+    const liveEl = byId('agentLiveMeta');
 
     const applyProfileUi = (prof, fallbackReason = null, syncHint = null) => {
       const p = (prof && typeof prof === 'object') ? prof : {};
@@ -1631,14 +2017,9 @@ window.__clawdbotPanelInitError = null;
       const source = (typeof p.source === 'string' && p.source.trim()) ? p.source.trim() : 'unknown';
       const ts = (typeof p.updated_ts === 'string' && p.updated_ts.trim()) ? p.updated_ts.trim() : 'unknown';
 
-      if (moodEl) {
-        moodEl.textContent = `· mood: ${moodLabel}`;
-        try{
-          moodEl.classList.remove('mood-calm','mood-alert','mood-focused','mood-degraded','mood-lost','mood-playful','mood-tired');
-          moodEl.classList.add('mood-' + knownMood);
-        } catch(e){}
-      }
-      if (descEl) descEl.textContent = descText;
+      setText(moodEl, `· mood: ${moodLabel}`);
+      setAgentMood(knownMood);
+      setText(descEl, descText);
       if (metaEl) {
         const suffix = fallbackReason ? ` · fallback: ${fallbackReason}` : '';
         let syncSuffix = '';
@@ -1653,21 +2034,9 @@ window.__clawdbotPanelInitError = null;
             if (stale || ep) syncSuffix = ` · sync: ${stale || 'stale ?'}${ep ? ` @ ${ep}` : ''}`;
           }
         } catch(e){}
-        metaEl.textContent = `source: ${source} · updated: ${ts}${suffix}${syncSuffix}`;
-      }
-      if (liveEl) {
-        const lr = _agentLastRefreshMs ? new Date(_agentLastRefreshMs).toISOString().slice(11,19) : '—';
-        const le = _agentLastEventMs ? new Date(_agentLastEventMs).toISOString().slice(11,19) : '—';
-        liveEl.textContent = `live: event=${_agentEventCount} (last ${le}) · refresh ${lr} · poll 15s`;
+        setText(metaEl, `source: ${source} · updated: ${ts}${suffix}${syncSuffix}`);
       }
-
-      try{
-        const hero = document.getElementById('agentHeroCard');
-        if (hero) {
-          hero.classList.remove('mood-calm','mood-alert','mood-focused','mood-degraded','mood-lost','mood-playful','mood-tired');
-          hero.classList.add('mood-' + knownMood);
-        }
-      } catch(e){}
+      renderAgentLiveMeta(liveEl);
 
       window.__CLAWDBOT_CONFIG__.agent_profile = {
         ...(window.__CLAWDBOT_CONFIG__.agent_profile || {}),
@@ -1723,9 +2092,16 @@ window.__clawdbotPanelInitError = null;
     }
   }
 
+  // Leaving the Agent tab: stop its uptime ticker and the visualizer loop;
+  // renderAgentView starts both again when the tab is shown.
+  function pauseAgentView(){
+    if (_agentUptimeTimer) { clearInterval(_agentUptimeTimer); _agentUptimeTimer = null; }
+    vizStop();
+  }
+
   async function renderAgentView(){
     // Uptime ticker
-    const uptimeEl = document.getElementById('agentUptime');
+    const uptimeEl = byId('agentUptime');
     if (_agentUptimeTimer) { clearInterval(_agentUptimeTimer); _agentUptimeTimer=null; }
     _agentUptimeTimer = setInterval(() => {
       try{ if (uptimeEl) uptimeEl.textContent = 'uptime: ' + fmtDur(Date.now() - _agentStartMs); }catch(e){}
@@ -1733,14 +2109,14 @@ window.__clawdbotPanelInitError = null;
 
     const cfg = (window.__CLAWDBOT_CONFIG__ || {});
     const sess = cfg.session_key || 'main';
-    const sessPill = document.getElementById('agentSessionPill');
+    const sessPill = byId('agentSessionPill');
     if (sessPill) { sessPill.textContent = 'session: ' + sess; }
 
     // Agent profile (mood + description)
     try{ await refreshAgentState(); } catch(e){}
 
     // Derived sensors status
-    const derivedPill = document.getElementById('agentDerivedPill');
+    const derivedPill = byId('agentDerivedPill');
     let derivedOn = null;
     try{
       const r = await callServiceResponse('clawdbot','derived_sensors_status',{});
@@ -1750,17 +2126,17 @@ window.__clawdbotPanelInitError = null;
 
       derivedOn = !!(rr && rr.enabled);
       if (derivedPill) {
-        derivedPill.textContent = derivedOn ? 'virtual sensors: ON' : 'virtual sensors: OFF';
+        setText(derivedPill, derivedOn ? 'virtual sensors: ON' : 'virtual sensors: OFF');
         derivedPill.title = 'Creates extra helper sensors (net power, load avg, etc.)';
-        derivedPill.classList.toggle('ok', derivedOn);
-        derivedPill.classList.toggle('bad', !derivedOn);
+        setClass(derivedPill, derivedOn ? 'pill ok' : 'pill bad');
       }
     } catch(e){
-      if (derivedPill) { derivedPill.textContent = 'derived: —'; derivedPill.classList.remove('ok'); derivedPill.classList.remove('bad'); }
+      setText(derivedPill, 'derived: —');
+      setClass(derivedPill, 'pill');
     }
 
     // Gateway health (latency)
-    const connPill = document.getElementById('agentConnPill');
+    const connPill = byId('agentConnPill');
     let gatewayOk = null;
     try{
       const r = await callServiceResponse('clawdbot','gateway_test',{});
@@ -1770,18 +2146,12 @@ window.__clawdbotPanelInitError = null;
 
       const ms = rr && rr.latency_ms != null ? Number(rr.latency_ms) : null;
       gatewayOk = true;
-      if (connPill) {
-        connPill.textContent = ms != null && !Number.isNaN(ms) ? `gateway OK (${ms}ms)` : 'gateway OK';
-        connPill.classList.add('ok');
-        connPill.classList.remove('bad');
-      }
+      setText(connPill, ms != null && !Number.isNaN(ms) ? `gateway OK (${ms}ms)` : 'gateway OK');
+      setClass(connPill, 'pill ok');
     } catch(e){
       gatewayOk = false;
-      if (connPill) {
-        connPill.textContent = 'gateway FAIL';
-        connPill.classList.add('bad');
-        connPill.classList.remove('ok');
-      }
+      setText(connPill, 'gateway FAIL');
+      setClass(connPill, 'pill bad');
     }
 
     // Auto theme on mood changes (if enabled)
@@ -1812,7 +2182,7 @@ window.__clawdbotPanelInitError = null;
     // Live refresh: subscribe to HA event; fallback poll while Agent tab is visible.
     const refreshNow = async () => {
       try{
-        const view = document.getElementById('viewAgent');
+        const view = byId('viewAgent');
         if (view && view.classList && view.classList.contains('hidden')) return;
       } catch(e){}
 
@@ -1824,14 +2194,7 @@ window.__clawdbotPanelInitError = null;
         await refreshAgentState();
         await refreshAgentJournal();
         _agentLastRefreshMs = Date.now();
-        try{
-          const liveEl = document.getElementById('agentLiveMeta');
-          if (liveEl) {
-            const lr = new Date(_agentLastRefreshMs).toISOString().slice(11,19);
-            const le = _agentLastEventMs ? new Date(_agentLastEventMs).toISOString().slice(11,19) : '—';
-            liveEl.textContent = `live: event=${_agentEventCount} (last ${le}) · refresh ${lr} · poll 15s`;
-          }
-        } catch(e){}
+        renderAgentLiveMeta(byId('agentLiveMeta'));
 
       } catch(e){} finally {
         _agentRefreshInFlight = false;
@@ -1880,7 +2243,46 @@ window.__clawdbotPanelInitError = null;
     bindAvatarGenUi();
   }
 
+  // Hero avatar: the active image, or the initials fallback when none is set.
+  // The URL is keyed on the active avatar's revision (active_updated_ts) so an unchanged
+  // avatar keeps one URL and revalidates against its ETag instead of refetching.
+  let _avatarRev = '';
+  function loadActiveAvatar(rev){
+    const img = byId('agentAvatarImg');
+    const fb = byId('agentAvatarFallback');
+    try{
+      if (!img) return;
+      if (typeof rev === 'string' && rev) _avatarRev = rev;
+      img.src = _avatarRev ? `/api/clawdbot/avatar.png?rev=${encodeURIComponent(_avatarRev)}` : '/api/clawdbot/avatar.png';
+      img.onload = () => { try{ img.style.display='block'; }catch(e){} try{ if (fb) fb.style.display='none'; }catch(e){} };
+      img.onerror = () => { try{ img.style.display='none'; }catch(e){} try{ if (fb) fb.style.display='flex'; }catch(e){} };
+    } catch(e){}
+  }
+
+  // The avatar generation modal ships inert in <template id="tplAvatarGenModal">. Until
+  // the first avatar click only the hero image is live (kept fresh by a small
+  // avatar_changed subscription); the click mounts the modal and binds its full UI.
   function bindAvatarGenUi(){
+    const btn = byId('agentAvatarBtn');
+    if (!btn) return;
+    if (document.getElementById('avatarGenModal')) { bindAvatarGenModalUi(); return; }
+    loadActiveAvatar();
+    if (!window.__clawdbotAvatarSub && !window.__clawdbotAvatarLiteSub) {
+      window.__clawdbotAvatarLiteSub = getHass()
+        .then(({conn}) => (conn && conn.subscribeEvents) ? conn.subscribeEvents((ev) => loadActiveAvatar(ev && ev.data && ev.data.active_updated_ts), 'clawdbot_avatar_changed') : null)
+        .catch(() => null);
+    }
+    btn.onclick = () => {
+      const lite = window.__clawdbotAvatarLiteSub;
+      window.__clawdbotAvatarLiteSub = null;
+      if (lite) lite.then((unsub) => { try{ if (typeof unsub === 'function') unsub(); }catch(e){} });
+      document.body.appendChild(cloneTpl('tplAvatarGenModal'));
+      bindAvatarGenModalUi();
+      if (btn.onclick) btn.onclick();
+    };
+  }
+
+  function bindAvatarGenModalUi(){
     const btn = document.getElementById('agentAvatarBtn');
     const modal = document.getElementById('avatarGenModal');
     const ta = document.getElementById('avatarGenText');
@@ -1896,8 +2298,6 @@ window.__clawdbotPanelInitError = null;
     const prevImg = document.getElementById('avatarGenPreviewImg');
     const prevStatus = document.getElementById('avatarGenPreviewStatus');
     const useBtn = document.getElementById('avatarGenUse');
-    const img = document.getElementById('agentAvatarImg');
-    const fb = document.getElementById('agentAvatarFallback');
     if (!btn || !modal || !ta || !closeBtn || !surpriseBtn || !genBtn) return;
 
     const debugOn = (() => { try{ return !!(new URLSearchParams(window.location.search||'').get('debug')==='1'); }catch(e){ return false; } })();
@@ -2034,14 +2434,7 @@ window.__clawdbotPanelInitError = null;
         toast('Canceled');
       };
     }
-    const setAvatarPreview = () => {
-      try{
-        if (!img) return;
-        img.src = `/api/clawdbot/avatar.png?ts=${Date.now()}`;
-        img.onload = () => { try{ img.style.display='block'; }catch(e){} try{ if (fb) fb.style.display='none'; }catch(e){} };
-        img.onerror = () => { try{ img.style.display='none'; }catch(e){} try{ if (fb) fb.style.display='flex'; }catch(e){} };
-      } catch(e){}
-    };
+    const setAvatarPreview = loadActiveAvatar;
 
     // Listen for HA event when Agent0 pushes generated avatar to HA
     try{
@@ -2072,7 +2465,7 @@ window.__clawdbotPanelInitError = null;
                   }
 
                   // Always refresh active avatar image (for when user hits "Use this" / apply)
-                  setAvatarPreview();
+                  setAvatarPreview(d && d.active_updated_ts);
 
                   // Only show success wording when active avatar is updated (apply flow will also set its own hint)
                   if (d && d.active_updated_ts) {
@@ -2328,7 +2721,7 @@ window.__clawdbotPanelInitError = null;
             const sr = (rr && rr.result && rr.result.service_response) ? rr.result.service_response : null;
             if (sr && sr.ok) {
               toast('Applied ✅');
-              try{ setAvatarPreview(); }catch(e){}
+              try{ setAvatarPreview(sr.active_updated_ts); }catch(e){}
               forceCloseModal();
             } else {
               const err = sr && (sr.error || sr.message) ? String(sr.error || sr.message) : '';
@@ -2441,12 +2834,10 @@ window.__clawdbotPanelInitError = null;
 
   function bindSpeechUi(){
     const btn = document.getElementById('btnListen');
-    const btnStop = document.getElementById('btnStopListen');
     const statusEl = document.getElementById('listenStatus');
-    const statusElOld = document.getElementById('listenStatusOld');
     const outEl = document.getElementById('transcript');
     if (!btn || !outEl) return;
-    try{ if (statusEl) statusEl.style.display = 'none'; if (statusElOld) statusElOld.style.display = 'none'; }catch(e){}
+    try{ if (statusEl) statusEl.style.display = 'none'; }catch(e){}
 
     let _lastSpeechText = '';
     let _sttClearTimer = null;
@@ -2460,9 +2851,6 @@ window.__clawdbotPanelInitError = null;
       }, ms);
     };
 
-    // Hide stop button (single-toggle UX)
-    try{ if (btnStop) btnStop.style.display = 'none'; }catch(e){}
-
     const setCaption = (txt, kind='ok') => {
       const t = String(txt || '').trim();
       const paint = (el) => {
@@ -2476,11 +2864,7 @@ window.__clawdbotPanelInitError = null;
         el.style.display = '';
         el.style.color = (kind === 'bad') ? '#ff6b6b' : (kind === 'warn' ? '#ffb703' : 'var(--secondary-text-color)');
       };
-      try{ paint(statusEl); paint(statusElOld); } catch(e){}
-      try{
-        const btnOld = document.getElementById('btnListenOld');
-        if (btnOld) btnOld.textContent = btn.textContent || 'Listen';
-      } catch(e){}
+      try{ paint(statusEl); } catch(e){}
     };
 
     const setLine = (txt) => {
@@ -2548,7 +2932,6 @@ window.__clawdbotPanelInitError = null;
             if (_speechActive) {
               _speechActive = false;
               btn.textContent = 'Listen';
-              try{ if (statusElOld) statusElOld.textContent = ''; }catch(e){}
               setCaption('idle');
               sttReleaseMic();
               vizReleaseMic();
@@ -2558,7 +2941,6 @@ window.__clawdbotPanelInitError = null;
             }
             _speechActive = true;
             btn.textContent = 'Listening…';
-            try{ if (statusElOld) statusElOld.textContent = 'Listening…'; }catch(e){}
             setCaption('listening');
 
             // Record a short chunk and send to HA
@@ -2694,18 +3076,6 @@ window.__clawdbotPanelInitError = null;
         }
       };
     }
-
-    // Keep legacy/mobile listen button in sync with main header listen control.
-    try{
-      const btnOld = document.getElementById('btnListenOld');
-      if (btnOld) {
-        btnOld.textContent = btn.textContent || 'Listen';
-        if (!btnOld.__boundMirror) {
-          btnOld.__boundMirror = true;
-          btnOld.onclick = () => { try{ btn.click(); } catch(e){} };
-        }
-      }
-    } catch(e){}
   }
 
   // Release mic if user leaves/locks page
@@ -2714,10 +3084,13 @@ window.__clawdbotPanelInitError = null;
     document.addEventListener('visibilitychange', () => {
       try{
         if (document.hidden) {
+          invalidateHass();
           sttReleaseMic();
           vizReleaseMic();
           _speechActive = false;
           if (_speechRec) { try{ _speechRec.stop(); }catch(e){} }
+        } else if (chatPollingActive) {
+          scheduleChatPoll(CHAT_POLL_INITIAL_MS);
         }
       } catch(e){}
     });
@@ -2731,16 +3104,15 @@ window.__clawdbotPanelInitError = null;
   }
 
   function bindEntityConfigUi(){
-    // Select buttons
-    for (const btn of document.querySelectorAll('button[data-pick]')){
-      btn.onclick = () => openPicker(btn.getAttribute('data-pick'));
-    }
-    for (const btn of document.querySelectorAll('button[data-clear]')){
-      btn.onclick = async () => {
-        const key = btn.getAttribute('data-clear');
-        try{ await setMappingField(key, null); } catch(e){}
-      };
-    }
+    // Select / Clear buttons: one delegated listener for every mapping row.
+    const cfgRoot = byId('entityConfig');
+    if (cfgRoot) cfgRoot.onclick = async (e) => {
+      const btn = e.target && e.target.closest ? e.target.closest('button[data-pick],button[data-clear]') : null;
+      if (!btn || !cfgRoot.contains(btn)) return;
+      const pick = btn.getAttribute('data-pick');
+      if (pick) { openPicker(pick); return; }
+      try{ await setMappingField(btn.getAttribute('data-clear'), null); } catch(e){}
+    };
 
     const confirmAll = document.getElementById('btnConfirmAll');
     if (confirmAll) confirmAll.onclick = async () => {
@@ -2807,36 +3179,35 @@ window.__clawdbotPanelInitError = null;
     const modal = document.getElementById('pickerModal');
     if (modal) modal.onclick = (e) => { if (e.target === modal) closePicker(); };
     const search = document.getElementById('pickerSearch');
-    if (search) search.oninput = () => renderPickerList(search.value || '');
+    if (search) search.oninput = () => scheduleRender('picker', () => renderPickerList(search.value || ''));
+    // "Use" buttons: one delegated listener instead of one per rendered row.
+    const list = byId('pickerList');
+    if (list) list.onclick = async (ev) => {
+      const btn = ev.target && ev.target.closest ? ev.target.closest('button[data-use]') : null;
+      if (!btn) return;
+      ev.preventDefault(); ev.stopPropagation();
+      const field = _pickerField;
+      if (!field) return;
+      try{ await setMappingField(field, btn.getAttribute('data-use')); } catch(e){}
+      closePicker();
+    };
   }
 
+  const PICKER_RULES = compileRuleSet({
+    soc: { label:'Battery SOC (%)', keywords:['soc','state_of_charge','battery_soc','clawdbot_test_battery_soc'], units:['%'], weak:['battery'] },
+    voltage: { label:'Battery Voltage (V)', keywords:['voltage','battery_voltage','batt_v','clawdbot_test_battery_voltage'], units:['v'], weak:['battery'] },
+    solar: { label:'Solar Power (W)', keywords:['solar','pv','photovoltaic','panel','clawdbot_test_solar_w'], units:['w'], weak:['power','input'] },
+    load: { label:'Load Power (W)', keywords:['load','consumption','house_power','ac_load','power','clawdbot_test_load_w'], units:['w'], weak:['total','sum'] },
+  });
+
   function pickerRules(field){
-    const rules={
-      soc: { label:'Battery SOC (%)', keywords:['soc','state_of_charge','battery_soc','clawdbot_test_battery_soc'], units:['%'], weak:['battery'] },
-      voltage: { label:'Battery Voltage (V)', keywords:['voltage','battery_voltage','batt_v','clawdbot_test_battery_voltage'], units:['v'], weak:['battery'] },
-      solar: { label:'Solar Power (W)', keywords:['solar','pv','photovoltaic','panel','clawdbot_test_solar_w'], units:['w'], weak:['power','input'] },
-      load: { label:'Load Power (W)', keywords:['load','consumption','house_power','ac_load','power','clawdbot_test_load_w'], units:['w'], weak:['total','sum'] },
-    };
-    return rules[field] || rules.soc;
+    return PICKER_RULES[field] || PICKER_RULES.soc;
   }
 
   function bestCandidate(field, hass){
-    const rules = pickerRules(field);
-    const states = hass && hass.states ? hass.states : {};
-    let best = null;
-    let bestScore = -999;
-    for (const [entity_id, st] of Object.entries(states)){
-      const meta={
-        entity_id,
-        name: (st && st.attributes && (st.attributes.friendly_name || st.attributes.device_class || '')) || '',
-        unit: (st && st.attributes && st.attributes.unit_of_measurement) || '',
-        state: st ? st.state : '',
-      };
-      const s = scoreEntity(meta, rules);
-      if (s > bestScore) { bestScore = s; best = meta; best.score = s; }
-    }
-    if (!best || bestScore <= 0) return null;
-    return best;
+    // Highest positive score, earliest id on ties: the same as a top-1 candidate.
+    const top = topCandidates(hass, pickerRules(field), 1);
+    return top.length ? top[0] : null;
   }
 
   function computeAutoFill(hass){
@@ -2851,77 +3222,113 @@ window.__clawdbotPanelInitError = null;
     return out;
   }
 
+  // Picker search: substring matches on entity ids come from a worker holding a trigram
+  // index (/clawdbot-picker-worker.js); without workers the same scan runs inline. Only
+  // the matches are scored, against the cached statesIndex columns.
+  let _pickerWorker = null;   // null: not started yet; false: unavailable
+  let _pickerIndexed = null;  // lids array the worker currently indexes
+  let _pickerSeq = 0;
+  let _pickerRenderSeq = 0;
+  const _pickerWaits = new Map();
+
+  function pickerWorker(){
+    if (_pickerWorker === null) {
+      try{
+        const cfg = (window.__CLAWDBOT_CONFIG__ || {});
+        const w = new Worker('/clawdbot-picker-worker.js?v=' + encodeURIComponent(cfg.asset_version || ''));
+        w.onmessage = (ev) => {
+          const m = ev.data || {};
+          const done = _pickerWaits.get(m.seq);
+          if (done) { _pickerWaits.delete(m.seq); done(m.idx); }
+        };
+        w.onerror = () => {
+          _pickerWorker = false;
+          for (const done of _pickerWaits.values()) done(null);
+          _pickerWaits.clear();
+        };
+        _pickerWorker = w;
+      } catch(e){
+        _pickerWorker = false;
+      }
+    }
+    return _pickerWorker || null;
+  }
+
+  function pickerMatchesInline(lids, q){
+    const out = [];
+    for (let i=0;i<lids.length;i++) if (lids[i].includes(q)) out.push(i);
+    return out;
+  }
+
+  // Resolves to ascending indexes into c.lids whose id contains q.
+  function pickerMatches(c, q){
+    const w = pickerWorker();
+    if (!w) return Promise.resolve(pickerMatchesInline(c.lids, q));
+    if (_pickerIndexed !== c.lids) {
+      w.postMessage({ type: 'index', ids: c.lids });
+      _pickerIndexed = c.lids;
+    }
+    const seq = ++_pickerSeq;
+    return new Promise((resolve) => {
+      _pickerWaits.set(seq, (idx) => resolve(idx || pickerMatchesInline(c.lids, q)));
+      w.postMessage({ type: 'query', seq, q });
+    });
+  }
+
   function renderPickerList(query){
-    const listEl = document.getElementById('pickerList');
+    const listEl = byId('pickerList');
     if (!listEl) return;
-    listEl.innerHTML = '';
     const field = _pickerField;
-    if (!field) return;
+    if (!field) { listEl.innerHTML = ''; return; }
 
     // Use latest hydrated hass if present
     const hass = window.__clawdbotHass || null;
-    const states = hass && hass.states ? hass.states : {};
+    const c = statesIndex(hass && hass.states);
     const q = String(query||'').trim().toLowerCase();
-    const rules = pickerRules(field);
-
-    // Candidate pool: _allIds limited and filtered by query (if any)
-    let ids = _allIds || [];
-    if (q) ids = ids.filter(id => id.toLowerCase().includes(q));
+    const seq = ++_pickerRenderSeq;
+    const draw = (idx) => {
+      // A newer keystroke or a closed/retargeted picker supersedes this result.
+      if (seq !== _pickerRenderSeq || field !== _pickerField) return;
+      drawPickerList(listEl, field, c, idx);
+    };
+    if (q) pickerMatches(c, q).then(draw);
+    else draw(null);
+  }
 
-    // Score and take top 50
-    const scored=[];
-    for (const id of ids){
-      const st = states[id];
-      const meta={
-        entity_id: id,
-        name: (st && st.attributes && (st.attributes.friendly_name||'')) || '',
-        unit: (st && st.attributes && st.attributes.unit_of_measurement) || '',
-        state: st ? st.state : '',
-      };
-      const s = scoreEntity(meta, rules) + (q ? 0 : 0); // base
-      if (q && !s) {
-        // still allow direct matches
-        scored.push({score: 0, ...meta});
-      } else {
-        scored.push({score: s, ...meta});
-      }
+  // idx: candidate indexes into the statesIndex columns, or null for every entity.
+  function drawPickerList(listEl, field, c, idx){
+    const rules = pickerRules(field);
+    const { lids, lnames, lunits, masks } = c;
+
+    // Score and take top 50 (ties keep id order)
+    const n = idx ? idx.length : lids.length;
+    const scored = new Array(n);
+    for (let k=0;k<n;k++){
+      const i = idx ? idx[k] : k;
+      scored[k] = { score: scoreLower(lids[i], lnames[i], lunits[i], rules, masks[i]), i };
     }
-    scored.sort((a,b)=>b.score-a.score);
+    scored.sort((a,b)=>(b.score-a.score) || (a.i-b.i));
     const top = scored.slice(0, 50);
 
-    for (const it of top){
-      const row = document.createElement('div');
-      row.className = 'pick-item';
-      const main = document.createElement('div');
-      main.className = 'pick-main';
-      const name = document.createElement('div');
-      name.className = 'pick-name';
-      const fname = it.name ? String(it.name) : it.entity_id;
-      name.textContent = fname;
-      const meta = document.createElement('div');
-      meta.className = 'pick-meta';
-      const unit = it.unit ? (' '+it.unit) : '';
-      meta.textContent = `${it.entity_id} · ${it.state}${unit}`;
-      main.appendChild(name); main.appendChild(meta);
-      const btn = document.createElement('button');
-      btn.className = 'btn primary';
-      btn.textContent = 'Use';
-      btn.onclick = async (ev) => {
-        ev.preventDefault(); ev.stopPropagation();
-        try{ await setMappingField(field, it.entity_id); } catch(e){}
-        closePicker();
-      };
-      row.appendChild(main);
-      row.appendChild(btn);
-      listEl.appendChild(row);
+    const frag = document.createDocumentFragment();
+    for (const { i } of top){
+      const entityId = c.ids[i];
+      const row = cloneTpl('tplPickerRow').firstElementChild;
+      const main = row.firstElementChild;
+      main.firstElementChild.textContent = c.names[i] ? String(c.names[i]) : entityId;
+      const unit = c.units[i] ? (' '+c.units[i]) : '';
+      main.lastElementChild.textContent = `${entityId} · ${c.rawStates[i]}${unit}`;
+      row.lastElementChild.setAttribute('data-use', entityId);
+      frag.appendChild(row);
     }
 
     if (!top.length){
       const empty = document.createElement('div');
       empty.className = 'muted';
       empty.textContent = 'No matches.';
-      listEl.appendChild(empty);
+      frag.appendChild(empty);
     }
+    listEl.replaceChildren(frag);
   }
 
   function setConfigMapping(next){
@@ -2968,7 +3375,7 @@ window.__clawdbotPanelInitError = null;
       setConfigMapping(mapping);
       fillMappingInputs();
       if (resultEl) resultEl.textContent = value ? 'saved' : 'cleared';
-      try{ const { hass } = await getHass(); renderMappedValues(hass); renderRecommendations(hass); } catch(e){}
+      try{ const { hass } = await getHass(); scheduleRender('mapped', () => renderMappedValues(hass)); scheduleRender('recs', () => renderRecommendations(hass)); } catch(e){}
     } catch(e){
       if (resultEl) resultEl.textContent = 'error: ' + String(e);
     }
@@ -2977,8 +3384,194 @@ window.__clawdbotPanelInitError = null;
 
 
 
+  // weather.get_forecasts result, one entry per weather entity, refreshed at most every 5 min.
+  const WEATHER_FORECAST_TTL_MS = 5 * 60 * 1000;
+  let _weatherCache = { id:null, at:0, entry:null, pending:null };
+
+  async function fetchWeatherForecast(weatherId){
+    const { conn } = await getHass();
+    if (!conn || typeof conn.sendMessagePromise !== 'function') return null;
+    for (const type of ['hourly', 'daily']){
+      try{
+        const r = await conn.sendMessagePromise({
+          type: 'call_service',
+          domain: 'weather',
+          service: 'get_forecasts',
+          service_data: { entity_id: weatherId, type },
+          return_response: true,
+        });
+        const resp = r && r.response ? r.response[weatherId] : null;
+        const fc = resp ? resp.forecast : null;
+        if (Array.isArray(fc) && fc.length) return fc[0] || null;
+      } catch(e){}
+    }
+    return null;
+  }
+
+  function weatherForecastEntry(weatherId, hass){
+    let c = _weatherCache;
+    if (c.id !== weatherId) c = _weatherCache = { id: weatherId, at:0, entry:null, pending:null };
+    if (!c.pending && (Date.now() - c.at) > WEATHER_FORECAST_TTL_MS) {
+      // Fire-and-forget; render with what we have and re-render once the entry lands.
+      c.pending = fetchWeatherForecast(weatherId)
+        .then((entry) => { c.entry = entry; })
+        .catch(() => {})
+        .finally(() => {
+          c.at = Date.now();
+          c.pending = null;
+          if (_weatherCache === c && c.entry) scheduleRender('recs', () => renderRecommendations(hass));
+        });
+    }
+    return c.entry;
+  }
+
+  // Numeric value of a HA state object. State objects are immutable per update, so the
+  // parse is memoized by identity and shared across the renders of one tick.
+  const _numCache = new WeakMap();
+  function toNumMemo(st){
+    if (!st || typeof st !== 'object') return null;
+    const hit = _numCache.get(st);
+    if (hit !== undefined) return hit;
+    const raw = st.state;
+    const n = (raw === null || raw === undefined) ? NaN : Number.parseFloat(String(raw));
+    const v = Number.isFinite(n) ? n : null;
+    _numCache.set(st, v);
+    return v;
+  }
+
+  const WEATHER_BAD_RE = /rain|pour|storm|snow|sleet|hail|cloud|fog/;
+  const WEATHER_GOOD_RE = /clear|sun|partly|fair/;
+
+  // rAF-coalesced rendering: one pending frame per key, the latest call wins.
+  const _renderQueue = new Map();
+
+  // Keys whose container lives in a single tab. While that tab is hidden the latest
+  // closure per key is parked instead of run, and flushed once when the tab is shown.
+  const RENDER_TAB = { entities: 'cockpit', entitiesWindow: 'cockpit', mapped: 'cockpit', recs: 'cockpit', house: 'cockpit', autoEvents: 'automations' };
+  const _parkedRenders = new Map();
+  let _activeTab = null;
+
+  function setActiveTab(tab){
+    _activeTab = tab;
+    for (const [key, fn] of _parkedRenders) {
+      if (RENDER_TAB[key] !== tab) continue;
+      _parkedRenders.delete(key);
+      scheduleRender(key, fn);
+    }
+  }
+
+  function scheduleRender(key, fn){
+    const tab = RENDER_TAB[key];
+    if (tab && tab !== _activeTab) { _parkedRenders.set(key, fn); return; }
+    const pending = _renderQueue.has(key);
+    _renderQueue.set(key, fn);
+    if (pending) return;
+    requestAnimationFrame(() => {
+      const f = _renderQueue.get(key);
+      _renderQueue.delete(key);
+      try{ f(); } catch(e){}
+    });
+  }
+
+  // True when a render's inputs match the previous call on this root (skip DOM work).
+  function renderUnchanged(root, states, key){
+    if (root._renderStates === states && root._renderKey === key) return true;
+    root._renderStates = states;
+    root._renderKey = key;
+    return false;
+  }
+
+  // Guarded readers for renderRecommendations: each try/catch lives in its own small
+  // function so the render body itself stays exception-free.
+  function powerToWatts(val, unit){
+    if (val === null) return null;
+    const u = (unit || '').toLowerCase();
+    if (u === 'kw' || u === 'kilowatt' || u === 'kilowatts') return val * 1000;
+    if (u === 'w' || u === 'watt' || u === 'watts') return val;
+    return val;
+  }
+
+  function readSocLoadSolar(hass, mapping){
+    let socPct = null;
+    let loadW = null;
+    let solarW = null;
+    try{
+      const socSt = hass && hass.states ? hass.states[mapping.soc] : null;
+      const loadSt = hass && hass.states ? hass.states[mapping.load] : null;
+      const solarSt = mapping.solar && hass && hass.states ? hass.states[mapping.solar] : null;
+      socPct = toNumMemo(socSt);
+      if (socPct !== null && socPct <= 1) socPct = socPct * 100;
+      socPct = socPct !== null ? Math.max(0, Math.min(100, socPct)) : null;
+      const loadUnit = loadSt && loadSt.attributes ? loadSt.attributes.unit_of_measurement : '';
+      loadW = powerToWatts(toNumMemo(loadSt), loadUnit);
+      const solarUnit = solarSt && solarSt.attributes ? solarSt.attributes.unit_of_measurement : '';
+      solarW = powerToWatts(toNumMemo(solarSt), solarUnit);
+    } catch(e){}
+    return { socPct, loadW, solarW };
+  }
+
+  // Forecast timestamp (best-effort): first entry from weather.get_forecasts (cached),
+  // falling back to the deprecated attrs.forecast[] on older integrations.
+  function readForecastAt(weatherId, hass, attrs){
+    try{
+      let first = weatherForecastEntry(weatherId, hass);
+      if (!first) {
+        const fc = attrs.forecast;
+        if (Array.isArray(fc) && fc.length) first = fc[0] || {};
+      }
+      if (first) return first.datetime || first.time || null;
+    } catch(e){}
+    return null;
+  }
+
+  function weatherRecommendation(hass){
+    try{
+      const weatherId = (hass && hass.states) ? (statesIndex(hass.states).byDomainFirst.weather || null) : null;
+      if (!weatherId) {
+        return {
+          title: 'Weather (preview)',
+          body: 'Not configured: add any Home Assistant weather integration (entity weather.*) to unlock cloud/rain-aware battery guidance.',
+          cta: { label: 'Configure weather', href: '/config/integrations' }
+        };
+      }
+      const st = hass.states[weatherId];
+      const attrs = (st && st.attributes) ? st.attributes : {};
+      const temp = (attrs.temperature ?? attrs.temp ?? null);
+      const tempUnit = (attrs.temperature_unit ?? '°');
+      const condition = st ? st.state : 'unknown';
+      const forecastAt = readForecastAt(weatherId, hass, attrs);
+
+      const cond = String(condition || '').toLowerCase();
+      const isBad = WEATHER_BAD_RE.test(cond);
+      const isGood = WEATHER_GOOD_RE.test(cond);
+      let hint = '';
+      if (isBad) hint = 'Expect reduced solar harvest; consider conserving load.';
+      else if (isGood) hint = 'Good solar window; consider charging/deferrable loads.';
+
+      let body = `Current: ${condition}`;
+      if (temp !== null && temp !== undefined) body += `, ${temp}${tempUnit}`;
+      if (forecastAt) body += `. Forecast @ ${forecastAt}`;
+      body += ` (${weatherId}).`;
+      if (hint) body += ` ${hint}`;
+      return { title: 'Weather (preview)', body, meta: weatherId };
+    } catch(e){
+      return null;
+    }
+  }
+
+  function socStatusItem(hass, mapping){
+    try{
+      if (mapping.soc && hass && hass.states && hass.states[mapping.soc]){
+        const st=hass.states[mapping.soc];
+        const unit=(st.attributes && st.attributes.unit_of_measurement) ? (' '+st.attributes.unit_of_measurement) : '';
+        return {title:'Current battery SOC', body: `${st.state}${unit} (${mapping.soc})`};
+      }
+    } catch(e){}
+    return null;
+  }
+
   function renderRecommendations(hass){
-    const el = document.getElementById('recs');
+    const el = byId('recs');
     if (!el) return;
     const cfg = (window.__CLAWDBOT_CONFIG__ || {});
     const mem = cfg.house_memory || {};
@@ -2986,36 +3579,9 @@ window.__clawdbotPanelInitError = null;
 
     const items=[];
 
-    const toNumber = (val) => {
-      if (val === null || val === undefined) return null;
-      const n = Number.parseFloat(String(val));
-      return Number.isFinite(n) ? n : null;
-    };
-    const powerToWatts = (val, unit) => {
-      if (val === null) return null;
-      const u = (unit || '').toLowerCase();
-      if (u === 'kw' || u === 'kilowatt' || u === 'kilowatts') return val * 1000;
-      if (u === 'w' || u === 'watt' || u === 'watts') return val;
-      return val;
-    };
-
     // Estimate hours remaining (v0)
     if (mapping.soc && mapping.load) {
-      let socPct = null;
-      let loadW = null;
-      let solarW = null;
-      try{
-        const socSt = hass && hass.states ? hass.states[mapping.soc] : null;
-        const loadSt = hass && hass.states ? hass.states[mapping.load] : null;
-        const solarSt = mapping.solar && hass && hass.states ? hass.states[mapping.solar] : null;
-        socPct = toNumber(socSt ? socSt.state : null);
-        if (socPct !== null && socPct <= 1) socPct = socPct * 100;
-        socPct = socPct !== null ? Math.max(0, Math.min(100, socPct)) : null;
-        const loadUnit = loadSt && loadSt.attributes ? loadSt.attributes.unit_of_measurement : '';
-        loadW = powerToWatts(toNumber(loadSt ? loadSt.state : null), loadUnit);
-        const solarUnit = solarSt && solarSt.attributes ? solarSt.attributes.unit_of_measurement : '';
-        solarW = powerToWatts(toNumber(solarSt ? solarSt.state : null), solarUnit);
-      } catch(e){}
+      const { socPct, loadW, solarW } = readSocLoadSolar(hass, mapping);
 
       let capacityKwh = null;
       if (mem.battery && typeof mem.battery.capacity_kwh === 'number') {
@@ -3040,17 +3606,13 @@ window.__clawdbotPanelInitError = null;
         body = 'Cannot estimate yet: load is 0 or negative.';
       } else {
         // Give a clearer reason if entities are mapped but not numeric.
-        try{
+        // keep raw values behind a debug flag (user-facing UI should stay clean)
+        const DEBUG = false;
+        if (DEBUG) {
           const socSt = hass && hass.states ? hass.states[mapping.soc] : null;
           const loadSt = hass && hass.states ? hass.states[mapping.load] : null;
-          // keep raw values behind a debug flag (user-facing UI should stay clean)
-          const DEBUG = false;
-          if (DEBUG) {
-            const socRaw = socSt ? socSt.state : null;
-            const loadRaw = loadSt ? loadSt.state : null;
-            body += ` (soc=${socRaw}, load=${loadRaw})`;
-          }
-        } catch(e){}
+          body += ` (soc=${socSt ? socSt.state : null}, load=${loadSt ? loadSt.state : null})`;
+        }
       }
       if (usedPlaceholder) {
         body += ' Assuming 10 kWh battery capacity (placeholder).';
@@ -3089,78 +3651,25 @@ window.__clawdbotPanelInitError = null;
     }
 
     // Weather-based preview (v0, informational only)
-    try{
-      let weatherId = null;
-      if (hass && hass.states) {
-        for (const id of Object.keys(hass.states)) {
-          if (id.startsWith('weather.')) { weatherId = id; break; }
-        }
-      }
-      if (!weatherId) {
-        items.push({
-          title: 'Weather (preview)',
-          body: 'Not configured: add any Home Assistant weather integration (entity weather.*) to unlock cloud/rain-aware battery guidance.',
-          cta: { label: 'Configure weather', href: '/config/integrations' }
-        });
-      } else {
-        const st = hass.states[weatherId];
-        const attrs = (st && st.attributes) ? st.attributes : {};
-        const temp = (attrs.temperature ?? attrs.temp ?? null);
-        const tempUnit = (attrs.temperature_unit ?? '°');
-        const condition = st ? st.state : 'unknown';
-
-        // Forecast timestamp (best-effort): HA weather integrations typically expose attrs.forecast[]
-        // with a datetime field (datetime/time).
-        let forecastAt = null;
-        try{
-          const fc = attrs.forecast;
-          if (Array.isArray(fc) && fc.length){
-            const first = fc[0] || {};
-            forecastAt = first.datetime || first.time || null;
-          }
-        } catch(e){}
-
-        const cond = String(condition || '').toLowerCase();
-        const isBad = (cond.includes('rain') || cond.includes('pour') || cond.includes('storm') || cond.includes('snow') || cond.includes('sleet') || cond.includes('hail') || cond.includes('cloud') || cond.includes('fog'));
-        const isGood = (cond.includes('clear') || cond.includes('sun') || cond.includes('partly') || cond.includes('fair'));
-        let hint = '';
-        if (isBad) hint = 'Expect reduced solar harvest; consider conserving load.';
-        else if (isGood) hint = 'Good solar window; consider charging/deferrable loads.';
-
-        let body = `Current: ${condition}`;
-        if (temp !== null && temp !== undefined) body += `, ${temp}${tempUnit}`;
-        if (forecastAt) body += `. Forecast @ ${forecastAt}`;
-        body += ` (${weatherId}).`;
-        if (hint) body += ` ${hint}`;
-        items.push({ title: 'Weather (preview)', body, meta: weatherId });
-      }
-    } catch(e){}
+    const weatherItem = weatherRecommendation(hass);
+    if (weatherItem) items.push(weatherItem);
 
     // If SOC mapped, show quick status line
-    try{
-      if (mapping.soc && hass && hass.states && hass.states[mapping.soc]){
-        const st=hass.states[mapping.soc];
-        const unit=(st.attributes && st.attributes.unit_of_measurement) ? (' '+st.attributes.unit_of_measurement) : '';
-        items.push({title:'Current battery SOC', body: `${st.state}${unit} (${mapping.soc})`});
-      }
-    } catch(e){}
+    const socItem = socStatusItem(hass, mapping);
+    if (socItem) items.push(socItem);
 
     if (!items.length) {
       items.push({title:'No recommendations yet', body:'Add mappings (SOC/solar/load) to unlock insights.'});
     }
 
-    el.innerHTML = '';
+    let html = '';
     for (const it of items){
-      const d=document.createElement('div');
-      d.style.border='1px solid #f1f5f9';
-      d.style.borderRadius='10px';
-      d.style.padding='10px 12px';
-      d.style.margin='8px 0';
-      const meta = it.meta ? `<div class="muted" style="margin-top:4px">${it.meta}</div>` : '';
+      const meta = it.meta ? `<div class="muted">${it.meta}</div>` : '';
       const cta = it.cta ? `<div style="margin-top:8px"><a class="btn" href="${it.cta.href}" target="_parent">${it.cta.label}</a></div>` : '';
-      d.innerHTML = `<div style="font-weight:600">${it.title}</div><div class="muted" style="margin-top:4px">${it.body}</div>${meta}${cta}`;
-      el.appendChild(d);
+      html += `<div class="recs-card"><div style="font-weight:600">${it.title}</div><div class="muted">${it.body}</div>${meta}${cta}</div>`;
     }
+    if (renderUnchanged(el, null, html)) return;
+    el.innerHTML = html;
   }
 
   async function refreshSuggestedSensors(){
@@ -3192,6 +3701,7 @@ window.__clawdbotPanelInitError = null;
         return;
       }
 
+      const frag = document.createDocumentFragment();
       for (const s of suggestions){
         const pv = s && s.preview ? s.preview : null;
         const attrs = pv && pv.attributes ? pv.attributes : {};
@@ -3239,15 +3749,16 @@ window.__clawdbotPanelInitError = null;
           };
         }
 
-        listEl.appendChild(row);
+        frag.appendChild(row);
       }
+      listEl.appendChild(frag);
     } catch(e){
       listEl.innerHTML = '<div class="muted">Error loading suggestions: ' + escapeHtml(String(e)) + '</div>';
     }
   }
 
   function renderHouseMemory(){
-    const el = document.getElementById('houseMemory');
+    const el = byId('houseMemory');
     if (!el) return;
     const cfg = (window.__CLAWDBOT_CONFIG__ || {});
     const mem = cfg.house_memory || {};
@@ -3259,23 +3770,19 @@ window.__clawdbotPanelInitError = null;
       ['Generator', mem.generator],
     ];
 
-    el.innerHTML = '';
-    const ul = document.createElement('ul');
-    ul.style.margin = '0';
-    ul.style.paddingLeft = '18px';
+    let html = '<ul style="margin:0;padding-left:18px">';
     for (const [label, obj] of rows){
       const present = obj && obj.present;
       const conf = obj && (obj.confidence ?? 0);
-      const li = document.createElement('li');
-      li.innerHTML = `<b>${label}:</b> ${present ? 'present' : 'not detected'} <span class=\"muted\">(confidence ${Math.round((conf||0)*100)}%}</span>`;
-      ul.appendChild(li);
+      html += `<li><b>${label}:</b> ${present ? 'present' : 'not detected'} <span class=\"muted\">(confidence ${Math.round((conf||0)*100)}%}</span></li>`;
     }
-    el.appendChild(ul);
+    html += '</ul>';
+    if (renderUnchanged(el, null, html)) return;
+    el.innerHTML = html;
   }
   function renderMappedValues(hass){
-    const root = qs('#mappedValues');
+    const root = byId('mappedValues');
     if (!root) return;
-    root.innerHTML='';
 
     const m = getMapping();
     try{ if (DEBUG_UI) console.debug('[clawdbot] renderMappedValues mapping', m); } catch(e){}
@@ -3287,12 +3794,17 @@ window.__clawdbotPanelInitError = null;
       { key:'load', label:'Load Power', unitLabel:'(W)', entity_id: m.load, hint:'power' },
     ];
 
-    const toNum = (x)=>{ const n=Number.parseFloat(String(x)); return Number.isFinite(n)?n:null; };
-
+    // Keyed by mapping slot: a row is rebuilt only when its entity_id|state|last_changed
+    // hash moves; other rows (and the map-now buttons in them) are left in place.
+    let rowMap = root._mappedRows;
+    if (!rowMap) { root.textContent = ''; rowMap = root._mappedRows = new Map(); }
+    let cursor = root.firstElementChild;
     for (const r of rows){
-      const d=document.createElement('div');
       const st = r.entity_id && hass && hass.states ? hass.states[r.entity_id] : null;
       let unit = st && st.attributes ? (st.attributes.unit_of_measurement || '') : '';
+      const h = st ? `${r.entity_id}|${st.state}|${st.last_changed || ''}|${unit}` : `${r.entity_id || ''}|`;
+      let row = rowMap.get(r.key);
+      if (row && row.dataset.h === h) { cursor = row.nextElementSibling; continue; }
       let valText = '—';
       let subText = '';
       let subTitle = '';
@@ -3312,7 +3824,7 @@ window.__clawdbotPanelInitError = null;
           } catch(e){}
         } else {
           let raw = st.state;
-          const n = toNum(raw);
+          const n = toNumMemo(st);
           if (r.key === 'soc' && n !== null) {
             let pct = n;
             if (pct <= 1) pct = pct * 100;
@@ -3335,17 +3847,20 @@ window.__clawdbotPanelInitError = null;
       const keyLabel = ({soc:'SOC', voltage:'voltage', solar:'solar', load:'load'}[r.key] || r.key);
       const mapNow = (!r.entity_id) ? `<button class="btn" data-mapnow="${r.key}" style="margin-top:10px">Map ${keyLabel}</button>` : '';
       const valueClass = (valText === 'Not available') ? 'muted' : '';
-      d.innerHTML = `<div class="muted">${r.label} <span class="muted">${r.unitLabel || ''}</span></div><div style="margin-top:2px" class="${valueClass}" title="${subTitle}"><b>${valText}</b></div><div class="muted" style="margin-top:4px" title="${subTitle}">${subText}</div>${mapNow}`;
-      root.appendChild(d);
+      _rowTpl.innerHTML = `<div><div class="muted">${r.label} <span class="muted">${r.unitLabel || ''}</span></div><div style="margin-top:2px" class="${valueClass}" title="${subTitle}"><b>${escapeHtml(valText)}</b></div><div class="muted" style="margin-top:4px" title="${subTitle}">${subText}</div>${mapNow}</div>`;
+      const next = _rowTpl.content.firstElementChild;
+      next.dataset.h = h;
+      if (row && row.parentNode === root) { root.replaceChild(next, row); }
+      else { root.insertBefore(next, cursor); }
+      rowMap.set(r.key, next);
+      cursor = next.nextElementSibling;
     }
+    // map-now buttons are handled by onMappedValuesClick (delegated on the root).
+  }
 
-    // wire map-now shortcuts
-    for (const btn of root.querySelectorAll('button[data-mapnow]')){
-      btn.onclick = () => {
-        const key = btn.getAttribute('data-mapnow');
-        mapNowShortcut(key);
-      };
-    }
+  function onMappedValuesClick(e){
+    const btn = e.target && e.target.closest ? e.target.closest('button[data-mapnow]') : null;
+    if (btn) mapNowShortcut(btn.getAttribute('data-mapnow'));
   }
 
   function mapNowShortcut(key){
@@ -3372,7 +3887,58 @@ window.__clawdbotPanelInitError = null;
       if (sugg){ sugg.scrollIntoView({behavior:'smooth', block:'start'}); }
     } catch(e){}
   }
+  // HA frontend root elements in the parent document; cached once fully resolved and
+  // re-queried when the cached nodes are detached (frontend reload) or on invalidation.
+  let _hassRoots = null;
+  function hassRoots(doc){
+    const r = _hassRoots;
+    if (r && r.doc === doc && r.ha.isConnected && r.main.isConnected) return r;
+    const q = (sel) => (doc && doc.querySelector ? doc.querySelector(sel) : null);
+    const ha = q('home-assistant');
+    const main = ha && ha.shadowRoot && ha.shadowRoot.querySelector ? ha.shadowRoot.querySelector('home-assistant-main') : null;
+    const out = { doc, ha, main, docMain: q('home-assistant-main'), hcMain: q('hc-main') };
+    _hassRoots = (ha && main) ? out : null;
+    return out;
+  }
+
+  function invalidateHassRoots(){ _hassRoots = null; }
+
+  // Race a promise against a timer that is cleared as soon as the promise settles.
+  function withTimeout(p, ms, msg){
+    let t = null;
+    return Promise.race([
+      Promise.resolve(p).finally(() => clearTimeout(t)),
+      new Promise((_, rej) => { t = setTimeout(() => rej(new Error(msg || ('timeout after ' + ms + 'ms'))), ms); }),
+    ]);
+  }
+
+  // Last successful discovery: the conn plus a reader for the *current* hass object
+  // (the HA frontend swaps hass on every state change, so the object itself is not cached).
+  let _hassResolved = null;
+  function rememberHass(conn, read){
+    _hassResolved = { conn, read };
+    return { conn, hass: read() };
+  }
+
+  function invalidateHass(){ _hassResolved = null; invalidateHassRoots(); }
+
+  // Concurrent callers during discovery share one search.
+  let _hassPending = null;
+
   async function getHass(){
+    if (_hassResolved) {
+      try{
+        const hass = _hassResolved.read();
+        if (hass && hass.states) return { conn: _hassResolved.conn, hass };
+      } catch(e){}
+      _hassResolved = null;
+    }
+    if (!_hassPending) _hassPending = discoverHass().finally(() => { _hassPending = null; });
+    return _hassPending;
+  }
+
+  async function discoverHass(){
+
     const parent = window.parent;
     if (!parent) throw new Error('No parent window');
 
@@ -3384,11 +3950,7 @@ window.__clawdbotPanelInitError = null;
     // Path 1: legacy global hassConnection promise (add timeout; some builds keep it pending)
     try{
       if (parent.hassConnection && parent.hassConnection.then) {
-        const timeoutMs = 1500;
-        const hc = await Promise.race([
-          parent.hassConnection,
-          new Promise((_, rej) => setTimeout(() => rej(new Error('hassConnection timeout')), timeoutMs)),
-        ]);
+        const hc = await withTimeout(parent.hassConnection, 1500, 'hassConnection timeout');
         if (hc && hc.conn) {
           // IMPORTANT: some HA builds resolve hassConnection with {conn} but without {hass}.
           // Do not return early in that case; keep the conn and continue searching for hass.
@@ -3398,7 +3960,7 @@ window.__clawdbotPanelInitError = null;
           }
           if (hass && hass.states) {
             try{ if (DEBUG_UI) console.debug('[clawdbot] getHass via hassConnection', true); }catch(e){}
-            return { conn: hc.conn, hass };
+            return rememberHass(hc.conn, () => (parent.hass && parent.hass.states) ? parent.hass : (hc.hass || hass));
           }
           // Stash the conn and keep looking for hass via other paths.
           parent.__clawdbotConn = hc.conn;
@@ -3410,7 +3972,7 @@ window.__clawdbotPanelInitError = null;
     try{
       if (parent.hass && parent.hass.connection) {
         try{ if (DEBUG_UI) console.debug('[clawdbot] getHass via parent.hass', !!(parent.hass && parent.hass.states)); }catch(e){};
-        return { conn: parent.hass.connection, hass: parent.hass };
+        return rememberHass(parent.hass.connection, () => parent.hass);
       }
     } catch(e) {}
 
@@ -3418,47 +3980,37 @@ window.__clawdbotPanelInitError = null;
     try{
       const fallbackConn = parent.__clawdbotConn || null;
       if (fallbackConn) {
-        const doc = parent.document;
-        const ha = doc && doc.querySelector ? doc.querySelector('home-assistant') : null;
-        const main = ha && ha.shadowRoot && ha.shadowRoot.querySelector ? ha.shadowRoot.querySelector('home-assistant-main') : null;
+        const { ha, main } = hassRoots(parent.document);
         const hass = (main && (main.hass || main._hass)) || (ha && (ha.hass || ha._hass)) || null;
-        if (hass && hass.states) return { conn: fallbackConn, hass };
+        if (hass && hass.states) return rememberHass(fallbackConn, () => (main && (main.hass || main._hass)) || (ha && (ha.hass || ha._hass)) || null);
       }
     } catch(e) {}
 
     // Path 3: query DOM for HA root element, then read hass / hassConnection
     try{
-      const doc = parent.document;
-      const roots = [
-        doc && doc.querySelector && doc.querySelector('home-assistant'),
-        doc && doc.querySelector && doc.querySelector('home-assistant-main'),
-        doc && doc.querySelector && doc.querySelector('hc-main'),
-      ].filter(Boolean);
+      const hr = hassRoots(parent.document);
+      const roots = [hr.ha, hr.docMain, hr.hcMain].filter(Boolean);
 
       for (const r of roots){
         try{
           if (r.hassConnection && r.hassConnection.then) {
-            const timeoutMs = 1500;
-            const hc = await Promise.race([
-              r.hassConnection,
-              new Promise((_, rej) => setTimeout(() => rej(new Error('hassConnection timeout')), timeoutMs)),
-            ]);
-            if (hc && hc.conn) { try{ if (DEBUG_UI) console.debug('[clawdbot] getHass via root.hassConnection', !!(hc.hass && hc.hass.states)); }catch(e){}; return { conn: hc.conn, hass: hc.hass }; }
+            const hc = await withTimeout(r.hassConnection, 1500, 'hassConnection timeout');
+            if (hc && hc.conn) { try{ if (DEBUG_UI) console.debug('[clawdbot] getHass via root.hassConnection', !!(hc.hass && hc.hass.states)); }catch(e){}; return rememberHass(hc.conn, () => hc.hass); }
           }
         } catch(e) {}
         try{
-          if (r.hass && r.hass.connection) { try{ if (DEBUG_UI) console.debug('[clawdbot] getHass via root.hass', !!(r.hass && r.hass.states)); }catch(e){}; return { conn: r.hass.connection, hass: r.hass }; }
+          if (r.hass && r.hass.connection) { try{ if (DEBUG_UI) console.debug('[clawdbot] getHass via root.hass', !!(r.hass && r.hass.states)); }catch(e){}; return rememberHass(r.hass.connection, () => r.hass); }
         } catch(e) {}
         // some HA builds tuck hass on appEl._hass
         try{
-          if (r._hass && r._hass.connection) { try{ if (DEBUG_UI) console.debug('[clawdbot] getHass via root._hass', !!(r._hass && r._hass.states)); }catch(e){}; return { conn: r._hass.connection, hass: r._hass }; }
+          if (r._hass && r._hass.connection) { try{ if (DEBUG_UI) console.debug('[clawdbot] getHass via root._hass', !!(r._hass && r._hass.states)); }catch(e){}; return rememberHass(r._hass.connection, () => r._hass); }
         } catch(e) {}
         // shadowRoot hop
         try{
           const sr = r.shadowRoot;
           if (sr){
             const inner = sr.querySelector('home-assistant') || sr.querySelector('home-assistant-main');
-            if (inner && inner.hass && inner.hass.connection) return { conn: inner.hass.connection, hass: inner.hass };
+            if (inner && inner.hass && inner.hass.connection) return rememberHass(inner.hass.connection, () => inner.hass);
           }
         } catch(e) {}
       }
@@ -3468,162 +4020,286 @@ window.__clawdbotPanelInitError = null;
 
     // Path 4: explicit HA shadow DOM traversal (home-assistant → shadowRoot → home-assistant-main)
     try{
-      const doc = parent.document;
-      const ha = doc && doc.querySelector ? doc.querySelector('home-assistant') : null;
-      const main = ha && ha.shadowRoot && ha.shadowRoot.querySelector ? ha.shadowRoot.querySelector('home-assistant-main') : null;
+      const { main } = hassRoots(parent.document);
       if (main) {
         const hass = main.hass || main._hass || null;
         const conn = hass && hass.connection ? hass.connection : null;
         if (hass && conn) { try{ if (DEBUG_UI) dbgStep('got-hass-shadow');
-        console.debug('[clawdbot] getHass via shadowRoot', !!(hass && hass.states), !!(hass && hass.connection)); }catch(e){}; return { conn, hass }; }
+        console.debug('[clawdbot] getHass via shadowRoot', !!(hass && hass.states), !!(hass && hass.connection)); }catch(e){}; return rememberHass(conn, () => main.hass || main._hass || null); }
       }
     } catch(e) {}
     throw new Error('Unable to access Home Assistant frontend connection from iframe');
   }
 
+  // Status writes: identical repeats are dropped and the rest land in one frame.
+  let _statusLast = null;
+  let _statusNext = null;
+  let _statusRaf = 0;
+
+  function setText(el, v){
+    if (el && el.textContent !== v) el.textContent = v;
+  }
+  function setClass(el, v){
+    if (el && el.className !== v) el.className = v;
+  }
+
+  function applyStatus(){
+    _statusRaf = 0;
+    const { ok, text, detail, hint } = _statusNext;
+    const el = byId('status');
+    if (!el) return;
+    setText(el, text);
+    setClass(el, ok ? 'ok' : 'bad');
+    const pill = byId('connPill');
+    setText(pill, ok ? 'connected' : 'error');
+    setClass(pill, 'pill ' + (ok ? 'ok' : 'bad'));
+    setText(byId('statusDetail'), detail || '');
+    setText(byId('statusHint'), hint || '');
+  }
+
   function setStatus(ok, text, detail, hint){
+    const key = (ok ? '1' : '0') + '\u0000' + text + '\u0000' + (detail || '') + '\u0000' + (hint || '');
+    if (key === _statusLast) return;
+    _statusLast = key;
     try{ if (DEBUG_UI) console.debug('[clawdbot] setStatus', {ok, text, detail, hint}); } catch(e) {}
-    const el = qs('#status');
-    if (!el) return;
-    el.textContent = text;
-    el.className = ok ? 'ok' : 'bad';
-    const pill = document.getElementById('connPill');
-    if (pill){ pill.textContent = ok ? 'connected' : 'error'; pill.className = 'pill ' + (ok ? 'ok' : 'bad'); }
-    qs('#statusDetail').textContent = detail || '';
-    const hintEl = qs('#statusHint');
-    if (hintEl) hintEl.textContent = hint || '';
+    _statusNext = { ok, text, detail, hint };
+    if (!_statusRaf) _statusRaf = requestAnimationFrame(applyStatus);
+  }
+
+
+
+  // One flattened (SoA) view of hass.states, rebuilt only when the states object
+  // identity changes; shared by entity list, suggestions, datalist and weather lookup.
+  let _statesCache = { ref:null, ids:[], idSet:null, lids:[], names:[], lnames:[], units:[], lunits:[], masks:new Int32Array(0), rawStates:[], byDomainFirst:{} };
+
+  // Above this many added+removed ids a full sort is cheaper than binary inserts.
+  const ID_DELTA_MAX = 64;
+
+  // Sorted entity ids for src, reusing the previous sorted array when the id set is
+  // unchanged (the common case) and patching it with binary inserts for small deltas.
+  function sortedIds(src, prev, prevSet){
+    const keys = Object.keys(src);
+    if (!prevSet) return keys.sort();
+    const added = [];
+    for (const id of keys) if (!prevSet.has(id)) added.push(id);
+    const removed = prev.length + added.length - keys.length;
+    if (!added.length && !removed) return prev;
+    if (added.length + removed > ID_DELTA_MAX) return keys.sort();
+    const ids = removed ? prev.filter(id => Object.prototype.hasOwnProperty.call(src, id)) : prev.slice();
+    for (const id of added){
+      let lo = 0, hi = ids.length;
+      while (lo < hi){
+        const mid = (lo + hi) >> 1;
+        if (ids[mid] < id) lo = mid + 1; else hi = mid;
+      }
+      ids.splice(lo, 0, id);
+    }
+    return ids;
+  }
+
+  function statesIndex(states){
+    const src = states || {};
+    const prev = _statesCache;
+    if (prev.ref === src) return prev;
+    const ids = sortedIds(src, prev.ids, prev.idSet);
+    const sameIds = ids === prev.ids;
+    const n = ids.length;
+    const c = { ref: src, ids, idSet: sameIds ? prev.idSet : new Set(ids), lids: sameIds ? prev.lids : new Array(n), names: new Array(n), lnames: new Array(n), units: new Array(n), lunits: new Array(n), masks: new Int32Array(n), rawStates: new Array(n), byDomainFirst: Object.create(null) };
+    let scoringSame = sameIds;
+    for (let i=0;i<n;i++){
+      const id = ids[i];
+      const st = src[id];
+      const a = (st && st.attributes) ? st.attributes : null;
+      const fname = (a && a.friendly_name) ? String(a.friendly_name) : '';
+      const unit = (a && a.unit_of_measurement) || '';
+      if (!sameIds) c.lids[i] = id.toLowerCase();
+      c.names[i] = fname;
+      c.lnames[i] = String(fname || (a && a.device_class) || '').toLowerCase();
+      c.units[i] = unit;
+      c.lunits[i] = String(unit).toLowerCase();
+      c.rawStates[i] = st ? st.state : '';
+      const nameSame = sameIds && c.lnames[i] === prev.lnames[i];
+      c.masks[i] = nameSame ? prev.masks[i] : (letterMask(c.lids[i]) | letterMask(c.lnames[i]));
+      if (scoringSame && (!nameSame || c.lunits[i] !== prev.lunits[i])) scoringSame = false;
+      const d = id.slice(0, id.indexOf('.'));
+      if (!(d in c.byDomainFirst)) c.byDomainFirst[d] = id;
+    }
+    // Keep the scoring columns' identity when only state values changed, so scored
+    // results (topCandidates) stay valid across ticks.
+    if (scoringSame) { c.lnames = prev.lnames; c.lunits = prev.lunits; c.masks = prev.masks; }
+    _statesCache = c;
+    return c;
+  }
+
+  function escapeRe(x){
+    return String(x).replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+  }
+
+  // Precompile each rule once: an alternation regex rejects most entities in one pass,
+  // the per-keyword count (which sets the score) only runs on a hit.
+  // Bit per letter a-z present in str. A keyword can only be a substring of an entity
+  // whose mask covers the keyword's mask, so most rule groups are rejected with an AND.
+  function letterMask(str){
+    let m = 0;
+    for (let i=0;i<str.length;i++){
+      const c = str.charCodeAt(i) - 97;
+      if (c >= 0 && c < 26) m |= (1 << c);
+    }
+    return m;
   }
 
+  function maskCanMatch(masks, m){
+    for (let i=0;i<masks.length;i++){
+      if ((m & masks[i]) === masks[i]) return true;
+    }
+    return false;
+  }
 
+  function compileRules(r){
+    const kw = r.keywords || [];
+    const weak = r.weak || [];
+    r._kwMasks = kw.map(letterMask);
+    r._weakMasks = weak.map(letterMask);
+    r._kwRe = kw.length ? new RegExp(kw.map(escapeRe).join('|')) : null;
+    r._weakRe = weak.length ? new RegExp(weak.map(escapeRe).join('|')) : null;
+    r._unitSet = new Set((r.units || []).map(u => String(u).toLowerCase()));
+    return r;
+  }
 
-  function scoreEntity(meta, rules){
-    const id=(meta.entity_id||'').toLowerCase();
-    const name=(meta.name||'').toLowerCase();
-    const unit=(meta.unit||'').toLowerCase();
+  function compileRuleSet(rules){
+    for (const k of Object.keys(rules)) compileRules(rules[k]);
+    return rules;
+  }
+
+  function scoreLower(id, name, unit, rules, mask){
+    if (!rules._unitSet) compileRules(rules);
+    const any = mask === undefined;
     let s=0;
-    for (const kw of (rules.keywords||[])){
-      if (id.includes(kw) || name.includes(kw)) s += 3;
+    if (rules._kwRe && (any || maskCanMatch(rules._kwMasks, mask)) && (rules._kwRe.test(id) || rules._kwRe.test(name))){
+      for (const kw of rules.keywords){
+        if (id.includes(kw) || name.includes(kw)) s += 3;
+      }
     }
-    for (const kw of (rules.weak||[])){
-      if (id.includes(kw) || name.includes(kw)) s += 1;
+    if (rules._weakRe && (any || maskCanMatch(rules._weakMasks, mask)) && (rules._weakRe.test(id) || rules._weakRe.test(name))){
+      for (const kw of rules.weak){
+        if (id.includes(kw) || name.includes(kw)) s += 1;
+      }
     }
-    if (rules.units && rules.units.includes(unit)) s += 2;
+    if (rules._unitSet.has(unit)) s += 2;
     // Penalize obviously irrelevant domains
     if (id.startsWith('automation.') || id.startsWith('update.')) s -= 2;
     return s;
   }
 
+  // Per-rule winners, valid while the scoring columns (ids/names/units) keep their identity;
+  // state-only ticks reuse them and just re-read the current names/states.
+  const _topCache = new WeakMap();
+
   function topCandidates(hass, rules, limit){
-    const out=[];
-    const states=(hass && hass.states) ? hass.states : {};
-    for (const [entity_id, st] of Object.entries(states)){
-      const meta={
-        entity_id,
-        name: (st.attributes && (st.attributes.friendly_name || st.attributes.device_class || '')) || '',
-        unit: (st.attributes && st.attributes.unit_of_measurement) || '',
-        state: st.state,
-      };
-      const score=scoreEntity(meta, rules);
-      if (score > 0) out.push({score, ...meta});
+    const c = statesIndex(hass && hass.states);
+    const { lids, lnames, lunits, masks } = c;
+    const k = limit || 3;
+    const cached = _topCache.get(rules);
+    if (cached && cached.lnames === lnames && cached.lunits === lunits && cached.k === k) {
+      return cached.hits.map(({score, i}) => ({
+        score,
+        entity_id: c.ids[i],
+        name: c.names[i],
+        unit: c.units[i],
+        state: c.rawStates[i],
+      }));
     }
-    out.sort((a,b)=>b.score-a.score);
-    return out.slice(0, limit||3);
+    // Bounded min-heap (SoA: scores + state indexes) keeps only the best k; the root is
+    // the weakest kept entry. Ties prefer the earlier (sorted) id, like a stable sort.
+    const hs = new Float64Array(k);
+    const hi = new Int32Array(k);
+    let size = 0;
+    const worse = (a, b) => hs[a] < hs[b] || (hs[a] === hs[b] && hi[a] > hi[b]);
+    const swap = (a, b) => { const s=hs[a]; hs[a]=hs[b]; hs[b]=s; const t=hi[a]; hi[a]=hi[b]; hi[b]=t; };
+    const siftDown = (j) => {
+      for (;;){
+        const l = 2*j+1, r = l+1;
+        let m = j;
+        if (l < size && worse(l, m)) m = l;
+        if (r < size && worse(r, m)) m = r;
+        if (m === j) return;
+        swap(j, m); j = m;
+      }
+    };
+    for (let i=0, n=lids.length; i<n; i++){
+      const score=scoreLower(lids[i], lnames[i], lunits[i], rules, masks[i]);
+      if (score <= 0) continue;
+      if (size < k){
+        let j = size++;
+        hs[j] = score; hi[j] = i;
+        while (j > 0){
+          const p = (j-1) >> 1;
+          if (!worse(j, p)) break;
+          swap(j, p); j = p;
+        }
+      } else if (score > hs[0]){
+        hs[0] = score; hi[0] = i;
+        siftDown(0);
+      }
+    }
+    const hits = new Array(size);
+    while (size > 0){
+      hits[size-1] = { score: hs[0], i: hi[0] };
+      size--;
+      if (size > 0){ hs[0] = hs[size]; hi[0] = hi[size]; siftDown(0); }
+    }
+    _topCache.set(rules, { lnames, lunits, k, hits });
+    return hits.map(({score, i}) => ({
+      score,
+      entity_id: c.ids[i],
+      name: c.names[i],
+      unit: c.units[i],
+      state: c.rawStates[i],
+    }));
   }
 
+  const SUGGEST_RULES = compileRuleSet({
+    soc: { label:'Battery SOC (%)', keywords:['soc','state_of_charge','battery_soc'], units:['%'], weak:['battery'] },
+    voltage: { label:'Battery Voltage (V)', keywords:['voltage','battery_voltage','batt_v'], units:['v'], weak:['battery'] },
+    solar: { label:'Solar Input Power (W)', keywords:['solar','pv','photovoltaic','panel'], units:['w'], weak:['input','power'] },
+    load: { label:'Total Consumption / Load (W)', keywords:['load','consumption','house_power','ac_load','power'], units:['w'], weak:['total','sum'] },
+  });
+
   function renderSuggestions(hass){
-    const root = qs('#suggestions');
+    const root = byId('suggestions');
     if (!root) return;
-    root.innerHTML='';
-
-    const rules={
-      soc: { label:'Battery SOC (%)', keywords:['soc','state_of_charge','battery_soc'], units:['%'], weak:['battery'] },
-      voltage: { label:'Battery Voltage (V)', keywords:['voltage','battery_voltage','batt_v'], units:['v'], weak:['battery'] },
-      solar: { label:'Solar Input Power (W)', keywords:['solar','pv','photovoltaic','panel'], units:['w'], weak:['input','power'] },
-      load: { label:'Total Consumption / Load (W)', keywords:['load','consumption','house_power','ac_load','power'], units:['w'], weak:['total','sum'] },
-    };
 
+    const rules = SUGGEST_RULES;
     const mapping = getMapping();
     const fields = ['soc','voltage','solar','load'];
+    // Scoring is the expensive part: skip it while states and mapping are unchanged.
+    if (renderUnchanged(root, hass && hass.states, fields.map(k => mapping[k] || '').join('|'))) return;
 
+    // Build all cards as one string; Confirm buttons are handled by onSuggestionsClick.
+    const parts=[];
     for (const key of fields){
       const r = rules[key];
       const cands = topCandidates(hass, r, 3);
-      const card = document.createElement('div');
-      card.className = 'suggest-card';
-
-      const title = document.createElement('div');
-      title.className = 'muted';
-      title.textContent = r.label;
-      card.appendChild(title);
-
-      const list = document.createElement('div');
+      parts.push(`<div class="suggest-card"><div class="muted">${r.label}</div><div style="margin-top:6px">`);
       if (cands.length) {
         cands.forEach((c, idx) => {
-          const row = document.createElement('label');
-          row.className = 'choice';
-          const id = `sugg-${key}-${idx}`;
-          const input = document.createElement('input');
-          input.type = 'radio';
-          input.name = `sugg-${key}`;
-          input.id = id;
-          input.value = c.entity_id;
-          if (mapping[key] && mapping[key] === c.entity_id) input.checked = true;
-          const main = document.createElement('div');
-          main.className = 'choice-main';
-          main.textContent = c.entity_id;
-          const meta = document.createElement('div');
-          meta.className = 'choice-meta';
-          meta.textContent = `${c.state}${c.unit ? (' ' + c.unit) : ''} · score ${c.score}`;
-          const wrap = document.createElement('div');
-          wrap.appendChild(main);
-          wrap.appendChild(meta);
-          row.appendChild(input);
-          row.appendChild(wrap);
-          list.appendChild(row);
+          const checked = (mapping[key] && mapping[key] === c.entity_id) ? ' checked' : '';
+          const meta = `${c.state}${c.unit ? (' ' + c.unit) : ''} · score ${c.score}`;
+          parts.push(`<label class="choice"><input type="radio" name="sugg-${key}" id="sugg-${key}-${idx}" value="${c.entity_id}"${checked}/><div><div class="choice-main">${escapeHtml(c.entity_id)}</div><div class="choice-meta">${escapeHtml(meta)}</div></div></label>`);
         });
       } else {
-        const empty = document.createElement('div');
-        empty.className = 'muted';
-        empty.textContent = '(no candidates found)';
-        empty.style.marginTop = '6px';
-        list.appendChild(empty);
-      }
-
-      const manualRow = document.createElement('label');
-      manualRow.className = 'choice';
-      const manualInput = document.createElement('input');
-      manualInput.type = 'radio';
-      manualInput.name = `sugg-${key}`;
-      manualInput.value = '__manual__';
-      if (!cands.find(c => c.entity_id === mapping[key])) {
-        manualInput.checked = true;
+        parts.push('<div class="muted" style="margin-top:6px">(no candidates found)</div>');
       }
-      const manualText = document.createElement('div');
-      manualText.className = 'choice-main';
-      manualText.textContent = 'Use manual input below';
-      manualRow.appendChild(manualInput);
-      manualRow.appendChild(manualText);
-      list.appendChild(manualRow);
-
-      list.style.marginTop = '6px';
-      card.appendChild(list);
-
-      const actions = document.createElement('div');
-      actions.className = 'row';
-      actions.style.marginTop = '8px';
-      const btn = document.createElement('button');
-      btn.className = 'btn primary';
-      btn.textContent = 'Confirm';
-      btn.onclick = () => confirmFieldMapping(key);
-      const status = document.createElement('span');
-      status.className = 'muted';
-      status.id = `confirm-${key}`;
-      actions.appendChild(btn);
-      actions.appendChild(status);
-      card.appendChild(actions);
-
-      root.appendChild(card);
+      const manualChecked = !cands.find(c => c.entity_id === mapping[key]) ? ' checked' : '';
+      parts.push(`<label class="choice"><input type="radio" name="sugg-${key}" value="__manual__"${manualChecked}/><div class="choice-main">Use manual input below</div></label></div>`);
+      parts.push(`<div class="row" style="margin-top:8px"><button class="btn primary" data-confirm="${key}">Confirm</button><span class="muted" id="confirm-${key}"></span></div></div>`);
     }
+    root.innerHTML = parts.join('');
+  }
+
+  function onSuggestionsClick(e){
+    const btn = e.target && e.target.closest ? e.target.closest('button[data-confirm]') : null;
+    if (btn) confirmFieldMapping(btn.getAttribute('data-confirm'));
   }
   async function callService(domain, service, data){
     const payload = data || {};
@@ -3657,50 +4333,133 @@ window.__clawdbotPanelInitError = null;
 
   let _allIds = [];
 
-  function renderEntities(hass, filter){
-    const states = hass && hass.states ? hass.states : {};
-    const root = qs('#entities');
-    root.innerHTML = '';
-
-    const f = (filter || '').trim().toLowerCase();
-    const ids = (f ? _allIds.filter(id => id.toLowerCase().includes(f)) : _allIds);
+  const ENTITY_TOGGLE_DOMAINS = new Set(['switch','light','input_boolean']);
+
+  // Windowed entity list: beyond ENT_WINDOW_MIN rows only the visible slice (+ overscan) is in the DOM.
+  // The slice sits in normal flow inside one translated wrapper, so scrolling moves a single
+  // transform instead of repositioning every row.
+  const ENT_ROW_PX = 48;
+  const ENT_ROW_FIXED_CSS = `height:${ENT_ROW_PX}px;box-sizing:border-box;overflow:hidden`;
+  const ENT_WINDOW_MIN = 150;
+  const ENT_OVERSCAN = 10;
+  const _entWin = { ids: [], states: {}, start: -1, end: -1 };
+
+  function entityRow(id, text, fixed){
+    const domain = id.split('.')[0];
+    const row = cloneTpl('tplEntityRow').firstElementChild;
+    row.dataset.entity = id;
+    row.dataset.domain = domain;
+    if (fixed) row.style.cssText = ENT_ROW_FIXED_CSS;
+    const info = row.firstElementChild;
+    info.firstElementChild.textContent = id;
+    row._entStateEl = info.lastElementChild;
+    row._entStateEl.textContent = text;
+    row.lastElementChild.appendChild(cloneTpl(ENTITY_TOGGLE_DOMAINS.has(domain) ? 'tplEntityToggles' : 'tplEntityNoControls'));
+    return row;
+  }
 
-    for (const id of ids){
+  // Keyed by entity_id: surviving rows are reused in place (state text / order only),
+  // new rows are cloned by entityRow, rows whose id vanished are removed.
+  function reconcileEntityRows(parent, ids, states, start, end, fixed){
+    const prev = parent._entRows || new Map();
+    const next = new Map();
+    // Consecutive new rows are collected here and inserted with one DOM write.
+    const frag = document.createDocumentFragment();
+    let cursor = parent.firstElementChild;
+    for (let i=start;i<end;i++){
+      const id = ids[i];
       const st = states[id];
-      const row = document.createElement('div');
-      row.className = 'ent';
-
-      const left = document.createElement('div');
-      left.style.minWidth = '280px';
-      left.innerHTML = `<div class="ent-id">${id}</div><div class="ent-state">${st.state}</div>`;
-
-      const right = document.createElement('div');
-      right.className = 'row';
-
-      const domain = id.split('.')[0];
-      if (['switch','light','input_boolean'].includes(domain)){
-        const onBtn = document.createElement('button');
-        onBtn.className = 'btn';
-        onBtn.textContent = 'On';
-        onBtn.onclick = async () => { await callService('clawdbot','ha_call_service',{domain, service:'turn_on', entity_id:id, service_data:{}}); };
-
-        const offBtn = document.createElement('button');
-        offBtn.className = 'btn';
-        offBtn.textContent = 'Off';
-        offBtn.onclick = async () => { await callService('clawdbot','ha_call_service',{domain, service:'turn_off', entity_id:id, service_data:{}}); };
-
-        right.appendChild(onBtn);
-        right.appendChild(offBtn);
+      const text = st ? String(st.state == null ? '' : st.state) : '';
+      let row = prev.get(id);
+      if (row) {
+        prev.delete(id);
+        if (row._entState !== text) {
+          row._entState = text;
+          // Patch the existing text node; fall back to textContent for empty cells.
+          const tn = row._entStateEl.firstChild;
+          if (tn && tn.nodeType === 3 && text) tn.data = text;
+          else row._entStateEl.textContent = text;
+        }
       } else {
-        const noop = document.createElement('span');
-        noop.className = 'muted';
-        noop.textContent = 'no controls';
-        right.appendChild(noop);
+        row = entityRow(id, text, fixed);
+        row._entState = text;
+        next.set(id, row);
+        frag.appendChild(row);
+        continue;
       }
+      next.set(id, row);
+      if (frag.firstChild) parent.insertBefore(frag, cursor);
+      if (row === cursor) cursor = cursor.nextElementSibling;
+      else parent.insertBefore(row, cursor);
+    }
+    if (frag.firstChild) parent.insertBefore(frag, cursor);
+    for (const row of prev.values()) row.remove();
+    parent._entRows = next;
+  }
+
+  function renderEntityWindow(){
+    const root = byId('entities');
+    const win = root && root.firstElementChild ? root.firstElementChild.firstElementChild : null;
+    const ids = _entWin.ids;
+    if (!win || ids.length <= ENT_WINDOW_MIN) return;
+    // Hidden tabs report clientHeight 0; fall back to the .entities max-height.
+    const viewH = root.clientHeight || 420;
+    const start = Math.max(0, Math.floor(root.scrollTop / ENT_ROW_PX) - ENT_OVERSCAN);
+    const end = Math.min(ids.length, start + Math.ceil(viewH / ENT_ROW_PX) + 2 * ENT_OVERSCAN);
+    if (start === _entWin.start && end === _entWin.end) return;
+    _entWin.start = start;
+    _entWin.end = end;
+    reconcileEntityRows(win, ids, _entWin.states, start, end, true);
+    win.style.transform = `translateY(${start * ENT_ROW_PX}px)`;
+  }
 
-      row.appendChild(left);
-      row.appendChild(right);
-      root.appendChild(row);
+  // Filtered view of _allIds, recomputed only when the id list or the filter changes.
+  let _filtered = { src: null, f: '', ids: [] };
+  function filteredIds(f){
+    if (!f) return _allIds;
+    if (_filtered.src === _allIds && _filtered.f === f) return _filtered.ids;
+    const c = _statesCache;
+    const lids = (c.ids === _allIds) ? c.lids : null;
+    const ids = lids ? _allIds.filter((id, i) => lids[i].includes(f)) : _allIds.filter(id => id.toLowerCase().includes(f));
+    _filtered = { src: _allIds, f, ids };
+    return ids;
+  }
+
+  function renderEntities(hass, filter){
+    const states = hass && hass.states ? hass.states : {};
+    const root = byId('entities');
+
+    const f = (filter || '').trim().toLowerCase();
+    if (renderUnchanged(root, states, f + '|' + _allIds.length)) return;
+    const ids = filteredIds(f);
+
+    _entWin.ids = ids;
+    _entWin.states = states;
+    _entWin.start = _entWin.end = -1;
+    // Row buttons are handled by onEntitiesClick, so reused rows need no rebinding.
+    const windowed = ids.length > ENT_WINDOW_MIN;
+    if (root._entWindowed !== windowed) {
+      root.innerHTML = windowed ? '<div><div style="will-change:transform"></div></div>' : '';
+      root._entRows = null;
+      root._entWindowed = windowed;
+    }
+    if (windowed) {
+      // Large installs: a full-height spacer plus only the rows near the viewport.
+      root.firstElementChild.style.height = `${ids.length * ENT_ROW_PX}px`;
+      renderEntityWindow();
+    } else if (_allIds.length <= ENT_WINDOW_MIN) {
+      // Small installs keep every row mounted; the filter only flips display on them.
+      reconcileEntityRows(root, _allIds, states, 0, _allIds.length, false);
+      const show = f ? new Set(ids) : null;
+      for (const [id, row] of root._entRows) {
+        const hide = !!show && !show.has(id);
+        if (row._entHidden !== hide) { row._entHidden = hide; row.style.display = hide ? 'none' : ''; }
+      }
+    } else {
+      reconcileEntityRows(root, ids, states, 0, ids.length, false);
+      for (const row of root._entRows.values()) {
+        if (row._entHidden) { row._entHidden = false; row.style.display = ''; }
+      }
     }
 
     setStatus(true, 'connected', `Loaded ${ids.length} entities (filter: ${f || 'none'})`);
@@ -3708,6 +4467,21 @@ window.__clawdbotPanelInitError = null;
 
 
   
+  function onEntitiesClick(e){
+    const b = e.target && e.target.closest ? e.target.closest('button[data-action]') : null;
+    if (!b) return;
+    const row = b.closest('.ent');
+    if (!row) return;
+    const service = b.dataset.action === 'on' ? 'turn_on' : 'turn_off';
+    callService('clawdbot','ha_call_service',{domain: row.dataset.domain, service, entity_id: row.dataset.entity, service_data:{}}).catch(() => {});
+  }
+
+  // Array of HA state objects -> dict keyed by entity_id, assembled in one fromEntries pass.
+  function statesById(list){
+    if (!Array.isArray(list)) return {};
+    return Object.fromEntries(list.filter(it => it && it.entity_id).map(it => [it.entity_id, it]));
+  }
+
   async function fetchStatesWs(conn){
     if (!conn || typeof conn.sendMessagePromise !== 'function') throw new Error('WS connection unavailable');
 
@@ -3715,19 +4489,11 @@ window.__clawdbotPanelInitError = null;
     const WS_TIMEOUT_MS = 3000;
 
     console.debug('[clawdbot] ws get_states send');
-    const list = await Promise.race([
-      conn.sendMessagePromise({ type: 'get_states' }),
-      new Promise((_, rej) => setTimeout(() => rej(new Error('WS get_states timeout after ' + WS_TIMEOUT_MS + 'ms')), WS_TIMEOUT_MS)),
-    ]);
+    const list = await withTimeout(conn.sendMessagePromise({ type: 'get_states' }), WS_TIMEOUT_MS, 'WS get_states timeout after ' + WS_TIMEOUT_MS + 'ms');
     console.debug('[clawdbot] ws get_states done');
 
     // HA returns an array of state objects; normalize to a dict keyed by entity_id.
-    const out = {};
-    if (Array.isArray(list)) {
-      for (const it of list) {
-        if (it && it.entity_id) out[it.entity_id] = it;
-      }
-    }
+    const out = statesById(list);
 
     console.debug('[clawdbot] ws get_states normalized', {listIsArray: Array.isArray(list), listLen: Array.isArray(list)?list.length:null, outLen: Object.keys(out).length});
     return out;
@@ -3748,13 +4514,7 @@ async function fetchStatesRest(hass){
     const arr = await r.json();
     if (Array.isArray(arr)) len = arr.length;
     try{ if (DEBUG_UI) console.debug('[clawdbot] /api/states ok len', len); }catch(e){}
-    const out = {};
-    if (Array.isArray(arr)) {
-      for (const it of arr) {
-        if (it && it.entity_id) out[it.entity_id] = it;
-      }
-    }
-    return out;
+    return statesById(arr);
   }
 
   function getParentHassStates(){
@@ -3763,9 +4523,7 @@ async function fetchStatesRest(hass){
       const p = window.parent;
       if (!p) return null;
       if (p.hass && p.hass.states) return p.hass.states;
-      const doc = p.document;
-      const ha = doc && doc.querySelector ? doc.querySelector('home-assistant') : null;
-      const main = ha && ha.shadowRoot && ha.shadowRoot.querySelector ? ha.shadowRoot.querySelector('home-assistant-main') : null;
+      const { ha, main } = hassRoots(p.document);
       const hass = (main && (main.hass || main._hass)) || (ha && (ha.hass || ha._hass)) || null;
       return hass && hass.states ? hass.states : null;
     } catch(e){
@@ -3814,11 +4572,7 @@ async function fetchStatesRest(hass){
     // Hydrate iframe hass snapshot so Cockpit/mapping reads the same state object.
     try{
       if (hass) {
-        if (Array.isArray(states)) {
-          const byId = {};
-          for (const it of states) { if (it && it.entity_id) byId[it.entity_id] = it; }
-          states = byId;
-        }
+        if (Array.isArray(states)) states = statesById(states);
         hass.states = states || {};
         window.__clawdbotStatesType = Array.isArray(hass.states) ? 'array' : (hass.states && typeof hass.states === 'object' ? 'object' : typeof hass.states);
         window.__clawdbotStatesCount = (hass.states && typeof hass.states === 'object') ? Object.keys(hass.states).length : null;
@@ -3826,34 +4580,30 @@ async function fetchStatesRest(hass){
       }
     } catch(e) {}
 
-    _allIds = Object.keys(states || {}).sort();
+    _allIds = statesIndex(states).ids;
     buildMappingDatalist(hass);
-    renderEntities(hass, qs('#filter').value);
+    scheduleRender('entities', () => renderEntities(hass, byId('filter').value));
     try{ renderEntityConfig(hass); } catch(e){}
-    try{ renderSuggestions(hass); } catch(e){}
-    try{ renderMappedValues(hass); } catch(e){}
-    try{ renderRecommendations(hass); } catch(e){}
+    scheduleRender('suggestions', () => renderSuggestions(hass));
+    scheduleRender('mapped', () => renderMappedValues(hass));
+    scheduleRender('recs', () => renderRecommendations(hass));
 
   function buildMappingDatalist(hass){
-    const dl = document.getElementById('entityIdList');
+    const dl = byId('entityIdList');
     if (!dl) return;
-    const states = hass && hass.states ? hass.states : {};
-    dl.innerHTML = '';
+    const c = (hass && hass.states) ? statesIndex(hass.states) : _statesCache;
     // Filter out noisy domains for mapping UX; keep sensors, numbers by default.
-    const allow = (id) => {
-      if (!id || typeof id !== 'string') return false;
-      if (id.startsWith('automation.') || id.startsWith('update.')) return false;
-      return true;
-    };
-    for (const id of _allIds){
-      if (!allow(id)) continue;
-      const st = states[id];
-      const name = (st && st.attributes && st.attributes.friendly_name) ? String(st.attributes.friendly_name) : '';
-      const opt = document.createElement('option');
-      opt.value = id;
-      if (name) opt.label = name;
-      dl.appendChild(opt);
+    const parts = [];
+    for (let i=0, n=c.ids.length; i<n; i++){
+      const id = c.ids[i];
+      if (id.startsWith('automation.') || id.startsWith('update.')) continue;
+      const name = c.names[i];
+      parts.push(name ? `<option value="${escapeAttr(id)}" label="${escapeAttr(name)}"></option>` : `<option value="${escapeAttr(id)}"></option>`);
     }
+    // One innerHTML write, skipped entirely when the option list is unchanged.
+    const html = parts.join('');
+    if (renderUnchanged(dl, null, html)) return;
+    dl.innerHTML = html;
   }
   }
 
@@ -4206,26 +4956,18 @@ async function fetchStatesRest(hass){
         root.innerHTML = '<div class="muted">No created entities yet.</div>';
         return;
       }
-      root.innerHTML = '';
+      const frag = document.createDocumentFragment();
       for (const it of items){
         if (!it) continue;
-        const row = document.createElement('div');
-        row.className = 'ent';
-        const left = document.createElement('div');
-        left.style.minWidth = '0';
+        const row = cloneTpl('tplCreatedEntityRow').firstElementChild;
+        const left = row.firstElementChild;
+        const right = row.lastElementChild;
         const title = it.title || it.entity_id || it.id || 'created_entity';
         const sub = it.entity_id || it.id || '';
-        left.innerHTML = `<div class="ent-id">${escapeHtml(String(title))}</div><div class="ent-state" style="font-size:11px;white-space:nowrap;overflow:hidden;text-overflow:ellipsis">${escapeHtml(String(sub))}</div>`;
-        const right = document.createElement('div');
-        right.style.display = 'flex';
-        right.style.alignItems = 'center';
-        right.style.gap = '8px';
-        const st = document.createElement('div');
-        st.className = 'ent-state';
-        st.textContent = (it.state != null) ? String(it.state) : '—';
-        const btn = document.createElement('button');
-        btn.className = 'btn';
-        btn.textContent = 'Remove';
+        left.firstElementChild.textContent = String(title);
+        left.lastElementChild.textContent = String(sub);
+        right.firstElementChild.textContent = (it.state != null) ? String(it.state) : '—';
+        const btn = right.lastElementChild;
         btn.onclick = async () => {
           try{
             btn.disabled = true;
@@ -4238,12 +4980,9 @@ async function fetchStatesRest(hass){
             btn.disabled = false;
           }
         };
-        right.appendChild(st);
-        right.appendChild(btn);
-        row.appendChild(left);
-        row.appendChild(right);
-        root.appendChild(row);
+        frag.appendChild(row);
       }
+      root.replaceChildren(frag);
     } catch(e){
       const msg = String(e && (e.message || e) || e);
       root.innerHTML = `<div class="muted">Failed to load: ${escapeHtml(msg)}</div>`;
@@ -4343,8 +5082,7 @@ async function fetchStatesRest(hass){
         if (last && (nowMs - last) < 8000) return;
         _autoSeenEventKeys[key] = nowMs;
       }
-      const now = new Date().toISOString();
-      _autoEvents.unshift({ ts: now, type: String(t), data: d, context_id: ctxId });
+      _autoEvents.unshift({ ts: nowMs, type: String(t), data: d, context_id: ctxId });
       _autoEvents = _autoEvents.slice(0, 10);
     }catch(e){}
   }
@@ -4354,10 +5092,8 @@ async function fetchStatesRest(hass){
     try{
       const pick = (id) => (hass && hass.states) ? hass.states[id] : null;
       const set = (elId, entityId) => {
-        const el = document.getElementById(elId);
-        if (!el) return;
         const st = pick(entityId);
-        el.textContent = st ? String(st.state) : '—';
+        setText(byId(elId), st ? String(st.state) : '—');
       };
       set('autoSigJournal','sensor.openclaw_agent_journal_updated');
       set('autoSigMood','sensor.openclaw_agent_mood');
@@ -4368,7 +5104,7 @@ async function fetchStatesRest(hass){
     } catch(e){}
 
     // Also render a full tile grid (fallback) if container exists.
-    const el = document.getElementById('autoSignals');
+    const el = byId('autoSignals');
     if (!el) return;
     // If tiles already exist (placeholders), do not wipe them.
     if (el.children && el.children.length) return;
@@ -4392,27 +5128,22 @@ async function fetchStatesRest(hass){
   }
 
   function renderAutoEvents(){
-    const el = document.getElementById('autoEvents');
+    const el = byId('autoEvents');
     if (!el) return;
     if (!_autoEvents.length){
       el.innerHTML = '<div class="muted">No events yet.</div>';
       return;
     }
-    el.innerHTML='';
+    const frag = document.createDocumentFragment();
     for (const it of _autoEvents){
-      const row = document.createElement('div');
-      row.className = 'ent';
-      const meta = it.ts ? it.ts.slice(11,19) : '';
-      row.innerHTML = `<div class="ent-id" style="font-size:13px;min-width:0;overflow:hidden;text-overflow:ellipsis">${escapeHtml(it.type)}</div><div class="ent-state" style="font-size:11px;white-space:nowrap">${escapeHtml(meta)}</div>`;
-      el.appendChild(row);
-      const pre = document.createElement('pre');
-      pre.style.margin='6px 0 10px 0';
-      pre.style.whiteSpace='pre-wrap';
-      pre.style.fontSize='11px';
-      pre.style.color='var(--secondary-text-color)';
-      pre.textContent = JSON.stringify(it.data||{}, null, 2);
-      el.appendChild(pre);
+      const item = cloneTpl('tplAutoEvent');
+      const row = item.firstElementChild;
+      row.firstElementChild.textContent = it.type;
+      row.lastElementChild.textContent = it.ts ? clockTime(it.ts) : '';
+      item.lastElementChild.textContent = JSON.stringify(it.data||{}, null, 2);
+      frag.appendChild(item);
     }
+    el.replaceChildren(frag);
   }
 
 
@@ -4527,7 +5258,7 @@ async function fetchStatesRest(hass){
                 if (!ev || !ev.event_type) return;
                 if (types.indexOf(ev.event_type) === -1) return;
                 _autoAddEvent(ev);
-                renderAutoEvents();
+                scheduleRender('autoEvents', renderAutoEvents);
               } catch(e){}
             });
             _autoUnsubs.push(unsubAll);
@@ -4583,36 +5314,35 @@ async function init(){
     renderSuggestions(null);
     try{ bindEntityConfigUi(); bindPickerModal(); } catch(e){}
 
-    async function switchTab(which){
-      const setupTab = qs('#tabSetup');
-      const cockpitTab = qs('#tabCockpit');
-      const chatTab = qs('#tabChat');
-      const viewSetup = qs('#viewSetup');
-      const viewCockpit = qs('#viewCockpit');
-      const viewAgent = qs('#viewAgent');
-      const viewChat = qs('#viewChat');
-      const viewAutomations = qs('#viewAutomations');
-      const agentTab = qs('#tabAgent');
-      const autoTab = qs('#tabAutomations');
-      if (!setupTab || !cockpitTab || !chatTab || !agentTab || !autoTab || !viewSetup || !viewCockpit || !viewAgent || !viewChat || !viewAutomations) return;
-
-      setupTab.classList.toggle('active', which === 'setup');
-      cockpitTab.classList.toggle('active', which === 'cockpit');
-      agentTab.classList.toggle('active', which === 'agent');
-      chatTab.classList.toggle('active', which === 'chat');
-      autoTab.classList.toggle('active', which === 'automations');
+    // Tab buttons and views never change after load; resolve them once.
+    const TAB_KEYS = ['agent','cockpit','chat','automations','setup'];
+    const tabEls = Object.fromEntries(TAB_KEYS.map(k => [k, qs('#tab' + k[0].toUpperCase() + k.slice(1))]));
+    const viewEls = Object.fromEntries(TAB_KEYS.map(k => [k, qs('#view' + k[0].toUpperCase() + k.slice(1))]));
+    const tabsReady = TAB_KEYS.every(k => tabEls[k] && viewEls[k]);
+    let currentTab = null;
+    let _tabPaintRaf = 0;
 
-      // Hard display toggles (production UI must isolate views)
-      setHidden(viewSetup, which !== 'setup');
-      setHidden(viewCockpit, which !== 'cockpit');
-      setHidden(viewAgent, which !== 'agent');
-      setHidden(viewChat, which !== 'chat');
-      setHidden(viewAutomations, which !== 'automations');
+    async function switchTab(which){
+      if (!tabsReady) return;
+      currentTab = which;
+      setActiveTab(which);
+      if (which !== 'agent') pauseAgentView();
+
+      // All ten class/display writes land in one frame; a later switch in the same
+      // frame just retargets it. Data loading below is not frame-gated.
+      if (!_tabPaintRaf) _tabPaintRaf = requestAnimationFrame(() => {
+        _tabPaintRaf = 0;
+        for (const k of TAB_KEYS) {
+          tabEls[k].classList.toggle('active', currentTab === k);
+          // Hard display toggles (production UI must isolate views)
+          setHidden(viewEls[k], currentTab !== k);
+        }
+      });
 
       if (which === 'cockpit') {
     try{ if (DEBUG_UI) dbgStep('before-getHass');
     console.debug('[clawdbot] before getHass'); } catch(e) {}
-        try{ const { hass } = await getHass(); await refreshEntities(); renderMappedValues(hass); renderHouseMemory(); renderRecommendations(hass); await refreshSuggestedSensors(); } catch(e){}
+        try{ const { hass } = await getHass(); await refreshEntities(); scheduleRender('mapped', () => renderMappedValues(hass)); scheduleRender('house', renderHouseMemory); scheduleRender('recs', () => renderRecommendations(hass)); await refreshSuggestedSensors(); } catch(e){}
       }
       if (which === 'agent') {
         try{ await renderAgentView(); } catch(e){}
@@ -4634,12 +5364,11 @@ async function init(){
       if (which === 'chat') {
         loadChatFromConfig();
         ensureSessionSelectValue();
-        await refreshSessions();
-        // Prefer live fetch for the selected session (keeps dropdown + history in sync)
+        // Prefer live fetch for the selected session; the first chat_tick fills the
+        // session dropdown and token usage in the same round trip.
         await loadChatLatest();
-        renderChat({ autoScroll: true });
+        scheduleRenderChat({ autoScroll: true });
         try{ if (_chatMode==="voice") chatVoiceVizStart(); }catch(e){}
-        await refreshTokenUsage();
         startChatPolling();
         updateChatPollDebug();
       } else {
@@ -4647,20 +5376,16 @@ async function init(){
       }
     }
 
-    const bindTab = (id, which) => {
-      const el = qs(id);
-      if (!el) return;
-      el.onclick = (ev) => {
-        try{ ev && ev.preventDefault && ev.preventDefault(); }catch(e){}
-        try{ ev && ev.stopPropagation && ev.stopPropagation(); }catch(e){}
-        switchTab(which);
-      };
-    };
-
-    bindTab('#tabSetup','setup');
-    bindTab('#tabCockpit','cockpit');
-    bindTab('#tabAgent','agent');
-    bindTab('#tabChat','chat');
+    // One delegated listener for the tab bar; buttons are text-only, so the target is the button.
+    const ID_TO_KEY = Object.fromEntries(TAB_KEYS.filter(k => tabEls[k]).map(k => [tabEls[k].id, k]));
+    const tabBar = qs('.tabs');
+    if (tabBar) tabBar.addEventListener('click', (ev) => {
+      const k = ID_TO_KEY[ev.target.id];
+      if (!k) return;
+      ev.preventDefault();
+      ev.stopPropagation();
+      switchTab(k);
+    });
 
     // Chat voice mode toggle
     try{
@@ -4680,19 +5405,20 @@ async function init(){
     try{
       const speakBtn = qs('#chatSpeakBtn');
       const audio = qs('#chatVoiceAudio');
+      const voiceStatus = qs('#chatVoiceStatus');
       if (speakBtn) speakBtn.onclick = async ()=>{
         try{
-          const st = qs('#chatVoiceStatus');
+          const st = voiceStatus;
           if (st) st.textContent = 'Generating audio…';
           _chatVoiceLoading = true;
           let slowGenTimer = null;
-          try{ slowGenTimer = setTimeout(()=>{ try{ const st2=qs('#chatVoiceStatus'); if(st2) st2.textContent='Still generating…'; }catch(e){} }, 8000); }catch(e){}
+          try{ slowGenTimer = setTimeout(()=>{ try{ if(voiceStatus) voiceStatus.textContent='Still generating…'; }catch(e){} }, 8000); }catch(e){}
           try{ if (speakBtn) speakBtn.disabled = true; }catch(e){}
           const r = await callServiceResponse('clawdbot','tts_vibevoice',{text: _chatLastAgentText || 'Hello'});
           const data = (r && r.response) ? r.response : r;
           const rr = data && data.result ? data.result : data;
           if (rr && rr.ok === false) {
-            const st = qs('#chatVoiceStatus');
+            const st = voiceStatus;
             const cls = rr.error_class || 'unknown';
             let msg = rr.message || '';
             if (cls === 'auth_failed') msg = 'TTS authentication failed';
@@ -4715,50 +5441,27 @@ async function init(){
           try{ if (speakBtn) speakBtn.disabled = false; }catch(e){}
           chatVoiceAppend('agent', _chatLastAgentText || '');
         } catch(e){
-          const st = qs('#chatVoiceStatus');
+          const st = voiceStatus;
           const msg = (e && (e.message||e.toString)) ? String(e.message||e.toString()).slice(0,80) : 'failed';
           if (st) st.textContent = 'TTS failed' + (msg ? (': ' + msg) : '');
         }
       };
     } catch(e){}
 
-    bindTab('#tabAutomations','automations');
-
-    // Extra robustness: event delegation so clicks on child nodes still switch.
-    try{
-      const tabs = qs('.tabs');
-      if (tabs) tabs.addEventListener('click', (ev) => {
-        const t = ev.target;
-        if (!t) return;
-        const id = t.id || (t.closest ? (t.closest('button')||{}).id : '');
-        if (id === 'tabSetup') switchTab('setup');
-        if (id === 'tabCockpit') switchTab('cockpit');
-        if (id === 'tabAgent') switchTab('agent');
-        if (id === 'tabChat') switchTab('chat');
-        if (id === 'tabAutomations') switchTab('automations');
-      }, true);
-    } catch(e){}
-
     // Apply theme ASAP (before first render)
     try{ fillThemeInputs(); } catch(e){}
 
-    // Normalize initial state (ensures non-active views are truly hidden).
-    try{
-      const h = ((location && location.hash) ? String(location.hash) : (window.parent && window.parent.location ? String(window.parent.location.hash||'') : '')).toLowerCase();
-      if (h.includes('automations')) switchTab('automations');
-      else if (h.includes('setup')) switchTab('setup');
-      else if (h.includes('chat')) switchTab('chat');
-      else if (h.includes('agent')) switchTab('agent');
-      else switchTab('cockpit');
-    } catch(e){
-      switchTab('cockpit');
-    }
+    // Default landing: Setup if essentials/mapping are missing; otherwise Agent.
+    // Single switch also normalizes initial state (non-active views hidden).
+    const cfg = (window.__CLAWDBOT_CONFIG__ || {});
+    const firstRun = !!(cfg.essentials_missing || cfg.mapping_missing);
+    switchTab(firstRun ? 'setup' : 'agent');
 
     // Automations view refresh: some HA shells swallow click handlers; poll active tab and render.
     try{
+      const autoTab = qs('#tabAutomations');
       setInterval(() => {
         try{
-          const autoTab = qs('#tabAutomations');
           if (!autoTab || !autoTab.classList || !autoTab.classList.contains('active')) return;
           const now = Date.now();
           if (_autoLastRenderMs && (now - _autoLastRenderMs) < 2500) return;
@@ -4769,8 +5472,20 @@ async function init(){
     } catch(e){}
 
     qs('#refreshBtn').onclick = refreshEntities;
-    qs('#clearFilter').onclick = () => { qs('#filter').value=''; getHass().then(({hass})=>renderEntities(hass,'')); };
-    qs('#filter').oninput = async () => { try{ const { hass } = await getHass(); renderEntities(hass, qs('#filter').value); } catch(e){} };
+    // Delegated row handlers (the render functions rebuild these subtrees via innerHTML).
+    const entRoot = qs('#entities');
+    if (entRoot) {
+      entRoot.addEventListener('click', onEntitiesClick);
+      entRoot.addEventListener('scroll', () => scheduleRender('entitiesWindow', renderEntityWindow), { passive: true });
+    }
+    const mappedRoot = qs('#mappedValues');
+    if (mappedRoot) mappedRoot.addEventListener('click', onMappedValuesClick);
+    const suggRoot = qs('#suggestions');
+    if (suggRoot) suggRoot.addEventListener('click', onSuggestionsClick);
+    const filterEl = qs('#filter');
+    qs('#clearFilter').onclick = () => { if (filterEl) filterEl.value=''; getHass().then(({hass})=>scheduleRender('entities', () => renderEntities(hass,''))); };
+    // Keystroke bursts collapse into one entities render per frame (the latest value wins).
+    if (filterEl) filterEl.oninput = () => { getHass().then(({hass}) => scheduleRender('entities', () => renderEntities(hass, filterEl.value))).catch(() => {}); };
 
     const btnSave = qs('#btnConnSave');
     if (btnSave) btnSave.onclick = () => saveConnectionOverrides('save');
@@ -4811,8 +5526,9 @@ async function init(){
       }
     };
 
+    const gwResult = qs('#gwTestResult');
     qs('#btnGatewayTest').onclick = async () => {
-      const el = qs('#gwTestResult');
+      const el = gwResult;
       if (el) el.textContent = 'running…';
       try{
         const resp = await callServiceResponse('clawdbot','gateway_test',{});
@@ -4833,16 +5549,36 @@ async function init(){
       if (!t) return {};
       try{ return JSON.parse(t); }catch(e){ return null; }
     };
+    // One-entry memo: unchanged textarea content is never parsed twice.
+    let _attrsCache = { txt: null, val: null };
+    const parseAttrs = (txt) => {
+      if (txt === _attrsCache.txt) return _attrsCache.val;
+      const val = parseJsonSafe(txt);
+      _attrsCache = { txt, val };
+      return val;
+    };
 
     const btnSend = qs('#btnSendEvent');
+    const evt = {
+      result: qs('#evtResult'),
+      type: qs('#evtType'),
+      severity: qs('#evtSeverity'),
+      source: qs('#evtSource'),
+      attrs: qs('#evtAttrs'),
+    };
+    // Validate while typing so errors show before submit; submit then hits the memo.
+    if (evt.attrs) evt.attrs.addEventListener('input', debounce(() => {
+      const v = parseAttrs(evt.attrs.value);
+      if (evt.result) evt.result.textContent = (v === null) ? 'attributes JSON is invalid' : '';
+    }, 200));
     if (btnSend) btnSend.onclick = async () => {
-      const resultEl = qs('#evtResult');
+      const resultEl = evt.result;
       if (resultEl) resultEl.textContent = 'Sending…';
-      const event_type = (qs('#evtType') ? qs('#evtType').value.trim() : 'clawdbot.test');
-      const severity = (qs('#evtSeverity') ? qs('#evtSeverity').value : 'info');
-      const source = (qs('#evtSource') ? qs('#evtSource').value.trim() : 'panel');
-      const attrsTxt = (qs('#evtAttrs') ? qs('#evtAttrs').value : '');
-      const attrs = parseJsonSafe(attrsTxt);
+      const event_type = (evt.type ? evt.type.value.trim() : 'clawdbot.test');
+      const severity = (evt.severity ? evt.severity.value : 'info');
+      const source = (evt.source ? evt.source.value.trim() : 'panel');
+      const attrsTxt = (evt.attrs ? evt.attrs.value : '');
+      const attrs = parseAttrs(attrsTxt);
       if (attrs === null) {
         if (resultEl) resultEl.textContent = 'attributes JSON is invalid';
         return;
@@ -4862,10 +5598,14 @@ async function init(){
 
     const sessionSel = qs('#chatSessionSelect');
     if (sessionSel) sessionSel.onchange = async () => {
+      if (_sessionAbort) _sessionAbort.abort();
+      const ctl = _sessionAbort = new AbortController();
+      const signal = ctl.signal;
       chatSessionKey = sessionSel.value || null;
-      await loadChatLatest();
-      renderChat({ autoScroll: true });
-      await refreshTokenUsage();
+      await loadChatLatest({ signal });
+      if (signal.aborted) return;
+      scheduleRenderChat({ autoScroll: true });
+      refreshTokenUsageThrottled({ signal });
       if (chatPollingActive) scheduleChatPoll(CHAT_POLL_INITIAL_MS);
     };
 
@@ -4891,9 +5631,9 @@ async function init(){
           sessionSel.value = key;
           chatSessionKey = key;
           await loadChatLatest();
-          renderChat({ autoScroll: true });
+          scheduleRenderChat({ autoScroll: true });
         try{ if (_chatMode==="voice") chatVoiceVizStart(); }catch(e){}
-          await refreshTokenUsage();
+          refreshTokenUsageThrottled();
           if (chatPollingActive) scheduleChatPoll(CHAT_POLL_INITIAL_MS);
           toast('Created new session');
         }
@@ -4903,23 +5643,32 @@ async function init(){
         console.warn('chat_new_session failed', e);
       }
     };
+    // Only writes .disabled when it flips; key repeat is throttled to one check per 50ms.
+    let _sendEnabledLast = null;
     const setSendEnabled = () => {
       if (!composer || !composerSend) return;
-      composerSend.disabled = !String(composer.value||'').trim();
+      const dis = !String(composer.value||'').trim();
+      if (dis === _sendEnabledLast) return;
+      _sendEnabledLast = dis;
+      composerSend.disabled = dis;
     };
-    if (composer) composer.addEventListener('input', setSendEnabled);
+    if (composer) composer.addEventListener('input', throttle(setSendEnabled, 50));
     setSendEnabled();
 
-    if (composerSend) composerSend.onclick = async () => {
+    const doSend = async () => {
       const input = composer;
+      if (!input) return;
       const text = input.value.trim();
       if (!text) return;
 
-      // Append to HA-side chat store (single source of truth). Avoid local push to prevent duplicates.
-      try{ await callService('clawdbot','chat_append',{ role:'user', text, session_key: chatSessionKey }); } catch(e){}
+      // Show the message at once; the HA-side chat store stays the single source of truth
+      // (no local push), and the render after loadChatLatest swaps in the stored copy.
+      appendChatBubble({ role: 'user', text });
+      try{ await callService('clawdbot','chat_append',{ role:'user', text, session_key: chatSessionKey }); }
+      catch(e){ scheduleRenderChat({ force: true }); }
       input.value = '';
       try{ await loadChatLatest(); } catch(e){}
-      renderChat({ autoScroll: true });
+      scheduleRenderChat({ autoScroll: true });
       boostChatPolling();
       if (chatPollingActive) scheduleChatPoll(CHAT_POLL_INITIAL_MS);
 
@@ -4931,29 +5680,25 @@ async function init(){
         console.warn('sessions_send failed', e);
       } finally {
         setTyping(false);
-        await refreshTokenUsage();
+        refreshTokenUsageThrottled();
       }
     };
-    qs('#chatComposer').addEventListener('keydown', (ev) => {
-      if (ev.key === 'Enter') {
+    if (composerSend) composerSend.addEventListener('click', doSend);
+    // Enter sends directly (no synthetic click); Shift+Enter is left to the input.
+    if (composer) composer.addEventListener('keydown', (ev) => {
+      if (ev.key === 'Enter' && !ev.shiftKey) {
         ev.preventDefault();
-        qs('#chatComposerSend').click();
+        doSend();
       }
     });
 
-    // Default landing: Setup if essentials/mapping are missing; otherwise Agent.
-    const cfg = (window.__CLAWDBOT_CONFIG__ || {});
-    const firstRun = !!(cfg.essentials_missing || cfg.mapping_missing);
     if (firstRun) {
-      qs('#tabSetup').onclick();
       // Lightweight wizard hint banner
       try{ setStatus(true, 'setup needed', 'Complete connection + entity configuration, then return to Agent/Cockpit.'); } catch(e){}
-    } else {
-      qs('#tabAgent').onclick();
     }
 
     try{ const { hass } = await getHass(); dbgStep('connected');
-    setStatus(true,'connected',''); renderSuggestions(hass); renderMappedValues(hass); renderRecommendations(hass); } catch(e){ const hint = (window === window.top) ? 'Tip: open via the Home Assistant sidebar panel (iframe) to access hass connection.' : ''; setStatus(false,'error', String(e), hint); }
+    setStatus(true,'connected',''); scheduleRender('suggestions', () => renderSuggestions(hass)); scheduleRender('mapped', () => renderMappedValues(hass)); scheduleRender('recs', () => renderRecommendations(hass)); } catch(e){ const hint = (window === window.top) ? 'Tip: open via the Home Assistant sidebar panel (iframe) to access hass connection.' : ''; setStatus(false,'error', String(e), hint); }
     } catch(e) {
       try{ if (DEBUG_UI) dbgStep('init-fatal');
       console.error('[clawdbot] init fatal', e); } catch(_e) {}
@@ -4972,6 +5717,7 @@ async function init(){
 
     const run = async () => {
       try{
+        await window.__clawdbotConfigReady;
         await init();
         window.__clawdbotPanelInit = true;
       } catch(e) {
@@ -4984,9 +5730,17 @@ async function init(){
       }
     };
 
-    // Kick once; retry once on next tick in case DOM wasn't ready.
+    // Kick once; retry once when the document finishes loading, if it hadn't yet.
+    // A failure on a complete document is a genuine init error and is not retried.
     run().catch(() => {
-      try{ setTimeout(() => { run().catch(()=>{}); }, 50); } catch(_e) {}
+      if (document.readyState === 'complete') return;
+      const onRs = () => {
+        if (document.readyState !== 'complete') return;
+        document.removeEventListener('readystatechange', onRs);
+        if (window.__clawdbotPanelInit === true) return;
+        run().catch(()=>{});
+      };
+      document.addEventListener('readystatechange', onRs);
     });
   }
 
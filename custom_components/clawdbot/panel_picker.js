@@ -0,0 +1,60 @@
+// Clawdbot entity picker search worker (served by HA as /clawdbot-picker-worker.js).
+//
+// Holds a trigram inverted index of the lowercased entity ids so per-keystroke substring
+// search stays off the panel's main thread. Messages:
+//   {type:'index', ids}        (re)build the index; ids are lowercased entity_ids
+//   {type:'query', seq, q}     reply {seq, idx} with ascending indexes of ids containing q
+(function(){
+  let ids = [];
+  let grams = new Map();  // trigram -> Int32Array of ascending id indexes
+
+  function build(list){
+    ids = list;
+    const acc = new Map();
+    for (let i=0;i<list.length;i++){
+      const s = list[i];
+      const seen = new Set();
+      for (let j=0;j+3<=s.length;j++){
+        const g = s.substr(j, 3);
+        if (seen.has(g)) continue;
+        seen.add(g);
+        let a = acc.get(g);
+        if (!a) acc.set(g, a = []);
+        a.push(i);
+      }
+    }
+    grams = new Map();
+    for (const [g, a] of acc) grams.set(g, Int32Array.from(a));
+  }
+
+  function query(q){
+    const out = [];
+    if (q.length < 3) {
+      for (let i=0;i<ids.length;i++) if (ids[i].includes(q)) out.push(i);
+      return Int32Array.from(out);
+    }
+    // Every match contains every trigram of q: take the rarest posting list as the
+    // candidate set and verify the full substring on just those ids.
+    let best = null;
+    for (let j=0;j+3<=q.length;j++){
+      const p = grams.get(q.substr(j, 3));
+      if (!p) return new Int32Array(0);
+      if (!best || p.length < best.length) best = p;
+    }
+    for (let k=0;k<best.length;k++){
+      const i = best[k];
+      if (ids[i].includes(q)) out.push(i);
+    }
+    return Int32Array.from(out);
+  }
+
+  self.onmessage = (ev) => {
+    const m = ev.data || {};
+    if (m.type === 'index') {
+      build(Array.isArray(m.ids) ? m.ids : []);
+    } else if (m.type === 'query') {
+      const idx = query(String(m.q || ''));
+      self.postMessage({ seq: m.seq, idx }, [idx.buffer]);
+    }
+  };
+})();
@@ -0,0 +1,130 @@
+// Clawdbot agent visualizer painter (served by HA as /clawdbot-panel-viz.js).
+//
+// Runs as a dedicated worker that owns the #agentViz OffscreenCanvas, so the draw loop
+// never competes with the panel's main thread. The panel keeps the Web Audio analysis
+// (not available in workers) and posts small feature messages:
+//   {type:'init', canvas}                       transfer the OffscreenCanvas once
+//   {type:'state', live, amp, centroid, flatness, peakRate, mood, on}
+//   {type:'run', on}                            pause/resume the loop
+// Loaded as a classic script instead, it only defines self.clawdbotVizPaint for the
+// main-thread fallback (browsers without transferControlToOffscreen).
+(function(){
+  function paint(ctx, w, h, t, s){
+    let amp = s.amp || 0;
+    const centroid = (s.centroid != null) ? s.centroid : 0.25;
+    const flatness = (s.flatness != null) ? s.flatness : 0.15;
+    const peakRate = s.peakRate || 0;
+
+    const speaking = amp > 0.02;
+    if (!speaking && !s.live) {
+      // idle breathing when mic unavailable
+      amp = 0.04 + 0.01*Math.sin(t*0.6);
+    }
+
+    // clear
+    ctx.clearRect(0,0,w,h);
+
+    // ring params
+    const cx=w/2, cy=h/2;
+    const baseR = Math.min(w,h)*0.24;
+
+    // Timbre/texture proxy -> jitter/noise granularity
+    const idleJitter = 0.35;
+    const jitter = (speaking ? (0.9 + amp*7.5 + flatness*3.0) : idleJitter);
+
+    // Mood base hue + pitch proxy (centroid) -> hue shift + rotation speed
+    const mood = s.mood || 'calm';
+    const baseHue = (mood==='alert') ? 6 : (mood==='focused') ? 272 : (mood==='degraded') ? 38 : 186;
+    const hue = baseHue + (centroid-0.35)*70;
+    const sat = 92;
+    const light = 56;
+
+    const colA = (a) => `hsla(${hue.toFixed(1)}, ${sat}%, ${light}%, ${a})`;
+
+    // sketch ring
+    ctx.lineWidth = 2;
+    ctx.strokeStyle = colA(0.52 + amp*0.28);
+    // Volume → glow intensity
+    ctx.shadowBlur = 8 + amp*34;
+    ctx.shadowColor = colA(0.28 + amp*0.18);
+
+    // Pitch proxy → rotation speed
+    const rot = (0.9 + centroid*2.4);
+
+    ctx.beginPath();
+    for (let a=0;a<=Math.PI*2+0.001;a+=Math.PI/64){
+      const rr = baseR + (Math.sin(a*6 + t*3*rot)*0.8 + Math.sin(a*13 - t*2.1*rot)*0.5)*jitter;
+      const x = cx + Math.cos(a)*rr;
+      const y = cy + Math.sin(a)*rr;
+      if (a===0) ctx.moveTo(x,y); else ctx.lineTo(x,y);
+    }
+    ctx.closePath();
+    ctx.stroke();
+
+    // Duration (speech vs silence) → ripple cadence + tail fade
+    // Rhythm (peak rate) → pulse accent
+    ctx.shadowBlur = 0;
+    const rippleSpeed = speaking ? (0.85 + Math.min(1.2, peakRate*0.12)) : 0.18;
+    const rippleCount = speaking ? 4 : 2;
+    for (let i=0;i<rippleCount;i++){
+      const phase = (t*rippleSpeed + i*0.22) % 1;
+      const rr = baseR + 10 + phase*(18 + amp*42);
+      const alpha = (1-phase) * (speaking ? (0.12 + amp*0.18) : 0.06);
+      ctx.strokeStyle = colA(alpha);
+      ctx.lineWidth = (i===0 && peakRate>1.2) ? 1.6 : 1;
+      ctx.beginPath();
+      ctx.arc(cx,cy,rr,0,Math.PI*2);
+      ctx.stroke();
+    }
+
+    // Texture → subtle grain dots
+    const dots = speaking ? Math.floor(6 + flatness*18) : 2;
+    ctx.fillStyle = colA(0.12 + amp*0.10);
+    for (let i=0;i<dots;i++){
+      const a = (i/dots)*Math.PI*2 + t*0.4*rot;
+      const rr = baseR + 6 + (i%3)*4 + amp*16;
+      const x = cx + Math.cos(a)*rr;
+      const y = cy + Math.sin(a*1.1)*rr;
+      ctx.fillRect(x, y, 1, 1);
+    }
+  }
+
+  self.clawdbotVizPaint = paint;
+  if (typeof WorkerGlobalScope === 'undefined' || !(self instanceof WorkerGlobalScope)) return;
+
+  // Worker side: own the frame loop; without fresh features it keeps the idle animation.
+  const nextFrame = (typeof self.requestAnimationFrame === 'function')
+    ? (fn) => self.requestAnimationFrame(fn)
+    : (fn) => setTimeout(fn, 16);
+  const cancelFrame = (typeof self.cancelAnimationFrame === 'function')
+    ? (id) => self.cancelAnimationFrame(id)
+    : (id) => clearTimeout(id);
+
+  let canvas = null;
+  let ctx = null;
+  let on = true;
+  let frame = 0;
+  const state = { live: false, amp: 0, centroid: 0.3, flatness: 0.2, peakRate: 0, mood: 'calm' };
+
+  function tick(){
+    frame = 0;
+    if (!on || !ctx) return;
+    paint(ctx, canvas.width, canvas.height, Date.now()/1000, state);
+    frame = nextFrame(tick);
+  }
+
+  self.onmessage = (ev) => {
+    const m = ev.data || {};
+    if (m.type === 'init' && m.canvas) {
+      canvas = m.canvas;
+      ctx = canvas.getContext('2d');
+    } else if (m.type === 'state') {
+      for (const k in state) if (m[k] !== undefined) state[k] = m[k];
+      if (m.on !== undefined) on = !!m.on;
+    } else if (m.type === 'run') {
+      on = !!m.on;
+    }
+    if (on && ctx && !frame) frame = nextFrame(tick);
+    else if (!on && frame) { cancelFrame(frame); frame = 0; }
+  };
+})();